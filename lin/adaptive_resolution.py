@@ -0,0 +1,200 @@
+"""Dynamic render-resolution scaling driven by measured frame time."""
+
+import math
+import sys
+from collections import deque
+
+import numpy as np
+from OpenGL.GL import *
+
+from frame_timer import timer_query_supported
+
+# Lowest fraction of the view's pixel size rendered in each direction
+MIN_RENDER_SCALE = 0.35
+
+# Frames costing more than this are one-off stalls (shader compiles,
+# texture uploads), not a measure of fill cost
+MAX_FRAME_COST_MS = 250.0
+
+# Frames whose GPU time may be awaited at once; later frames go untimed
+# until one lands, so polling never stalls
+MAX_PENDING_GPU_FRAMES = 4
+
+
+class ResolutionScaler:
+    """Picks a render scale that keeps the cost of a frame within the
+    budget of a target frame rate.
+
+    Fill cost grows with the pixel count, so the scale moves by the square
+    root of the time ratio when too slow, and creeps back up when there
+    is headroom. Costs are smoothed so one slow frame does not jump. Feed
+    it what a frame took to render, not the time between frames: with
+    on-demand redraws the interval follows input events, not the GPU.
+    """
+
+    def __init__(self, target_fps=30.0, min_scale=MIN_RENDER_SCALE):
+        self.target_fps = target_fps
+        self.min_scale = min_scale
+        self.scale = 1.0
+        self._average_ms = None
+
+    def reset(self):
+        """Back to full resolution, e.g. once the view goes idle."""
+        self.scale = 1.0
+        self._average_ms = None
+
+    def update(self, frame_ms):
+        """Feed the measured cost of a frame; returns the new scale."""
+        if frame_ms > MAX_FRAME_COST_MS:
+            self._average_ms = None
+            return self.scale
+        if self._average_ms is None:
+            self._average_ms = frame_ms
+        else:
+            self._average_ms += 0.2 * (frame_ms - self._average_ms)
+        target_ms = 1000.0 / self.target_fps
+        if self._average_ms > target_ms * 1.1:
+            self.scale *= math.sqrt(target_ms / self._average_ms)
+            # Judge the new scale on fresh frames
+            self._average_ms = None
+        elif self._average_ms < target_ms * 0.8:
+            self.scale *= 1.05
+        self.scale = min(max(self.scale, self.min_scale), 1.0)
+        return self.scale
+
+
+class GPUFrameClock:
+    """GPU time of whole frames, for ResolutionScaler.
+
+    begin()/end() bracket a frame's GL commands with GL_TIMESTAMP queries;
+    poll() returns the newest finished frame's ms without waiting. Unlike
+    a GL_TIME_ELAPSED query, timestamps can wrap FrameTimer's per-stage
+    queries, so this runs whether or not the timing overlay is on. Needs
+    the GL context current.
+    """
+
+    def __init__(self, max_pending=MAX_PENDING_GPU_FRAMES):
+        self.max_pending = max_pending
+        self.supported = None
+        self._pool = []
+        self._start = 0
+        self._pending = deque()  # (start query, end query), oldest first
+
+    def begin(self):
+        if self.supported is None:
+            self.supported = timer_query_supported()
+            if not self.supported:
+                print("GPUFrameClock: no timer queries; adaptive resolution stays off",
+                      file=sys.stderr)
+        self._start = 0
+        if self.supported and len(self._pending) < self.max_pending:
+            self._start = self._query()
+            glQueryCounter(self._start, GL_TIMESTAMP)
+
+    def end(self):
+        if not self._start:
+            return
+        end = self._query()
+        glQueryCounter(end, GL_TIMESTAMP)
+        self._pending.append((self._start, end))
+        self._start = 0
+
+    def poll(self):
+        """ms of the newest frame whose queries have finished, or None."""
+        latest = None
+        available = np.zeros(1, dtype=np.int32)
+        start_ns = np.zeros(1, dtype=np.uint64)
+        end_ns = np.zeros(1, dtype=np.uint64)
+        while self._pending:
+            start, end = self._pending[0]
+            glGetQueryObjectiv(end, GL_QUERY_RESULT_AVAILABLE, available)
+            if not available[0]:
+                break
+            self._pending.popleft()
+            glGetQueryObjectui64v(start, GL_QUERY_RESULT, start_ns)
+            glGetQueryObjectui64v(end, GL_QUERY_RESULT, end_ns)
+            latest = (int(end_ns[0]) - int(start_ns[0])) / 1e6
+            self._pool.extend((start, end))
+        return latest
+
+    def _query(self):
+        return self._pool.pop() if self._pool else int(glGenQueries(1))
+
+    def delete(self):
+        queries = list(self._pool)
+        for pair in self._pending:
+            queries.extend(pair)
+        if self._start:
+            queries.append(self._start)
+        if queries:
+            glDeleteQueries(len(queries), queries)
+        self._pool = []
+        self._pending.clear()
+        self._start = 0
+        self.supported = None
+
+
+class ScaledFramebuffer:
+    """Offscreen color + depth target that is upscaled onto the view."""
+
+    def __init__(self):
+        self.fbo = 0
+        self._color_tex = 0
+        self._depth_rb = 0
+        self.width = 0
+        self.height = 0
+
+    def bind(self, width, height):
+        """Bind for drawing at width x height, (re)allocating as needed.
+        Returns False if the framebuffer could not be completed."""
+        if (width, height) != (self.width, self.height):
+            self.delete()
+            self._allocate(width, height)
+        if not self.fbo:
+            return False
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, width, height)
+        return True
+
+    def _allocate(self, width, height):
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+        self._color_tex = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self._color_tex)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D,
+                               self._color_tex, 0)
+
+        self._depth_rb = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self._depth_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER,
+                                  self._depth_rb)
+
+        complete = glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if not complete:
+            print("ScaledFramebuffer: FBO not complete", file=sys.stderr)
+            self.delete()
+        # Remembered even on failure so a broken size is not retried every frame
+        self.width, self.height = width, height
+
+    def present(self, target_fbo, width, height):
+        """Upscale the rendered image onto target_fbo at width x height."""
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target_fbo)
+        glBlitFramebuffer(0, 0, self.width, self.height, 0, 0, width, height,
+                          GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_FRAMEBUFFER, target_fbo)
+        glViewport(0, 0, width, height)
+
+    def delete(self):
+        if self.fbo:
+            glDeleteFramebuffers(1, [self.fbo])
+            glDeleteTextures(1, [self._color_tex])
+            glDeleteRenderbuffers(1, [self._depth_rb])
+        self.fbo = self._color_tex = self._depth_rb = 0
+        self.width = self.height = 0
@@ -1,8 +1,85 @@
 """Parse Quake 3 animation.cfg files."""
 
+import numpy as np
+
 from md3_types import Animation, AnimNumber
 
 
+class AnimationTimeline:
+    """Precompiled frame sequence for one Animation.
+
+    frames[i] is the absolute MD3 frame for local frame i with reversal
+    already applied; next_local[i] is the local frame it blends into, with
+    loop wrap or end clamp applied. Evaluating a time is then one division
+    plus table lookups.
+    """
+
+    def __init__(self, anim):
+        n = max(anim.numFrames, 0)
+        self.first_frame = anim.firstFrame
+        self.num_frames = n
+        self.frame_lerp = anim.frameLerp
+        self.loop_frames = min(max(anim.loopFrames, 0), n)
+        self.loop_start = n - self.loop_frames
+        self.animated = n > 1 and anim.frameLerp > 0
+
+        if n == 0:
+            self.frames = np.array([anim.firstFrame], dtype=np.int32)
+            self.next_local = np.zeros(1, dtype=np.int32)
+            return
+
+        local = np.arange(n, dtype=np.int32)
+        if anim.reversed:
+            self.frames = anim.firstFrame + n - 1 - local
+        else:
+            self.frames = anim.firstFrame + local
+
+        next_local = local + 1
+        if self.loop_frames > 0:
+            next_local[next_local >= n] = self.loop_start
+        else:
+            next_local = np.minimum(next_local, n - 1)
+        self.next_local = next_local
+
+    def local_at(self, t_ms):
+        """Return (local frame, fraction) t_ms after the animation started."""
+        if not self.animated or t_ms <= 0:
+            return 0, 0.0
+        pos = t_ms / self.frame_lerp
+        step = int(pos)
+        frac = pos - step
+        if self.loop_frames > 0:
+            if step >= self.num_frames:
+                step = self.loop_start + (step - self.loop_start) % self.loop_frames
+        elif step >= self.num_frames - 1:
+            return self.num_frames - 1, 0.0
+        return step, frac
+
+    def frames_at(self, t_ms):
+        """Return (frame_a, frame_b, fraction) in absolute MD3 frames."""
+        local, frac = self.local_at(t_ms)
+        return int(self.frames[local]), int(self.frames[self.next_local[local]]), frac
+
+    def frames_at_many(self, t_ms):
+        """Vectorized frames_at over an array of times (e.g. for batch export)."""
+        t_ms = np.asarray(t_ms, dtype=np.float64)
+        if not self.animated:
+            frame = np.full(t_ms.shape, self.frames[0])
+            return frame, frame.copy(), np.zeros(t_ms.shape)
+
+        pos = np.maximum(t_ms, 0.0) / self.frame_lerp
+        step = pos.astype(np.int64)
+        frac = pos - step
+        if self.loop_frames > 0:
+            wrapped = self.loop_start + (step - self.loop_start) % self.loop_frames
+            local = np.where(step >= self.num_frames, wrapped, step)
+        else:
+            at_end = step >= self.num_frames - 1
+            local = np.where(at_end, self.num_frames - 1, step)
+            frac = np.where(at_end, 0.0, frac)
+        return self.frames[local], self.frames[self.next_local[local]], frac
+
+
 class AnimationConfig:
     def __init__(self, data):
         self.animations = [Animation() for _ in range(AnimNumber.MAX_TOTALANIMATIONS)]
@@ -16,6 +93,48 @@ class AnimationConfig:
             text = data.decode('latin-1')
 
         self._parse(text)
+        self.timelines = [AnimationTimeline(anim) for anim in self.animations]
+        self._stack_timelines()
+
+    def _stack_timelines(self):
+        """Concatenate every timeline's tables so frames_at_many can evaluate
+        a different animation per element."""
+        timelines = self.timelines
+        sizes = [len(t.frames) for t in timelines]
+        self._table_base = np.cumsum([0] + sizes[:-1]).astype(np.int64)
+        self._table_frames = np.concatenate([t.frames for t in timelines])
+        self._table_next = np.concatenate([t.next_local for t in timelines])
+        self._num_frames = np.array([t.num_frames for t in timelines], dtype=np.int64)
+        self._frame_lerp = np.array([t.frame_lerp if t.animated else 1 for t in timelines],
+                                    dtype=np.float64)
+        self._loop_frames = np.array([t.loop_frames for t in timelines], dtype=np.int64)
+        self._loop_start = np.array([t.loop_start for t in timelines], dtype=np.int64)
+        self._animated = np.array([t.animated for t in timelines], dtype=bool)
+
+    def frames_at_many(self, anims, t_ms):
+        """AnimationTimeline.frames_at_many with one animation index per
+        element of t_ms, in a single pass over all of them."""
+        anims = np.asarray(anims, dtype=np.int64)
+        t_ms = np.asarray(t_ms, dtype=np.float64)
+        num_frames = self._num_frames[anims]
+        loop_frames = self._loop_frames[anims]
+        loop_start = self._loop_start[anims]
+        animated = self._animated[anims]
+
+        pos = np.maximum(t_ms, 0.0) / self._frame_lerp[anims]
+        step = pos.astype(np.int64)
+        frac = pos - step
+        looped = loop_frames > 0
+        wrapped = loop_start + (step - loop_start) % np.maximum(loop_frames, 1)
+        local = np.where(looped, np.where(step >= num_frames, wrapped, step),
+                         np.minimum(step, num_frames - 1))
+        local = np.where(animated, local, 0)
+        frac = np.where(animated & (looped | (step < num_frames - 1)), frac, 0.0)
+
+        base = self._table_base[anims]
+        frame_a = self._table_frames[base + local]
+        frame_b = self._table_frames[base + self._table_next[base + local]]
+        return frame_a, frame_b, frac
 
     def _parse(self, text):
         # Tokenize: split into lines, process sequentially
@@ -0,0 +1,198 @@
+"""Grid of animated player models drawn with instanced rendering."""
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from frustum import frustum_planes, spheres_visible
+from lod_selector import projected_size, select_lods
+from md3_types import AnimNumber
+from model_renderer import INSTANCE_TEXELS
+
+# Animations cycled through across the grid
+_TORSO_ANIMS = (AnimNumber.TORSO_STAND, AnimNumber.TORSO_GESTURE, AnimNumber.TORSO_ATTACK,
+                AnimNumber.TORSO_ATTACK2, AnimNumber.TORSO_STAND2)
+_LEGS_ANIMS = (AnimNumber.LEGS_IDLE, AnimNumber.LEGS_WALK, AnimNumber.LEGS_RUN,
+               AnimNumber.LEGS_BACK, AnimNumber.LEGS_IDLECR, AnimNumber.LEGS_WALKCR)
+
+
+@dataclass
+class CrowdMember:
+    model: Any = None          # MD3PlayerModel
+    texture_cache: Any = None  # TextureCache the model's textures load into
+    skin: str = ""
+    torso_anim: int = AnimNumber.TORSO_STAND
+    legs_anim: int = AnimNumber.LEGS_IDLE
+    time_offset_ms: float = 0.0
+    position: Any = None       # (3,) float32
+
+
+class Crowd:
+    """Many independently animated players sharing per-model GPU buffers.
+
+    Members are ordered by (model, skin) and, each frame, by LOD within
+    that, so each run is one instanced batch; poses for all members of a
+    model are evaluated in one vectorized call, whatever their animations.
+    LODs are picked per member from its projected size with hysteresis,
+    and members whose parts are all outside the view frustum are skipped.
+    """
+
+    def __init__(self, members, clock=None):
+        self._clock = clock or (lambda: time.monotonic() * 1000.0)
+        self._start_ms = self._clock()
+        self.members = sorted(members, key=lambda m: (id(m.model), m.skin or ""))
+        self._positions = np.array([m.position for m in self.members],
+                                   dtype=np.float32).reshape(-1, 3)
+        self._offsets = np.array([m.time_offset_ms for m in self.members], dtype=np.float64)
+        self._data = np.zeros((len(self.members), INSTANCE_TEXELS, 4), dtype=np.float32)
+        self._part_visible = np.ones((len(self.members), 3), dtype=bool)
+
+        # Contiguous (model, skin) runs -> instanced batches
+        self._runs = []
+        run_ids = []
+        for i, member in enumerate(self.members):
+            run = self._runs[-1] if self._runs else None
+            if run and run[0] is member.model and run[1] == member.skin:
+                self._runs[-1] = (run[0], run[1], run[2], run[3] + 1)
+            else:
+                self._runs.append((member.model, member.skin, i, 1))
+            run_ids.append(len(self._runs) - 1)
+        self._run_ids = np.array(run_ids, dtype=np.int64)
+
+        # Per-member LOD state and bounding spheres for picking it
+        self.lods = np.zeros(len(self.members), dtype=np.int64)
+        self._num_lods = np.array([m.model.lod_count for m in self.members], dtype=np.int64)
+        self._radii = np.array([m.model.bounding_radius for m in self.members], dtype=np.float32)
+        self._centers = self._positions.copy()
+        self._centers[:, 2] += [m.model.center_height for m in self.members]
+
+        # id(model) -> (model, member indices, torso anims, legs anims)
+        by_model = {}
+        for i, member in enumerate(self.members):
+            by_model.setdefault(id(member.model), (member.model, []))[1].append(i)
+        self._pose_groups = [
+            (model, np.array(indices),
+             np.array([self.members[i].torso_anim for i in indices], dtype=np.int64),
+             np.array([self.members[i].legs_anim for i in indices], dtype=np.int64))
+            for model, indices in by_model.values()]
+
+        lo = self._positions.min(axis=0) if len(self.members) else np.zeros(3)
+        hi = self._positions.max(axis=0) if len(self.members) else np.zeros(3)
+        heights = [m.model.center_height for m in self.members] or [0.0]
+        self.center = (lo + hi) * 0.5 + np.array([0.0, 0.0, max(heights)], dtype=np.float32)
+        self.radius = float(np.linalg.norm(hi - lo)) * 0.5 + 64.0
+
+    def __len__(self):
+        return len(self.members)
+
+    @classmethod
+    def grid(cls, sources, rows, cols, spacing=64.0, clock=None):
+        """Build a rows x cols grid cycling through sources, their skins,
+        animations and time offsets. sources holds (model, texture_cache) pairs."""
+        members = []
+        for i in range(rows * cols):
+            model, texture_cache = sources[i % len(sources)]
+            skins = model.available_skins or [model.current_skin]
+            row, col = divmod(i, cols)
+            members.append(CrowdMember(
+                model=model,
+                texture_cache=texture_cache,
+                skin=skins[(i // len(sources)) % len(skins)],
+                torso_anim=_TORSO_ANIMS[i % len(_TORSO_ANIMS)],
+                legs_anim=_LEGS_ANIMS[(i // len(_TORSO_ANIMS)) % len(_LEGS_ANIMS)],
+                time_offset_ms=(i * 137) % 2000,
+                position=((col - (cols - 1) * 0.5) * spacing,
+                          (row - (rows - 1) * 0.5) * spacing, 0.0),
+            ))
+        return cls(members, clock=clock)
+
+    def update_lods(self, view_matrix, proj_matrix):
+        sizes = projected_size(self._centers, self._radii, view_matrix, proj_matrix)
+        self.lods = select_lods(sizes, self.lods, self._num_lods)
+        return self.lods
+
+    def instance_data(self, renderer, t_ms, planes=None):
+        """Fill the instance buffer for time t_ms at the current LODs, in
+        member order (see ModelRenderer.render_crowd). With frustum planes,
+        also records which members' parts are on screen."""
+        data = self._data
+        timer = renderer.timer
+        for model, indices, torso_anims, legs_anims in self._pose_groups:
+            with timer.stage('animation'):
+                legs, torso = model.frames_at_many(torso_anims, legs_anims,
+                                                   t_ms + self._offsets[indices])
+            with timer.stage('tags'):
+                parts = model.part_matrices(legs, torso)
+                parts[:, :, 3, :3] += self._positions[indices, None, :]
+                data[indices, :12] = parts.reshape(len(indices), 12, 4)
+                if planes is not None:
+                    spheres = model.part_spheres(legs[0], legs[1], torso[0], torso[1], parts)
+                    self._part_visible[indices] = spheres_visible(spheres, planes)
+            with timer.stage('upload'):
+                zeros = np.zeros(len(indices))
+                frames = (legs, torso, (zeros, zeros, zeros))
+                lods = self.lods[indices]
+                # Frame texel offsets depend on the LOD's buffer layout
+                for lod in np.unique(lods):
+                    buffers = model.render_buffers(renderer, int(lod))
+                    sel = lods == lod
+                    for part, (frame_a, frame_b, frac) in enumerate(frames):
+                        off_a, off_b = buffers.frame_offsets(part, frame_a[sel], frame_b[sel])
+                        data[indices[sel], 12 + part, 0] = off_a
+                        data[indices[sel], 12 + part, 1] = off_b
+                        data[indices[sel], 12 + part, 2] = frac[sel]
+        return data
+
+    def render(self, renderer, view_matrix, proj_matrix, gamma):
+        if not self.members:
+            return
+        t_ms = self._clock() - self._start_ms
+        self.update_lods(view_matrix, proj_matrix)
+        data = self.instance_data(renderer, t_ms, frustum_planes(view_matrix, proj_matrix))
+        renderer.cull_stats.count(self._part_visible)
+
+        # Regroup visible instances so each (model, skin, LOD) is contiguous;
+        # a partly visible member is drawn whole
+        order = np.lexsort((self.lods, self._run_ids))
+        order = order[self._part_visible[order].any(axis=1)]
+        if not len(order):
+            return
+        run_ids = self._run_ids[order]
+        lods = self.lods[order]
+        changed = (run_ids[1:] != run_ids[:-1]) | (lods[1:] != lods[:-1])
+        starts = np.flatnonzero(np.r_[True, changed])
+        ends = np.r_[starts[1:], len(order)]
+        batches = []
+        with renderer.timer.stage('textures'):
+            for first, end in zip(starts, ends):
+                model, skin, member, _ = self._runs[run_ids[first]]
+                lod = int(lods[first])
+                texture_cache = self.members[member].texture_cache
+                batches.append((model.render_buffers(renderer, lod),
+                                model.surface_textures(texture_cache, skin, lod),
+                                int(first), int(end - first)))
+        renderer.render_crowd(batches, data[order], view_matrix, proj_matrix, gamma)
+
+    def stream_textures(self, budget_ms=4.0):
+        """Upgrade progressively streamed textures of the members' caches
+        within budget_ms in total. Returns how many caches are still streaming."""
+        deadline = time.monotonic() + budget_ms / 1000.0
+        waiting = 0
+        for texture_cache in self._texture_caches():
+            remaining_ms = (deadline - time.monotonic()) * 1000.0
+            if texture_cache.has_pending() and remaining_ms > 0:
+                texture_cache.stream_pending(remaining_ms)
+            waiting += texture_cache.has_pending()
+        return waiting
+
+    def _texture_caches(self):
+        return {id(m.texture_cache): m.texture_cache for m in self.members}.values()
+
+    def release(self, renderer):
+        """Free GPU buffers and textures of every model in the crowd."""
+        for model, _, first, _ in self._runs:
+            model.release_buffers(renderer)
+        for texture_cache in self._texture_caches():
+            texture_cache.flush()
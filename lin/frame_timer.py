@@ -0,0 +1,166 @@
+"""Per-stage CPU and GPU frame timing with rolling percentiles."""
+
+import time
+from collections import deque
+
+import numpy as np
+from OpenGL.GL import *
+
+# Timed stages of a frame, in overlay order
+FRAME_STAGES = ('animation', 'tags', 'textures', 'upload', 'draw', 'readback')
+_STAGE_INDEX = {name: i for i, name in enumerate(FRAME_STAGES)}
+
+# GPU results are read back this many frames late at most; frames beyond
+# that while the GPU lags get CPU timings only, so polling never stalls
+MAX_PENDING_FRAMES = 4
+
+
+def timer_query_supported():
+    """Check the current context for GL 3.3 or GL_ARB_timer_query."""
+    try:
+        version = (glGetIntegerv(GL_MAJOR_VERSION), glGetIntegerv(GL_MINOR_VERSION))
+        if tuple(int(v) for v in version) >= (3, 3):
+            return True
+        count = glGetIntegerv(GL_NUM_EXTENSIONS)
+        for i in range(int(count)):
+            name = glGetStringi(GL_EXTENSIONS, i)
+            if name in (b'GL_ARB_timer_query', 'GL_ARB_timer_query'):
+                return True
+    except Exception:
+        pass
+    return False
+
+
+class _NullStage:
+    """Stage context used while timing is off or outside a frame."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class FrameTimer:
+    """Times named render stages on the CPU and, with GL_TIME_ELAPSED
+    queries, on the GPU.
+
+    Wrap each frame in begin_frame()/end_frame() and each stage in
+    `with timer.stage(name):`. A stage may be entered several times per
+    frame; its times add up. Only the outermost stage gets a GPU query
+    since elapsed-time queries cannot nest. Query results are collected
+    at the start of later frames once available. Off until enabled.
+    """
+
+    def __init__(self, history=240):
+        self.enabled = False
+        self._cpu = np.full((history, len(FRAME_STAGES)), np.nan)  # ms per frame
+        self._gpu = np.full((history, len(FRAME_STAGES)), np.nan)
+        self._cpu_count = 0
+        self._gpu_count = 0
+        self._row = np.full(len(FRAME_STAGES), np.nan)
+        self._in_frame = False
+        self._stack = []  # (stage index, start time, query or 0)
+        self._next = 0
+        self._gpu_supported = None
+        self._query_pool = []
+        self._frame_queries = None  # [(stage index, query)] of the frame in progress
+        self._pending = deque()     # finished frames' queries awaiting results
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        if self._gpu_supported is None:
+            self._gpu_supported = timer_query_supported()
+        self._collect_gpu()
+        self._row[:] = np.nan
+        self._frame_queries = [] if (self._gpu_supported and
+                                     len(self._pending) < MAX_PENDING_FRAMES) else None
+        self._in_frame = True
+
+    def end_frame(self):
+        if not self._in_frame:
+            return
+        self._in_frame = False
+        self._cpu[self._cpu_count % len(self._cpu)] = self._row
+        self._cpu_count += 1
+        if self._frame_queries:
+            self._pending.append(self._frame_queries)
+        self._frame_queries = None
+
+    def stage(self, name):
+        """Context manager timing one stage of the current frame."""
+        if not self._in_frame:
+            return _NULL_STAGE
+        self._next = _STAGE_INDEX[name]
+        return self
+
+    def __enter__(self):
+        query = 0
+        if self._frame_queries is not None and not any(q for _, _, q in self._stack):
+            query = self._query_pool.pop() if self._query_pool else glGenQueries(1)
+            glBeginQuery(GL_TIME_ELAPSED, query)
+        self._stack.append((self._next, time.perf_counter(), query))
+        return self
+
+    def __exit__(self, *exc):
+        index, start, query = self._stack.pop()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        self._row[index] = np.nan_to_num(self._row[index]) + elapsed
+        if query:
+            glEndQuery(GL_TIME_ELAPSED)
+            self._frame_queries.append((index, query))
+        return False
+
+    def _collect_gpu(self):
+        """Read back every pending frame whose queries have finished."""
+        available = np.zeros(1, dtype=np.int32)
+        result = np.zeros(1, dtype=np.uint64)
+        while self._pending:
+            queries = self._pending[0]
+            # Queries finish in order, so the frame's last one decides
+            glGetQueryObjectiv(queries[-1][1], GL_QUERY_RESULT_AVAILABLE, available)
+            if not available[0]:
+                break
+            self._pending.popleft()
+            row = np.full(len(FRAME_STAGES), np.nan)
+            for index, query in queries:
+                glGetQueryObjectui64v(query, GL_QUERY_RESULT, result)
+                row[index] = np.nan_to_num(row[index]) + result[0] / 1e6
+                self._query_pool.append(query)
+            self._gpu[self._gpu_count % len(self._gpu)] = row
+            self._gpu_count += 1
+
+    def percentiles(self, q=(50, 95, 99), gpu=False):
+        """{stage: (ms at each percentile in q) or None} over the recorded
+        frames in which the stage ran."""
+        history, count = (self._gpu, self._gpu_count) if gpu else (self._cpu, self._cpu_count)
+        rows = history[:min(count, len(history))]
+        stats = {}
+        for index, name in enumerate(FRAME_STAGES):
+            samples = rows[:, index]
+            samples = samples[~np.isnan(samples)]
+            stats[name] = (tuple(float(v) for v in np.percentile(samples, q))
+                           if len(samples) else None)
+        return stats
+
+    def reset(self):
+        """Forget recorded timings (pending GPU frames still land later)."""
+        self._cpu[:] = np.nan
+        self._gpu[:] = np.nan
+        self._cpu_count = self._gpu_count = 0
+
+    def cleanup(self):
+        """Delete query objects; call with the GL context current."""
+        queries = list(self._query_pool)
+        for frame in self._pending:
+            queries.extend(query for _, query in frame)
+        if queries:
+            glDeleteQueries(len(queries), queries)
+        self._query_pool = []
+        self._pending.clear()
+        self._frame_queries = None
+        self._in_frame = False
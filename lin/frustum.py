@@ -0,0 +1,42 @@
+"""View-frustum extraction and bounding-sphere culling."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CullStats:
+    """Per-frame counts of player parts submitted and skipped."""
+    parts_drawn: int = 0
+    parts_culled: int = 0
+
+    def reset(self):
+        self.parts_drawn = 0
+        self.parts_culled = 0
+
+    def count(self, visible):
+        visible = np.asarray(visible)
+        drawn = int(np.count_nonzero(visible))
+        self.parts_drawn += drawn
+        self.parts_culled += visible.size - drawn
+
+
+def frustum_planes(view_matrix, proj_matrix):
+    """(6, 4) normalized planes (nx, ny, nz, d) of the view frustum in world
+    space, from flat column-major view and projection matrices."""
+    # reshape(4, 4) of a column-major matrix is its transpose, so the
+    # product below is (proj @ view) transposed
+    clip = (np.asarray(view_matrix, dtype=np.float64).reshape(4, 4)
+            @ np.asarray(proj_matrix, dtype=np.float64).reshape(4, 4)).T
+    planes = np.array([clip[3] + clip[0], clip[3] - clip[0],
+                       clip[3] + clip[1], clip[3] - clip[1],
+                       clip[3] + clip[2], clip[3] - clip[2]])
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return planes.astype(np.float32)
+
+
+def spheres_visible(spheres, planes):
+    """Boolean mask of (..., 4) spheres (x, y, z, radius) touching the frustum."""
+    distances = spheres[..., :3] @ planes[:, :3].T + planes[:, 3]
+    return (distances >= -spheres[..., 3:4]).all(axis=-1)
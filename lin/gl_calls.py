@@ -0,0 +1,136 @@
+"""GL call accounting and PyOpenGL fast-path configuration."""
+
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+import OpenGL
+
+# Set to 1 to run with PyOpenGL's per-call error checking and logging off
+# and the renderer's cached raw-call path on
+FAST_PATH_ENV = 'MD3VIEW_GL_FAST_PATH'
+
+
+def fast_path_requested():
+    return os.environ.get(FAST_PATH_ENV, '') not in ('', '0')
+
+
+def configure_pyopengl(fast_path):
+    """Set PyOpenGL's global flags. PyOpenGL reads them while building its
+    function wrappers, so this must run before OpenGL.GL is first imported."""
+    if 'OpenGL.GL' in sys.modules:
+        print("configure_pyopengl: OpenGL.GL already imported, flags not applied",
+              file=sys.stderr)
+        return
+    # Each checked call costs an extra glGetError round trip
+    OpenGL.ERROR_CHECKING = not fast_path
+    OpenGL.ERROR_LOGGING = not fast_path
+
+
+class GLCallStats:
+    """Counts calls and wall time per GL entry point, per frame.
+
+    install() replaces every gl* function in the given modules' globals
+    with a counting wrapper (the modules' own `from OpenGL.GL import *`
+    names included); uninstall() restores them. The wrapper itself adds a
+    little time, so absolute times run slightly high.
+    """
+
+    def __init__(self):
+        self._originals = []  # (module, name, function)
+        self._calls = Counter()
+        self._seconds = defaultdict(float)
+        self._frames = 0
+        self._total_at_frame = 0
+        self.last_frame_calls = 0  # GL calls in the most recent frame
+
+    @property
+    def installed(self):
+        return bool(self._originals)
+
+    def install(self, modules):
+        if self._originals:
+            return
+        for module in modules:
+            for name, function in list(vars(module).items()):
+                if name.startswith('gl') and callable(function):
+                    self._originals.append((module, name, function))
+                    setattr(module, name, self._wrap(name, function))
+        self.reset()
+
+    def uninstall(self):
+        for module, name, function in self._originals:
+            setattr(module, name, function)
+        self._originals = []
+
+    def _wrap(self, name, function):
+        calls = self._calls
+        seconds = self._seconds
+        clock = time.perf_counter
+
+        def counted(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+        counted.__name__ = name
+        return counted
+
+    def end_frame(self):
+        """Close a frame; calls made since the last end_frame count towards it."""
+        if not self._originals:
+            return
+        self._frames += 1
+        total = sum(self._calls.values())
+        self.last_frame_calls = total - self._total_at_frame
+        self._total_at_frame = total
+
+    def per_frame(self, limit=None):
+        """[(entry point, calls per frame, microseconds per frame)] averaged
+        over frames since install/reset, busiest first."""
+        frames = max(self._frames, 1)
+        rows = [(name, count / frames, self._seconds[name] * 1e6 / frames)
+                for name, count in self._calls.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        self._calls.clear()
+        self._seconds.clear()
+        self._frames = 0
+        self._total_at_frame = 0
+        self.last_frame_calls = 0
+
+
+def measure_wrapper_overhead(iterations=2000):
+    """Time PyOpenGL wrapped calls against their raw ctypes entry points.
+
+    Uses location -1 uniform updates, which GL ignores. Needs a current
+    context. Returns {entry point: (wrapped us per call, raw us per call)}.
+    """
+    import ctypes
+    import numpy as np
+    from OpenGL import GL
+    from OpenGL.raw.GL.VERSION import GL_2_0 as raw
+
+    matrix = np.eye(4, dtype=np.float32).reshape(16)
+    pointer = matrix.ctypes.data_as(ctypes.POINTER(ctypes.c_float))
+    cases = {
+        'glUniform1i': (lambda: GL.glUniform1i(-1, 0), lambda: raw.glUniform1i(-1, 0)),
+        'glUniform1f': (lambda: GL.glUniform1f(-1, 0.0), lambda: raw.glUniform1f(-1, 0.0)),
+        'glUniformMatrix4fv': (lambda: GL.glUniformMatrix4fv(-1, 1, GL.GL_FALSE, matrix),
+                               lambda: raw.glUniformMatrix4fv(-1, 1, GL.GL_FALSE, pointer)),
+    }
+    results = {}
+    for name, variants in cases.items():
+        timings = []
+        for call in variants:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                call()
+            timings.append((time.perf_counter() - start) * 1e6 / iterations)
+        results[name] = tuple(timings)
+    return results
@@ -0,0 +1,40 @@
+"""NumPy image helpers shared by texture loading and compression."""
+
+import numpy as np
+
+
+def halve_image(image):
+    """Box-filter an (h, w, channels) uint8 image to half size.
+
+    Sizes follow GL's floor(size / 2) mip rule (never below 1); odd trailing
+    rows/columns are dropped.
+    """
+    h, w = image.shape[:2]
+    src = image.astype(np.uint16)
+    if h > 1:
+        src = src[:h & ~1]
+        src = src[0::2] + src[1::2]
+    else:
+        src = src * 2
+    if w > 1:
+        src = src[:, :w & ~1]
+        src = src[:, 0::2] + src[:, 1::2]
+    else:
+        src = src * 2
+    return ((src + 2) // 4).astype(np.uint8)
+
+
+def build_mip_chain(image):
+    """Return [image, image/2, ..., 1x1] following GL mip sizes."""
+    levels = [image]
+    while image.shape[0] > 1 or image.shape[1] > 1:
+        image = halve_image(image)
+        levels.append(image)
+    return levels
+
+
+def shrink_to_fit(image, max_size):
+    """Halve image until neither dimension exceeds max_size."""
+    while max(image.shape[0], image.shape[1]) > max_size:
+        image = halve_image(image)
+    return image
@@ -0,0 +1,46 @@
+"""Screen-size level-of-detail selection with hysteresis."""
+
+import numpy as np
+
+# Projected sphere size (fraction of viewport height) below which each
+# coarser LOD is used: LOD 1 under 0.3, LOD 2 under 0.12
+LOD_THRESHOLDS = (0.3, 0.12)
+
+# A finer LOD is only picked again once the size is this much above its
+# threshold, so models near a boundary do not flip every frame
+LOD_HYSTERESIS = 0.15
+
+
+def projected_size(centers, radius, view_matrix, proj_matrix):
+    """Fraction of the viewport height covered by spheres at centers (n, 3).
+
+    view_matrix and proj_matrix are flat column-major 4x4 matrices; radius
+    may be a scalar or per sphere. Spheres the camera is inside count as
+    filling the view.
+    """
+    view = np.asarray(view_matrix, dtype=np.float32).reshape(4, 4)
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+    radius = np.asarray(radius, dtype=np.float32)
+    depth = -(centers @ view[:3, 2] + view[3, 2])
+    focal = float(np.asarray(proj_matrix, dtype=np.float32).reshape(16)[5])
+    return np.where(depth > radius, radius * focal / np.maximum(depth, 1e-6), np.inf)
+
+
+def select_lods(sizes, current, num_lods, thresholds=LOD_THRESHOLDS,
+                hysteresis=LOD_HYSTERESIS):
+    """Vectorized LOD choice for projected sizes given the current LODs.
+
+    Coarser LODs are taken as soon as a size drops below a threshold; finer
+    ones only when it rises above threshold * (1 + hysteresis). num_lods may
+    be a scalar or one count per size.
+    """
+    sizes = np.asarray(sizes)
+    num_lods = np.asarray(num_lods)
+    current = np.minimum(current, num_lods - 1)
+    target = np.zeros(sizes.shape, dtype=np.int64)
+    finer = np.zeros(sizes.shape, dtype=np.int64)
+    for level, threshold in enumerate(thresholds, start=1):
+        available = level < num_lods
+        target += (sizes < threshold) & available
+        finer += (sizes < threshold * (1.0 + hysteresis)) & available
+    return np.where(target > current, target, np.minimum(current, finer))
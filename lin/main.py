@@ -9,12 +9,30 @@ gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Gio, GLib, Gdk
 
+# PyOpenGL flags must be set before any module below imports OpenGL.GL
+import gl_calls
+gl_calls.configure_pyopengl(gl_calls.fast_path_requested())
+
+from crowd import Crowd
+from frame_timer import FRAME_STAGES
 from pk3_archive import PK3Archive
-from md3_player_model import MD3PlayerModel
-from model_view import ModelView
+from model_loader import ModelLoadJob
+from model_lru import CachedModel, ModelLRU
+from model_view import MAX_CAPTURE_SIZE, ModelView
 from texture_cache import TextureCache
+from texture_store import TextureStore
 from md3_types import AnimNumber, AnimState, ANIMATION_NAMES, MAX_QPATH
 
+# Estimated memory budget for recently viewed models kept resident
+MODEL_CACHE_BUDGET_BYTES = 256 * 1024 * 1024
+
+# Crowd view grid size
+CROWD_ROWS = 16
+CROWD_COLUMNS = 16
+
+# Largest texture a crowd member uploads; members are small on screen
+CROWD_MAX_TEXTURE_SIZE = 256
+
 
 class MD3ViewApp(Gtk.Application):
     def __init__(self):
@@ -23,11 +41,27 @@ class MD3ViewApp(Gtk.Application):
         self._archive = None
         self._player_models = []
         self._current_model = None
+        self._load_job = None
+        self._model_lru = ModelLRU(MODEL_CACHE_BUDGET_BYTES, on_evict=self._free_cached_model)
 
         # Widgets
         self._window = None
         self._model_list = None
+        self._load_progress = None
         self._model_view = None
+        self._fps_label = None
+        self._timing_label = None
+        self._crowd_action = None
+        self._timing_action = None
+        self._gl_calls_action = None
+        self._gl_overhead = {}  # measured once when GL call stats are first shown
+        self._crowd_sources = []  # (model, texture_cache) loaded for the crowd
+        # Options for texture caches made from now on (see _new_texture_cache)
+        self._progressive_textures = False
+        self._max_texture_size = 0  # 0 = unlimited
+        self._texture_arrays = False
+        self._compress_textures = False
+        self._texture_store = TextureStore()  # BC1/BC3 results kept across runs
         self._skin_dropdown = None
         self._torso_dropdown = None
         self._legs_dropdown = None
@@ -38,7 +72,10 @@ class MD3ViewApp(Gtk.Application):
         self._legs_frame_label = None
         self._gamma_slider = None
         self._gamma_label = None
-        self._ui_timer_id = None
+        self._ui_update_pending = False
+        # (widget, handler id) of controls that drive the model, blocked
+        # while _show_model syncs them from it
+        self._control_handlers = []
 
         # String lists for dropdowns
         self._skin_model = None
@@ -65,6 +102,66 @@ class MD3ViewApp(Gtk.Application):
         self.add_action(save_render)
         self.set_accels_for_action('app.save-render', ['<Control><Shift>s'])
 
+        save_sequence = Gio.SimpleAction.new('save-sequence', None)
+        save_sequence.connect('activate', self._on_save_sequence)
+        self.add_action(save_sequence)
+
+        self._crowd_action = Gio.SimpleAction.new_stateful('crowd-view', None,
+                                                           GLib.Variant.new_boolean(False))
+        self._crowd_action.connect('activate', self._on_toggle_crowd)
+        self.add_action(self._crowd_action)
+
+        self._timing_action = Gio.SimpleAction.new_stateful('frame-timings', None,
+                                                            GLib.Variant.new_boolean(False))
+        self._timing_action.connect('activate', self._on_toggle_timings)
+        self.add_action(self._timing_action)
+
+        self._gl_calls_action = Gio.SimpleAction.new_stateful('gl-call-stats', None,
+                                                              GLib.Variant.new_boolean(False))
+        self._gl_calls_action.connect('activate', self._on_toggle_gl_calls)
+        self.add_action(self._gl_calls_action)
+
+        fps_cap = Gio.SimpleAction.new_stateful('fps-cap', GLib.VariantType.new('s'),
+                                                GLib.Variant.new_string('0'))
+        fps_cap.connect('activate', self._on_fps_cap)
+        self.add_action(fps_cap)
+
+        adaptive = Gio.SimpleAction.new_stateful('adaptive-resolution', None,
+                                                 GLib.Variant.new_boolean(False))
+        adaptive.connect('activate', self._on_toggle_adaptive_resolution)
+        self.add_action(adaptive)
+
+        texture_buffers = Gio.SimpleAction.new_stateful('texture-buffer-frames', None,
+                                                        GLib.Variant.new_boolean(False))
+        texture_buffers.connect('activate', self._on_toggle_texture_buffer_frames)
+        self.add_action(texture_buffers)
+
+        single_pass = Gio.SimpleAction.new_stateful('single-pass', None,
+                                                    GLib.Variant.new_boolean(False))
+        single_pass.connect('activate', self._on_toggle_single_pass)
+        self.add_action(single_pass)
+
+        progressive = Gio.SimpleAction.new_stateful('progressive-textures', None,
+                                                    GLib.Variant.new_boolean(False))
+        progressive.connect('activate', self._on_toggle_progressive_textures)
+        self.add_action(progressive)
+
+        texture_arrays = Gio.SimpleAction.new_stateful('texture-arrays', None,
+                                                       GLib.Variant.new_boolean(False))
+        texture_arrays.connect('activate', self._on_toggle_texture_arrays)
+        self.add_action(texture_arrays)
+
+        compress = Gio.SimpleAction.new_stateful('compress-textures', None,
+                                                 GLib.Variant.new_boolean(False))
+        compress.connect('activate', self._on_toggle_compress_textures)
+        self.add_action(compress)
+
+        texture_size = Gio.SimpleAction.new_stateful('max-texture-size',
+                                                     GLib.VariantType.new('s'),
+                                                     GLib.Variant.new_string('0'))
+        texture_size.connect('activate', self._on_max_texture_size)
+        self.add_action(texture_size)
+
     def _create_window(self):
         self._window = Gtk.ApplicationWindow(application=self, title='MD3View')
         self._window.set_default_size(1024, 768)
@@ -77,6 +174,28 @@ class MD3ViewApp(Gtk.Application):
         menu_model.append('Open PK3...', 'app.open')
         menu_model.append('Save Screenshot...', 'app.save-screenshot')
         menu_model.append('Save Render...', 'app.save-render')
+        menu_model.append('Save Animation Frames...', 'app.save-sequence')
+        menu_model.append('Crowd View', 'app.crowd-view')
+        menu_model.append('Frame Timings', 'app.frame-timings')
+        menu_model.append('GL Call Stats', 'app.gl-call-stats')
+
+        performance_menu = Gio.Menu()
+        for label, fps in (('Uncapped', '0'), ('Cap at 60 fps', '60'),
+                           ('Cap at 30 fps', '30'), ('Cap at 15 fps', '15')):
+            performance_menu.append(label, f'app.fps-cap::{fps}')
+        performance_menu.append('Adaptive Resolution', 'app.adaptive-resolution')
+        performance_menu.append('Fetch Frames from Texture Buffers', 'app.texture-buffer-frames')
+        performance_menu.append('Single-Pass Player Draws', 'app.single-pass')
+        menu_model.append_section(None, performance_menu)
+
+        texture_menu = Gio.Menu()
+        texture_menu.append('Stream Textures Progressively', 'app.progressive-textures')
+        texture_menu.append('Pack Skins into Texture Arrays', 'app.texture-arrays')
+        texture_menu.append('Compress Textures (S3TC)', 'app.compress-textures')
+        for label, size in (('Full-Size Textures', '0'), ('Textures up to 512', '512'),
+                            ('Textures up to 256', '256')):
+            texture_menu.append(label, f'app.max-texture-size::{size}')
+        menu_model.append_section(None, texture_menu)
 
         menu_button = Gtk.MenuButton()
         menu_button.set_icon_name('open-menu-symbolic')
@@ -88,16 +207,29 @@ class MD3ViewApp(Gtk.Application):
         paned.set_position(200)
         self._window.set_child(paned)
 
-        # Sidebar: scrolled list of model names
+        # Sidebar: scrolled list of model names above a load progress bar
+        sidebar = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_size_request(150, -1)
+        scrolled.set_vexpand(True)
         scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
 
         self._model_list = Gtk.ListBox()
         self._model_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
         self._model_list.connect('row-selected', self._on_model_selected)
         scrolled.set_child(self._model_list)
-        paned.set_start_child(scrolled)
+        sidebar.append(scrolled)
+
+        self._load_progress = Gtk.ProgressBar()
+        self._load_progress.set_show_text(True)
+        self._load_progress.set_margin_start(6)
+        self._load_progress.set_margin_end(6)
+        self._load_progress.set_margin_top(4)
+        self._load_progress.set_margin_bottom(4)
+        self._load_progress.set_visible(False)
+        sidebar.append(self._load_progress)
+
+        paned.set_start_child(sidebar)
         paned.set_shrink_start_child(False)
 
         # Right panel: GL view + controls
@@ -105,9 +237,28 @@ class MD3ViewApp(Gtk.Application):
         paned.set_end_child(right_box)
         paned.set_shrink_end_child(False)
 
-        # GL view
-        self._model_view = ModelView()
-        right_box.append(self._model_view)
+        # GL view, with a frames-per-second readout overlaid in crowd view
+        # and an optional per-stage timing table
+        overlay = Gtk.Overlay()
+        self._model_view = ModelView(fast_gl=gl_calls.fast_path_requested())
+        overlay.set_child(self._model_view)
+        self._fps_label = Gtk.Label(label='')
+        self._fps_label.set_halign(Gtk.Align.START)
+        self._fps_label.set_valign(Gtk.Align.START)
+        self._fps_label.set_margin_start(8)
+        self._fps_label.set_margin_top(6)
+        self._fps_label.set_visible(False)
+        overlay.add_overlay(self._fps_label)
+        self._timing_label = Gtk.Label(label='')
+        self._timing_label.add_css_class('monospace')
+        self._timing_label.set_halign(Gtk.Align.END)
+        self._timing_label.set_valign(Gtk.Align.START)
+        self._timing_label.set_margin_end(8)
+        self._timing_label.set_margin_top(6)
+        self._timing_label.set_visible(False)
+        overlay.add_overlay(self._timing_label)
+        self._model_view.on_fps = self._on_fps
+        right_box.append(overlay)
 
         # Controls panel
         controls = self._create_controls()
@@ -118,9 +269,6 @@ class MD3ViewApp(Gtk.Application):
         key_ctrl.connect('key-pressed', self._on_key_pressed)
         self._window.add_controller(key_ctrl)
 
-        # UI update timer (30fps)
-        self._ui_timer_id = GLib.timeout_add(33, self._update_ui_controls)
-
         self._window.present()
 
     def _create_controls(self):
@@ -138,7 +286,8 @@ class MD3ViewApp(Gtk.Application):
         self._skin_dropdown = Gtk.DropDown(model=self._skin_model)
         self._skin_dropdown.set_hexpand(False)
         self._skin_dropdown.set_size_request(180, -1)
-        self._skin_dropdown.connect('notify::selected', self._on_skin_changed)
+        handler_id = self._skin_dropdown.connect('notify::selected', self._on_skin_changed)
+        self._control_handlers.append((self._skin_dropdown, handler_id))
         grid.attach(self._skin_dropdown, 1, 0, 2, 1)
 
         # Row 1: Torso
@@ -149,14 +298,16 @@ class MD3ViewApp(Gtk.Application):
         self._torso_dropdown = Gtk.DropDown(model=self._torso_model)
         self._torso_dropdown.set_selected(AnimNumber.TORSO_STAND)
         self._torso_dropdown.set_size_request(180, -1)
-        self._torso_dropdown.connect('notify::selected', self._on_torso_anim_changed)
+        handler_id = self._torso_dropdown.connect('notify::selected', self._on_torso_anim_changed)
+        self._control_handlers.append((self._torso_dropdown, handler_id))
         grid.attach(self._torso_dropdown, 1, 1, 1, 1)
 
         self._torso_slider = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
         self._torso_slider.set_range(0, 1)
         self._torso_slider.set_digits(0)
         self._torso_slider.set_hexpand(True)
-        self._torso_slider.connect('value-changed', self._on_torso_slider_changed)
+        handler_id = self._torso_slider.connect('value-changed', self._on_torso_slider_changed)
+        self._control_handlers.append((self._torso_slider, handler_id))
         grid.attach(self._torso_slider, 2, 1, 1, 1)
 
         self._torso_frame_label = Gtk.Label(label='Frame 0 / 0')
@@ -171,14 +322,16 @@ class MD3ViewApp(Gtk.Application):
         self._legs_dropdown = Gtk.DropDown(model=self._legs_model)
         self._legs_dropdown.set_selected(AnimNumber.LEGS_IDLE)
         self._legs_dropdown.set_size_request(180, -1)
-        self._legs_dropdown.connect('notify::selected', self._on_legs_anim_changed)
+        handler_id = self._legs_dropdown.connect('notify::selected', self._on_legs_anim_changed)
+        self._control_handlers.append((self._legs_dropdown, handler_id))
         grid.attach(self._legs_dropdown, 1, 2, 1, 1)
 
         self._legs_slider = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
         self._legs_slider.set_range(0, 1)
         self._legs_slider.set_digits(0)
         self._legs_slider.set_hexpand(True)
-        self._legs_slider.connect('value-changed', self._on_legs_slider_changed)
+        handler_id = self._legs_slider.connect('value-changed', self._on_legs_slider_changed)
+        self._control_handlers.append((self._legs_slider, handler_id))
         grid.attach(self._legs_slider, 2, 2, 1, 1)
 
         self._legs_frame_label = Gtk.Label(label='Frame 0 / 0')
@@ -333,8 +486,8 @@ class MD3ViewApp(Gtk.Application):
 
         def on_render_clicked(button):
             try:
-                render_w = max(64, min(8192, int(w_entry.get_text())))
-                render_h = max(64, min(8192, int(h_entry.get_text())))
+                render_w = max(64, min(MAX_CAPTURE_SIZE, int(w_entry.get_text())))
+                render_h = max(64, min(MAX_CAPTURE_SIZE, int(h_entry.get_text())))
             except ValueError:
                 return
             dialog.close()
@@ -357,15 +510,35 @@ class MD3ViewApp(Gtk.Application):
             except GLib.Error:
                 return
             if gfile:
-                img = self._model_view.capture_render(render_w, render_h)
-                if img:
-                    img.save(gfile.get_path(), 'PNG')
+                self._model_view.capture_render_to_file(render_w, render_h,
+                                                        gfile.get_path())
 
         dialog.save(self._window, None, on_response)
 
+    def _on_save_sequence(self, action, param):
+        if not self._current_model:
+            return
+        dialog = Gtk.FileDialog()
+        dialog.set_title('Save Animation Frames')
+        dialog.select_folder(self._window, None, self._on_save_sequence_response)
+
+    def _on_save_sequence_response(self, dialog, result):
+        try:
+            gfile = dialog.select_folder_finish(result)
+        except GLib.Error:
+            return
+        if gfile:
+            # Frames at the view's pixel size, framed like Save Render
+            scale = self._model_view.get_scale_factor()
+            self._model_view.capture_sequence(self._model_view.get_width() * scale,
+                                              max(self._model_view.get_height(), 1) * scale,
+                                              gfile.get_path())
+
     # ---- Model loading ----
 
     def _load_archive(self, path):
+        self._stop_crowd()
+        self._cancel_load()
         try:
             self._archive = PK3Archive(path)
         except Exception as e:
@@ -406,43 +579,303 @@ class MD3ViewApp(Gtk.Application):
             return
         self._load_player_model(self._player_models[idx])
 
-    def _load_player_model(self, model_path):
+    def _free_cached_model(self, entry):
         self._model_view.make_current()
+        entry.texture_cache.flush()
+        if self._model_view.renderer is not None:
+            entry.model.release_buffers(self._model_view.renderer)
 
-        # Flush old textures
-        if self._model_view.texture_cache:
-            self._model_view.texture_cache.flush()
-
-        tex_cache = TextureCache(self._archive)
-        self._model_view.texture_cache = tex_cache
+    def _cancel_load(self):
+        if self._load_job is not None:
+            self._load_job.cancel()
+            self._load_job = None
+        self._load_progress.set_visible(False)
 
-        try:
-            model = MD3PlayerModel(self._archive, model_path)
-        except Exception as e:
-            print(f"Failed to load player model {model_path}: {e}", file=sys.stderr)
+    def _load_player_model(self, model_path):
+        self._stop_crowd()
+        self._cancel_load()
+
+        # Recently viewed models stay resident with their textures
+        key = (self._archive.archive_path, model_path)
+        entry = self._model_lru.get(key)
+        if entry is not None:
+            self._show_model(entry)
             return
 
+        # Parse and decode on a worker; GL upload happens back on the main loop
+        texture_cache = self._new_texture_cache()
+        self._model_view.make_current()
+        texture_cache.detect_capabilities()
+
+        def on_done(model):
+            self._load_job = None
+            self._load_progress.set_visible(False)
+            if model is None:
+                return
+            self._model_view.make_current()
+            texture_cache.upload_decoded()
+            entry = CachedModel(model=model, texture_cache=texture_cache)
+            self._model_lru.put(key, entry)
+            self._show_model(entry)
+
+        self._load_progress.set_fraction(0.0)
+        self._load_progress.set_text('Loading...')
+        self._load_progress.set_visible(True)
+        self._load_job = ModelLoadJob(self._archive, model_path, texture_cache,
+                                      on_done, progress=self._on_load_progress)
+        self._load_job.start()
+
+    # ---- Crowd view ----
+
+    def _on_toggle_crowd(self, action, param):
+        if action.get_state().get_boolean():
+            self._stop_crowd()
+        else:
+            self._start_crowd()
+
+    def _start_crowd(self):
+        """Load every model in the archive on the worker, then show them as a grid."""
+        if not self._player_models:
+            return
+        self._cancel_load()
+        self._crowd_action.set_state(GLib.Variant.new_boolean(True))
+        paths = list(self._player_models)
+        sources = self._crowd_sources = []
+
+        def load_next():
+            path = paths[len(sources)]
+            texture_cache = self._new_texture_cache(crowd=True)
+            self._model_view.make_current()
+            texture_cache.detect_capabilities()
+
+            def on_done(model):
+                if model is not None:
+                    self._model_view.make_current()
+                    texture_cache.upload_decoded()
+                    sources.append((model, texture_cache))
+                else:
+                    paths.remove(path)
+                if len(sources) < len(paths):
+                    load_next()
+                    return
+                self._load_job = None
+                self._load_progress.set_visible(False)
+                if sources:
+                    self._model_view.crowd = Crowd.grid(sources, CROWD_ROWS, CROWD_COLUMNS)
+                    self._fps_label.set_visible(True)
+                    self._model_view.request_render()
+
+            def on_progress(fraction, text):
+                self._on_load_progress((len(sources) + fraction) / max(len(paths), 1),
+                                       f'{len(sources) + 1} / {len(paths)}: {text}')
+
+            self._load_job = ModelLoadJob(self._archive, path, texture_cache,
+                                          on_done, progress=on_progress)
+            self._load_job.start()
+
+        self._load_progress.set_fraction(0.0)
+        self._load_progress.set_visible(True)
+        load_next()
+
+    def _stop_crowd(self):
+        if not self._crowd_action.get_state().get_boolean():
+            return
+        self._crowd_action.set_state(GLib.Variant.new_boolean(False))
+        self._cancel_load()
+        crowd = self._model_view.crowd
+        self._model_view.crowd = None
+        self._fps_label.set_visible(False)
+        self._model_view.make_current()
+        if crowd is not None and self._model_view.renderer is not None:
+            crowd.release(self._model_view.renderer)
+        else:
+            # Cancelled part-way: free whatever was already uploaded
+            for model, texture_cache in self._crowd_sources:
+                texture_cache.flush()
+        self._crowd_sources = []
+        if self._model_view.player_model is None:
+            # Texture options changed while the crowd ran
+            self._reload_selected_model()
+        else:
+            self._model_view.request_render()
+
+    def _on_fps(self, fps):
+        stats = self._model_view.renderer.cull_stats
+        self._fps_label.set_label(f'{fps:.0f} fps  '
+                                  f'{stats.parts_drawn} parts drawn, {stats.parts_culled} culled')
+        if self._timing_label.get_visible():
+            self._timing_label.set_label(self._format_overlay())
+
+    # ---- Frame rate ----
+
+    def _on_fps_cap(self, action, param):
+        action.set_state(param)
+        self._model_view.max_fps = int(param.get_string())
+
+    def _on_toggle_adaptive_resolution(self, action, param):
+        enabled = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(enabled))
+        self._model_view.adaptive_resolution = enabled
+        self._model_view.request_render()
+
+    # ---- Frame timings and GL call stats ----
+
+    def _on_toggle_timings(self, action, param):
+        enabled = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(enabled))
+        self._model_view.set_frame_timing(enabled)
+        self._update_timing_label()
+
+    def _on_toggle_gl_calls(self, action, param):
+        enabled = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(enabled))
+        if enabled and not self._gl_overhead and self._model_view.renderer is not None:
+            self._gl_overhead = self._model_view.measure_gl_overhead()
+        self._model_view.set_gl_call_accounting(enabled)
+        self._update_timing_label()
+
+    def _update_timing_label(self):
+        visible = (self._timing_action.get_state().get_boolean() or
+                   self._gl_calls_action.get_state().get_boolean())
+        self._timing_label.set_label('Collecting...')
+        self._timing_label.set_visible(visible)
+
+    def _format_overlay(self):
+        sections = []
+        if self._timing_action.get_state().get_boolean():
+            sections.append(self._format_timings())
+        if self._gl_calls_action.get_state().get_boolean():
+            sections.append(self._format_gl_calls())
+        return '\n\n'.join(sections)
+
+    def _format_timings(self):
+        """Table of p50 / p95 ms per stage, CPU and GPU."""
+        timings = self._model_view.frame_timings((50, 95))
+        lines = [f'{"ms p50/p95":<10} {"cpu":>13} {"gpu":>13}']
+        for stage in FRAME_STAGES:
+            cells = []
+            for source in ('cpu', 'gpu'):
+                values = timings[source][stage]
+                cells.append(f'{values[0]:6.2f}/{values[1]:6.2f}' if values else f'{"-":>13}')
+            lines.append(f'{stage:<10} {cells[0]} {cells[1]}')
+        return '\n'.join(lines)
+
+    def _format_gl_calls(self):
+        """Busiest GL entry points per frame, then wrapper vs raw call cost."""
+        stats = self._model_view.gl_call_stats
+        lines = [f'GL calls last frame: {stats.last_frame_calls}',
+                 f'{"per frame":<24} {"calls":>7} {"us":>8}']
+        for name, calls, micros in stats.per_frame(limit=8):
+            lines.append(f'{name:<24} {calls:7.1f} {micros:8.1f}')
+        if self._gl_overhead:
+            lines.append(f'{"us per call":<24} {"wrapped":>7} {"raw":>8}')
+            for name, (wrapped, raw) in self._gl_overhead.items():
+                lines.append(f'{name:<24} {wrapped:7.2f} {raw:8.2f}')
+        return '\n'.join(lines)
+
+    def _on_load_progress(self, fraction, text):
+        self._load_progress.set_fraction(fraction)
+        self._load_progress.set_text(text)
+
+    def _show_model(self, entry):
+        model = entry.model
+        self._model_view.texture_cache = entry.texture_cache
         self._current_model = model
+        model.on_frames_changed = self._on_model_frames_changed
         self._model_view.player_model = model
 
-        # Update skin dropdown
-        self._skin_model.splice(0, self._skin_model.get_n_items(), [])
-        for skin in model.available_skins:
-            self._skin_model.append(skin)
-        if model.current_skin and model.current_skin in model.available_skins:
-            self._skin_dropdown.set_selected(model.available_skins.index(model.current_skin))
-
-        # Reset animation controls
-        self._torso_dropdown.set_selected(AnimNumber.TORSO_STAND)
-        self._legs_dropdown.set_selected(AnimNumber.LEGS_IDLE)
-        self._play_pause_button.set_label('Pause')
-
-        torso_frames = self._current_model.torso_num_frames()
-        legs_frames = self._current_model.legs_num_frames()
-        self._torso_slider.set_range(0, max(torso_frames - 1, 0))
-        self._legs_slider.set_range(0, max(legs_frames - 1, 0))
-
-        self._model_view.queue_render()
+        # Sync the controls to the model with their handlers blocked, so a
+        # cached model keeps its skin, animations and scrub position
+        for widget, handler_id in self._control_handlers:
+            widget.handler_block(handler_id)
+        try:
+            self._skin_model.splice(0, self._skin_model.get_n_items(), [])
+            for skin in model.available_skins:
+                self._skin_model.append(skin)
+            if model.current_skin and model.current_skin in model.available_skins:
+                self._skin_dropdown.set_selected(model.available_skins.index(model.current_skin))
+
+            self._torso_dropdown.set_selected(model.torso_anim)
+            self._legs_dropdown.set_selected(model.legs_anim)
+            self._torso_slider.set_range(0, max(model.torso_num_frames() - 1, 0))
+            self._legs_slider.set_range(0, max(model.legs_num_frames() - 1, 0))
+            self._torso_slider.set_value(model.torso_current_frame())
+            self._legs_slider.set_value(model.legs_current_frame())
+        finally:
+            for widget, handler_id in self._control_handlers:
+                widget.handler_unblock(handler_id)
+        self._play_pause_button.set_label('Pause' if model.playing else 'Play')
+        self._update_ui_controls()
+
+        self._model_view.request_render()
+
+    def _new_texture_cache(self, crowd=False):
+        """TextureCache with the current texture options. Crowd members
+        always stream, are capped at CROWD_MAX_TEXTURE_SIZE and pack each
+        skin into texture arrays, saving binds across instanced batches."""
+        if crowd:
+            max_size = CROWD_MAX_TEXTURE_SIZE
+            if self._max_texture_size:
+                max_size = min(max_size, self._max_texture_size)
+            return TextureCache(self._archive, use_texture_arrays=True,
+                                compress_textures=self._compress_textures,
+                                store=self._texture_store, progressive=True,
+                                max_texture_size=max_size)
+        return TextureCache(self._archive, use_texture_arrays=self._texture_arrays,
+                            compress_textures=self._compress_textures,
+                            store=self._texture_store,
+                            progressive=self._progressive_textures,
+                            max_texture_size=self._max_texture_size)
+
+    def _texture_options_changed(self):
+        """Drop resident models so none is shown again with the old texture
+        options, and reload the one on screen. A running crowd keeps its
+        textures until restarted; the model reloads when it stops."""
+        self._model_view.player_model = None
+        self._model_view.texture_cache = None
+        self._model_lru.clear()
+        if not self._crowd_action.get_state().get_boolean():
+            self._reload_selected_model()
+
+    def _reload_selected_model(self):
+        row = self._model_list.get_selected_row()
+        if row is not None:
+            self._on_model_selected(self._model_list, row)
+        self._model_view.request_render()
+
+    # ---- Renderer modes ----
+
+    def _on_toggle_texture_buffer_frames(self, action, param):
+        enabled = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(enabled))
+        self._model_view.set_texture_buffer_frames(enabled)
+
+    def _on_toggle_single_pass(self, action, param):
+        enabled = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(enabled))
+        self._model_view.set_single_pass(enabled)
+
+    # ---- Texture options ----
+
+    def _on_toggle_progressive_textures(self, action, param):
+        self._progressive_textures = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(self._progressive_textures))
+        self._texture_options_changed()
+
+    def _on_toggle_texture_arrays(self, action, param):
+        self._texture_arrays = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(self._texture_arrays))
+        self._texture_options_changed()
+
+    def _on_toggle_compress_textures(self, action, param):
+        self._compress_textures = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(self._compress_textures))
+        self._texture_options_changed()
+
+    def _on_max_texture_size(self, action, param):
+        action.set_state(param)
+        self._max_texture_size = int(param.get_string())
+        self._texture_options_changed()
 
     # ---- Control callbacks ----
 
@@ -454,10 +887,10 @@ class MD3ViewApp(Gtk.Application):
             return
         skins = self._current_model.available_skins
         if idx < len(skins):
+            # Skins are preparsed and their textures stay cached, so
+            # switching back and forth never reloads anything
             self._current_model.select_skin(skins[idx])
-            self._model_view.make_current()
-            self._model_view.texture_cache.flush()
-            self._model_view.queue_render()
+            self._model_view.request_render()
 
     def _on_torso_anim_changed(self, dropdown, param):
         if not self._current_model:
@@ -469,6 +902,7 @@ class MD3ViewApp(Gtk.Application):
         num_frames = self._current_model.torso_num_frames()
         self._torso_slider.set_range(0, max(num_frames - 1, 0))
         self._torso_slider.set_value(0)
+        self._model_view.request_render()
 
     def _on_legs_anim_changed(self, dropdown, param):
         if not self._current_model:
@@ -480,59 +914,69 @@ class MD3ViewApp(Gtk.Application):
         num_frames = self._current_model.legs_num_frames()
         self._legs_slider.set_range(0, max(num_frames - 1, 0))
         self._legs_slider.set_value(0)
+        self._model_view.request_render()
 
     def _on_toggle_play_pause(self, button):
         if not self._current_model:
             return
         self._current_model.playing = not self._current_model.playing
         button.set_label('Pause' if self._current_model.playing else 'Play')
+        # Restarts or stops the view's animation tick
+        self._model_view.request_render()
 
     def _on_step_back(self, button):
         if not self._current_model or self._current_model.playing:
             return
         self._current_model.step_frame(-1)
-        self._model_view.queue_render()
+        self._model_view.request_render()
 
     def _on_step_forward(self, button):
         if not self._current_model or self._current_model.playing:
             return
         self._current_model.step_frame(1)
-        self._model_view.queue_render()
+        self._model_view.request_render()
 
     def _on_torso_slider_changed(self, slider):
         if not self._current_model or self._current_model.playing:
             return
         self._current_model.scrub_torso_to_frame(int(slider.get_value()))
-        self._model_view.queue_render()
+        self._model_view.request_render()
 
     def _on_legs_slider_changed(self, slider):
         if not self._current_model or self._current_model.playing:
             return
         self._current_model.scrub_legs_to_frame(int(slider.get_value()))
-        self._model_view.queue_render()
+        self._model_view.request_render()
 
     def _on_gamma_changed(self, slider):
         gamma = slider.get_value()
         self._model_view.gamma = gamma
         self._gamma_label.set_label(f'{gamma:.2f}')
-        self._model_view.queue_render()
+        self._model_view.request_render()
 
     def _on_key_pressed(self, controller, keyval, keycode, state):
         if keyval == Gdk.KEY_Left:
             if self._current_model and not self._current_model.playing:
                 self._current_model.step_frame(-1)
-                self._model_view.queue_render()
+                self._model_view.request_render()
             return True
         elif keyval == Gdk.KEY_Right:
             if self._current_model and not self._current_model.playing:
                 self._current_model.step_frame(1)
-                self._model_view.queue_render()
+                self._model_view.request_render()
             return True
         return False
 
+    def _on_model_frames_changed(self, model):
+        # Fired from playback inside rendering; update widgets once it is done
+        if model is self._current_model and not self._ui_update_pending:
+            self._ui_update_pending = True
+            GLib.idle_add(self._update_ui_controls)
+
     def _update_ui_controls(self):
+        self._ui_update_pending = False
         if not self._current_model:
-            return True
+            return False
 
         torso_frame = self._current_model.torso_current_frame()
         torso_total = self._current_model.torso_num_frames()
@@ -550,7 +994,7 @@ class MD3ViewApp(Gtk.Application):
                 self._legs_slider.set_range(0, legs_total - 1)
             self._legs_slider.set_value(legs_frame)
 
-        return True  # keep timer running
+        return False
 
 
 def main():
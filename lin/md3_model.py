@@ -1,9 +1,10 @@
-"""Binary MD3 model parser with vertex decompression."""
+"""Binary MD3 model parser; vertices stay packed as on disk for the GPU."""
 
-import math
 import re
 import struct
 
+import numpy as np
+
 from md3_types import (
     MD3_IDENT, MD3_VERSION, MD3_XYZ_SCALE, MAX_QPATH,
     MD3_DISK_HEADER_FMT, MD3_DISK_HEADER_SIZE,
@@ -13,8 +14,7 @@ from md3_types import (
     MD3_DISK_SHADER_FMT, MD3_DISK_SHADER_SIZE,
     MD3_DISK_TRIANGLE_FMT, MD3_DISK_TRIANGLE_SIZE,
     MD3_DISK_TEXCOORD_FMT, MD3_DISK_TEXCOORD_SIZE,
-    MD3_DISK_VERTEX_FMT, MD3_DISK_VERTEX_SIZE,
-    MD3Vertex, MD3Surface, MD3Tag, MD3Frame,
+    MD3Surface, MD3Tag, MD3Frame,
 )
 
 
@@ -26,16 +26,6 @@ def _decode_name(raw_bytes):
     return raw_bytes.decode('ascii', errors='replace')
 
 
-def _decompress_normal(encoded):
-    """Decompress a Q3 packed normal (lat/lng in int16) to (nx, ny, nz)."""
-    lat = ((encoded >> 8) & 0xFF) * (2.0 * math.pi / 255.0)
-    lng = (encoded & 0xFF) * (2.0 * math.pi / 255.0)
-    nx = math.cos(lat) * math.sin(lng)
-    ny = math.sin(lat) * math.sin(lng)
-    nz = math.cos(lng)
-    return (nx, ny, nz)
-
-
 class MD3Model:
     def __init__(self, data, name=""):
         self.name = name
@@ -155,19 +145,14 @@ class MD3Model:
                 tex_coords.extend(tc)
             surf.texCoords = tex_coords
 
-            # Read and decompress vertices (all frames)
+            # Vertices of all frames, viewed in place: raw int16 xyz + packed
+            # normal for upload, scaled positions for bounds work
             vert_off = surf_offset + s_ofs_xyz_normals
             total_verts = s_num_verts * s_num_frames
-            vertices = []
-            for j in range(total_verts):
-                v = struct.unpack_from(MD3_DISK_VERTEX_FMT, data, vert_off + j * MD3_DISK_VERTEX_SIZE)
-                nx, ny, nz = _decompress_normal(v[3])
-                vert = MD3Vertex(
-                    position=[v[0] * MD3_XYZ_SCALE, v[1] * MD3_XYZ_SCALE, v[2] * MD3_XYZ_SCALE],
-                    normal=[nx, ny, nz],
-                )
-                vertices.append(vert)
-            surf.vertices = vertices
+            raw = np.frombuffer(data, dtype='<i2', count=total_verts * 4, offset=vert_off)
+            raw = raw.reshape(s_num_frames, s_num_verts, 4)
+            surf.xyzNormals = raw
+            surf.positions = raw[..., :3].astype(np.float32) * np.float32(MD3_XYZ_SCALE)
 
             self.surfaces.append(surf)
             surf_offset += s_ofs_end
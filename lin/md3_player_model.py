@@ -1,46 +1,29 @@
 """Three-part Quake 3 player model (lower/upper/head) with tag stitching."""
 
-import math
 import sys
 import time
 
-from md3_types import AnimNumber, AnimState, TagTransform, MD3Tag, Animation
+import numpy as np
+
+from md3_types import MD3_DISK_VERTEX_SIZE, AnimNumber, AnimState, Animation, PlayerPose
+from frustum import frustum_planes, spheres_visible
+from lod_selector import projected_size, select_lods
 from md3_model import MD3Model
+from pk3_archive import PLAYER_PARTS
+from model_bounds import PlayerBounds
 from animation_config import AnimationConfig
-from skin_parser import parse_skin_data
+from skin_parser import parse_skin_data, surface_texture_path
+from tag_chain import TagChain
 
 
 def _current_time_ms():
     return time.monotonic() * 1000.0
 
 
-def _vector_normalize(v):
-    length = math.sqrt(v[0]*v[0] + v[1]*v[1] + v[2]*v[2])
-    if length > 0.0001:
-        v[0] /= length
-        v[1] /= length
-        v[2] /= length
-
-
-def _matrix_multiply_3x3(in1, in2):
-    """Multiply two 3x3 matrices (list-of-lists)."""
-    out = [[0.0]*3 for _ in range(3)]
-    for i in range(3):
-        for j in range(3):
-            out[i][j] = in1[i][0]*in2[0][j] + in1[i][1]*in2[1][j] + in1[i][2]*in2[2][j]
-    return out
-
-
-def _transform_point(inp, origin, axis):
-    """out = origin + in[0]*axis[0] + in[1]*axis[1] + in[2]*axis[2]"""
-    out = [0.0, 0.0, 0.0]
-    for i in range(3):
-        out[i] = origin[i] + inp[0]*axis[0][i] + inp[1]*axis[1][i] + inp[2]*axis[2][i]
-    return out
-
-
 class MD3PlayerModel:
-    def __init__(self, archive, model_path):
+    def __init__(self, archive, model_path, clock=None):
+        # clock() returns milliseconds; inject one for deterministic playback
+        self._clock = clock or _current_time_ms
         self.model_name = model_path.rsplit('/', 1)[-1] if '/' in model_path else model_path
         self._model_path = model_path
         self._archive = archive
@@ -61,11 +44,28 @@ class MD3PlayerModel:
         self._lower = MD3Model(lower_data, 'lower.md3')
         self._upper = MD3Model(upper_data, 'upper.md3')
         self._head = MD3Model(head_data, 'head.md3')
-
-        # Load default skin
+        self._tag_chain = TagChain(self._lower, self._upper)
+
+        # Lower-detail meshes (lower_1.md3, ...); tags and bounds use LOD 0
+        self._lods = [(self._lower, self._upper, self._head)]
+        for lod in range(1, archive.player_model_lod_count(model_path)):
+            parts = []
+            for part, finer in zip(PLAYER_PARTS, self._lods[-1]):
+                data = archive.read_file(f'{model_path}/{part}_{lod}.md3')
+                parts.append(MD3Model(data, f'{part}_{lod}.md3') if data is not None else finer)
+            self._lods.append(tuple(parts))
+        self._lod = 0
+
+        # Parse every skin once; switching is then a table swap
         self._lower_skin = {}
         self._upper_skin = {}
         self._head_skin = {}
+        self._skins = {}          # skin name -> (lower, upper, head) surface -> path dicts
+        self._skin_paths = {}     # skin name -> per-part lists of per-surface texture paths
+        self._resolved_skins = {}  # skin name -> per-part lists of texture entries
+        self._resolved_key = None
+        for skin_name in self._available_skins:
+            self._load_skin(skin_name)
         self._load_skin('default')
 
         # Load animation config
@@ -75,6 +75,8 @@ class MD3PlayerModel:
             self.anim_config = AnimationConfig(anim_data)
 
         # Compute center height
+        self._bounds = PlayerBounds(self._lower, self._upper, self._head, self._tag_chain)
+        self._bounds_cache = {}
         self.center_height = 0.0
         self.bounding_radius = 50.0
         self._compute_center_height()
@@ -85,6 +87,9 @@ class MD3PlayerModel:
         self._legs_state = AnimState()
         self._init_anim_state(self._torso_state, AnimNumber.TORSO_STAND)
         self._init_anim_state(self._legs_state, AnimNumber.LEGS_IDLE)
+        # callback(model) when the current torso/legs frame or animation
+        # changes, whether from playback, stepping or scrubbing
+        self.on_frames_changed = None
 
     @property
     def playing(self):
@@ -92,8 +97,34 @@ class MD3PlayerModel:
 
     @playing.setter
     def playing(self, value):
+        if value and not self._playing:
+            # Resume from the frame we paused (or stepped/scrubbed) on
+            self._rebase_anim_state(self._torso_state)
+            self._rebase_anim_state(self._legs_state)
         self._playing = value
 
+    @property
+    def animating(self):
+        """True while playback moves either part, so views must keep redrawing.
+        A non-looping animation stops counting once it has been drawn clamped
+        on its last frame."""
+        if not self._playing or self.anim_config is None:
+            return False
+        return self._state_moving(self._torso_state) or self._state_moving(self._legs_state)
+
+    def _state_moving(self, state):
+        timeline = self.anim_config.timelines[state.animIndex]
+        if not timeline.animated:
+            return False
+        if timeline.loop_frames > 0:
+            return True
+        # local_at clamps to (last frame, 0.0) once the duration has passed
+        return state.currentFrame < timeline.num_frames - 1 or state.fraction != 0.0
+
+    def _frames_changed(self):
+        if self.on_frames_changed is not None:
+            self.on_frames_changed(self)
+
     @property
     def available_skins(self):
         return self._available_skins
@@ -123,9 +154,15 @@ class MD3PlayerModel:
         state.currentFrame = 0
         state.nextFrame = 0
         state.fraction = 0.0
-        state.frameTime = _current_time_ms()
+        state.frameTime = self._clock()  # animation start time
         state.playing = True
 
+    def _rebase_anim_state(self, state):
+        if self.anim_config is None:
+            return
+        timeline = self.anim_config.timelines[state.animIndex]
+        state.frameTime = self._clock() - (state.currentFrame + state.fraction) * timeline.frame_lerp
+
     def _enumerate_skins(self):
         skin_names = set()
         prefix = (self._model_path + '/lower_').lower()
@@ -147,29 +184,109 @@ class MD3PlayerModel:
         self._available_skins = sorted_names
 
     def _load_skin(self, skin_name):
-        lower_path = f"{self._model_path}/lower_{skin_name}.skin"
-        upper_path = f"{self._model_path}/upper_{skin_name}.skin"
-        head_path = f"{self._model_path}/head_{skin_name}.skin"
-
-        self._lower_skin = parse_skin_data(self._archive.read_file(lower_path))
-        self._upper_skin = parse_skin_data(self._archive.read_file(upper_path))
-        self._head_skin = parse_skin_data(self._archive.read_file(head_path))
+        skins = self._skins.get(skin_name)
+        if skins is None:
+            lower_path = f"{self._model_path}/lower_{skin_name}.skin"
+            upper_path = f"{self._model_path}/upper_{skin_name}.skin"
+            head_path = f"{self._model_path}/head_{skin_name}.skin"
+
+            skins = (parse_skin_data(self._archive.read_file(lower_path)),
+                     parse_skin_data(self._archive.read_file(upper_path)),
+                     parse_skin_data(self._archive.read_file(head_path)))
+            self._skins[skin_name] = skins
+            self._skin_paths[skin_name] = [
+                tuple([surface_texture_path(skin, surf) for surf in model.surfaces]
+                      for model, skin in zip(parts, skins))
+                for parts in self._lods
+            ]
+
+        self._lower_skin, self._upper_skin, self._head_skin = skins
         self._current_skin = skin_name
 
+    def _parts(self, lod=0):
+        return self._lods[lod]
+
+    @property
+    def lod_count(self):
+        return len(self._lods)
+
+    @property
+    def lod(self):
+        """LOD level picked by the last render()."""
+        return self._lod
+
+    def memory_bytes(self):
+        """Estimated geometry footprint: raw 8-byte MD3 vertex per vertex-frame,
+        texcoords per vertex and int32 indices per triangle."""
+        total = 0
+        models = {id(model): model for parts in self._lods for model in parts}
+        for model in models.values():
+            for surf in model.surfaces:
+                total += surf.numVerts * surf.numFrames * MD3_DISK_VERTEX_SIZE
+                total += surf.numVerts * 8 + surf.numTriangles * 12
+        return total
+
+    def render_buffers(self, renderer, lod=0):
+        """The renderer's single-pass buffers for this player (see render_player)."""
+        return renderer.player_buffers(self, self._parts(lod), lod)
+
+    def release_buffers(self, renderer):
+        """Free the renderer's GPU buffers for every part and LOD."""
+        for parts in self._lods:
+            for model in parts:
+                renderer.release_model(model)
+        renderer.release_model(self)
+
     def select_skin(self, skin_name):
         self._load_skin(skin_name)
 
+    def skin_texture_paths(self, skin_name=None):
+        """All texture paths referenced by a skin (default: current) across the
+        three parts of every LOD."""
+        skin_name = skin_name or self._current_skin
+        paths = [p for parts in self._skin_paths[skin_name] for part in parts for p in part if p]
+        return list(dict.fromkeys(paths))
+
+    def surface_textures(self, tex_cache, skin_name=None, lod=0):
+        """Per-part lists of resolved texture entries for a skin (default: current).
+
+        Resolved once per skin and texture-cache generation, so drawing
+        indexes straight into texture names instead of looking up paths.
+        """
+        skin_name = skin_name or self._current_skin
+        key = (tex_cache.generation, tex_cache.use_texture_arrays)
+        if key != self._resolved_key:
+            self._resolved_skins = {}
+            self._resolved_key = key
+
+        resolved = self._resolved_skins.get((skin_name, lod))
+        if resolved is None:
+            part_paths = self._skin_paths[skin_name][lod]
+            packed = {}
+            if tex_cache.use_texture_arrays:
+                packed = tex_cache.texture_arrays_for_paths(self.skin_texture_paths(skin_name))
+            resolved = tuple(
+                [packed.get(p.lower()) if p and p.lower() in packed
+                 else tex_cache.texture_for_path(p) for p in paths]
+                for paths in part_paths
+            )
+            self._resolved_skins[(skin_name, lod)] = resolved
+        return resolved
+
     def set_torso_animation(self, anim):
         self._init_anim_state(self._torso_state, anim)
+        self._frames_changed()
 
     def set_legs_animation(self, anim):
         self._init_anim_state(self._legs_state, anim)
+        self._frames_changed()
 
     def step_frame(self, direction):
         if self._playing:
             return
         self._step_anim_state(self._torso_state, direction)
         self._step_anim_state(self._legs_state, direction)
+        self._frames_changed()
 
     def _step_anim_state(self, state, direction):
         if self.anim_config is None:
@@ -210,6 +327,7 @@ class MD3PlayerModel:
         self._torso_state.currentFrame = frame % anim.numFrames
         self._torso_state.nextFrame = self._torso_state.currentFrame
         self._torso_state.fraction = 0.0
+        self._frames_changed()
 
     def scrub_legs_to_frame(self, frame):
         if self.anim_config is None:
@@ -220,98 +338,28 @@ class MD3PlayerModel:
         self._legs_state.currentFrame = frame % anim.numFrames
         self._legs_state.nextFrame = self._legs_state.currentFrame
         self._legs_state.fraction = 0.0
+        self._frames_changed()
 
     def _update_anim_state(self, state):
         if not self._playing or self.anim_config is None:
             return
-        anim = self.anim_config.animations[state.animIndex]
-        if anim.numFrames <= 1:
-            return
-
-        now = _current_time_ms()
-        elapsed = now - state.frameTime
-
-        if anim.frameLerp <= 0:
+        timeline = self.anim_config.timelines[state.animIndex]
+        if not timeline.animated:
             return
 
-        state.fraction = elapsed / anim.frameLerp
-        while state.fraction >= 1.0:
-            state.fraction -= 1.0
-            state.frameTime += anim.frameLerp
-            state.currentFrame += 1
-
-            if anim.loopFrames > 0:
-                if state.currentFrame >= anim.numFrames:
-                    state.currentFrame = anim.numFrames - anim.loopFrames
-            else:
-                if state.currentFrame >= anim.numFrames - 1:
-                    state.currentFrame = anim.numFrames - 1
-                    state.fraction = 0.0
-
-        state.nextFrame = state.currentFrame + 1
-        if anim.loopFrames > 0:
-            if state.nextFrame >= anim.numFrames:
-                state.nextFrame = anim.numFrames - anim.loopFrames
-        else:
-            if state.nextFrame >= anim.numFrames:
-                state.nextFrame = anim.numFrames - 1
+        local, frac = timeline.local_at(self._clock() - state.frameTime)
+        changed = local != state.currentFrame
+        state.currentFrame = local
+        state.nextFrame = int(timeline.next_local[local])
+        state.fraction = frac
+        if changed:
+            self._frames_changed()
 
     def _get_frame_a_b(self, state):
         if self.anim_config is None:
             return 0, 0, 0.0
-        anim = self.anim_config.animations[state.animIndex]
-
-        fa = anim.firstFrame + state.currentFrame
-        fb = anim.firstFrame + state.nextFrame
-
-        if anim.reversed:
-            fa = anim.firstFrame + anim.numFrames - 1 - state.currentFrame
-            fb = anim.firstFrame + anim.numFrames - 1 - state.nextFrame
-
-        return fa, fb, state.fraction
-
-    def _lerp_tag(self, model, tag_name, frame_a, frame_b, frac):
-        tag_a = model.tag_for_name(tag_name, frame_a)
-        tag_b = model.tag_for_name(tag_name, frame_b)
-
-        if tag_a is None or tag_b is None:
-            return MD3Tag(
-                name=tag_name,
-                origin=[0, 0, 0],
-                axis=[[1, 0, 0], [0, 1, 0], [0, 0, 1]],
-            )
-
-        back_lerp = 1.0 - frac
-        out = MD3Tag(name=tag_name)
-        out.origin = [0.0, 0.0, 0.0]
-        out.axis = [[0.0]*3 for _ in range(3)]
-
-        for i in range(3):
-            out.origin[i] = tag_a.origin[i] * back_lerp + tag_b.origin[i] * frac
-            out.axis[0][i] = tag_a.axis[0][i] * back_lerp + tag_b.axis[0][i] * frac
-            out.axis[1][i] = tag_a.axis[1][i] * back_lerp + tag_b.axis[1][i] * frac
-            out.axis[2][i] = tag_a.axis[2][i] * back_lerp + tag_b.axis[2][i] * frac
-
-        _vector_normalize(out.axis[0])
-        _vector_normalize(out.axis[1])
-        _vector_normalize(out.axis[2])
-
-        return out
-
-    def _position_child_on_tag(self, parent_transform, tag):
-        child = TagTransform()
-
-        # child.origin = parent.origin + tag.origin[0]*parent.axis[0] + ...
-        child.origin = [0.0, 0.0, 0.0]
-        for i in range(3):
-            child.origin[i] = parent_transform.origin[i]
-            for j in range(3):
-                child.origin[i] += tag.origin[j] * parent_transform.axis[j][i]
-
-        # child.axis = tag.axis * parent.axis
-        child.axis = _matrix_multiply_3x3(tag.axis, parent_transform.axis)
-
-        return child
+        frames = self.anim_config.timelines[state.animIndex].frames
+        return int(frames[state.currentFrame]), int(frames[state.nextFrame]), state.fraction
 
     def _compute_center_height(self):
         legs_frame = 0
@@ -325,91 +373,142 @@ class MD3PlayerModel:
         if torso_frame >= self._upper.num_frames:
             torso_frame = 0
 
-        min_x = min_y = min_z = 1e9
-        max_x = max_y = max_z = -1e9
-
-        # Lower body verts at idle frame
-        for surf in self._lower.surfaces:
-            base = legs_frame * surf.numVerts
-            for v_idx in range(surf.numVerts):
-                v = surf.vertices[base + v_idx]
-                x, y, z = v.position
-                min_x = min(min_x, x); max_x = max(max_x, x)
-                min_y = min(min_y, y); max_y = max(max_y, y)
-                min_z = min(min_z, z); max_z = max(max_z, z)
-
-        # Get tag_torso at legs idle frame
-        torso_tag = self._lower.tag_for_name('tag_torso', legs_frame)
-        t_origin = [0, 0, 0]
-        t_axis = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
-        if torso_tag:
-            t_origin = list(torso_tag.origin)
-            t_axis = [list(row) for row in torso_tag.axis]
-
-        # Upper body verts at torso stand frame, transformed through tag_torso
-        for surf in self._upper.surfaces:
-            base = torso_frame * surf.numVerts
-            for v_idx in range(surf.numVerts):
-                v = surf.vertices[base + v_idx]
-                world = _transform_point(v.position, t_origin, t_axis)
-                min_x = min(min_x, world[0]); max_x = max(max_x, world[0])
-                min_y = min(min_y, world[1]); max_y = max(max_y, world[1])
-                min_z = min(min_z, world[2]); max_z = max(max_z, world[2])
-
-        # Get tag_head at torso stand frame, transformed through tag_torso
-        head_tag = self._upper.tag_for_name('tag_head', torso_frame)
-        h_origin = [0, 0, 0]
-        h_axis = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
-        if head_tag:
-            local_origin = _transform_point(head_tag.origin, t_origin, t_axis)
-            h_origin = local_origin
-            h_axis = _matrix_multiply_3x3(head_tag.axis, t_axis)
-
-        # Head verts at frame 0, transformed through both tags
-        for surf in self._head.surfaces:
-            for v_idx in range(surf.numVerts):
-                v = surf.vertices[v_idx]  # head is typically 1 frame
-                world = _transform_point(v.position, h_origin, h_axis)
-                min_x = min(min_x, world[0]); max_x = max(max_x, world[0])
-                min_y = min(min_y, world[1]); max_y = max(max_y, world[1])
-                min_z = min(min_z, world[2]); max_z = max(max_z, world[2])
-
-        cx = (min_x + max_x) * 0.5
-        cy = (min_y + max_y) * 0.5
-        cz = (min_z + max_z) * 0.5
-        self.center_height = cz
-
-        dx = max(max_x - cx, cx - min_x)
-        dy = max(max_y - cy, cy - min_y)
-        dz = max(max_z - cz, cz - min_z)
-        self.bounding_radius = math.sqrt(dx*dx + dy*dy + dz*dz)
+        bounds = self._bounds.bounds([legs_frame], [torso_frame])
+        self.center_height = float(bounds.center[2])
+        self.bounding_radius = bounds.radius
+
+    def frame_bounds(self, legs_frame, torso_frame, conservative=False):
+        """Bounds of the stitched player at one legs/torso keyframe pair."""
+        return self._bounds.bounds([legs_frame], [torso_frame], conservative)
+
+    def animation_bounds(self, torso_anim, legs_anim, conservative=False):
+        """Bounds enclosing every keyframe combination of the two animations (cached)."""
+        key = (torso_anim, legs_anim, conservative)
+        bounds = self._bounds_cache.get(key)
+        if bounds is None:
+            if self.anim_config is None:
+                legs_frames = torso_frames = [0]
+            else:
+                legs_frames = self.anim_config.timelines[legs_anim].frames
+                torso_frames = self.anim_config.timelines[torso_anim].frames
+            bounds = self._bounds.bounds(legs_frames, torso_frames, conservative)
+            self._bounds_cache[key] = bounds
+        return bounds
+
+    def part_spheres(self, legs_fa, legs_fb, torso_fa, torso_fb, part_matrices):
+        """World-space (..., 3, 4) culling spheres for legs/torso/head."""
+        return self._bounds.part_spheres(legs_fa, legs_fb, torso_fa, torso_fb, part_matrices)
+
+    def pose_at(self, torso_anim, legs_anim, t_ms, legs_t_ms=None):
+        """Evaluate the pose t_ms into torso_anim (and legs_t_ms, default t_ms,
+        into legs_anim) without touching playback state."""
+        if legs_t_ms is None:
+            legs_t_ms = t_ms
+        if self.anim_config is None:
+            return self._pose_for_frames(0, 0, 0.0, 0, 0, 0.0)
+        legs = self.anim_config.timelines[legs_anim].frames_at(legs_t_ms)
+        torso = self.anim_config.timelines[torso_anim].frames_at(t_ms)
+        return self._pose_for_frames(*legs, *torso)
 
-    def render(self, renderer, tex_cache, view_matrix, proj_matrix, gamma):
+    def current_pose(self):
+        """Advance live playback from the clock and return the current pose."""
         self._update_anim_state(self._torso_state)
         self._update_anim_state(self._legs_state)
+        return self._pose_for_frames(*self._get_frame_a_b(self._legs_state),
+                                     *self._get_frame_a_b(self._torso_state))
+
+    def frames_at_many(self, torso_anim, legs_anim, t_ms, legs_t_ms=None):
+        """Vectorized pose_at frames over an array of times.
+
+        Returns (legs frames, torso frames), each a (frame_a, frame_b,
+        fraction) tuple of arrays; part_matrices() turns them into transforms.
+        torso_anim and legs_anim may also be arrays giving each element its
+        own animation.
+        """
+        if legs_t_ms is None:
+            legs_t_ms = t_ms
+        if self.anim_config is None:
+            zeros = np.zeros(np.shape(t_ms), dtype=np.int64)
+            frames = (zeros, zeros, zeros.astype(np.float64))
+            return frames, frames
+        config = self.anim_config
+        if np.ndim(torso_anim) or np.ndim(legs_anim):
+            return (config.frames_at_many(np.broadcast_to(legs_anim, np.shape(legs_t_ms)),
+                                          legs_t_ms),
+                    config.frames_at_many(np.broadcast_to(torso_anim, np.shape(t_ms)), t_ms))
+        return (config.timelines[legs_anim].frames_at_many(legs_t_ms),
+                config.timelines[torso_anim].frames_at_many(t_ms))
+
+    def part_matrices(self, legs, torso):
+        """(..., 3, 4, 4) legs/torso/head matrices for frames_at_many output."""
+        return self._tag_chain.evaluate(*legs, *torso)
+
+    def _pose_for_frames(self, legs_fa, legs_fb, legs_frac, torso_fa, torso_fb, torso_frac):
+        parts = self._tag_chain.evaluate(legs_fa, legs_fb, legs_frac,
+                                         torso_fa, torso_fb, torso_frac)
+        return PlayerPose(
+            legsFrameA=legs_fa, legsFrameB=legs_fb, legsFraction=legs_frac,
+            torsoFrameA=torso_fa, torsoFrameB=torso_fb, torsoFraction=torso_frac,
+            legsTransform=parts[0],
+            torsoTransform=parts[1],
+            headTransform=parts[2],
+        )
 
-        # Lower body (legs)
-        legs_fa, legs_fb, legs_frac = self._get_frame_a_b(self._legs_state)
-        legs_transform = TagTransform()
-
-        renderer.render_model(self._lower, legs_fa, legs_fb, legs_frac,
-                              legs_transform, tex_cache, self._lower_skin,
-                              view_matrix, proj_matrix, gamma)
+    def render(self, renderer, tex_cache, view_matrix, proj_matrix, gamma):
+        with renderer.timer.stage('animation'):
+            self._update_anim_state(self._torso_state)
+            self._update_anim_state(self._legs_state)
+            frames = (*self._get_frame_a_b(self._legs_state),
+                      *self._get_frame_a_b(self._torso_state))
+        with renderer.timer.stage('tags'):
+            pose = self._pose_for_frames(*frames)
+        self.render_pose(pose, renderer, tex_cache, view_matrix, proj_matrix, gamma)
+
+    def select_lod(self, view_matrix, proj_matrix):
+        """Pick a LOD from the projected size of the bounding sphere, with hysteresis."""
+        if len(self._lods) > 1:
+            center = np.array([[0.0, 0.0, self.center_height]], dtype=np.float32)
+            size = projected_size(center, self.bounding_radius, view_matrix, proj_matrix)
+            self._lod = int(select_lods(size, np.array([self._lod]), len(self._lods))[0])
+        return self._lod
+
+    def render_pose(self, pose, renderer, tex_cache, view_matrix, proj_matrix, gamma,
+                    lod=None):
+        # Skip parts whose frame spheres are outside the view frustum
+        with renderer.timer.stage('tags'):
+            spheres = self.part_spheres(pose.legsFrameA, pose.legsFrameB,
+                                        pose.torsoFrameA, pose.torsoFrameB,
+                                        np.stack([pose.legsTransform, pose.torsoTransform,
+                                                  pose.headTransform]))
+            visible = spheres_visible(spheres, frustum_planes(view_matrix, proj_matrix))
+        renderer.cull_stats.count(visible)
+        if not visible.any():
+            return
 
-        # Upper body (torso)
-        torso_tag = self._lerp_tag(self._lower, 'tag_torso', legs_fa, legs_fb, legs_frac)
-        torso_transform = self._position_child_on_tag(legs_transform, torso_tag)
+        if lod is None:
+            lod = self.select_lod(view_matrix, proj_matrix)
+        lower, upper, head = parts = self._parts(lod)
+        with renderer.timer.stage('textures'):
+            part_textures = self.surface_textures(tex_cache, lod=lod)
+        if renderer.single_pass:
+            renderer.render_player(self, parts, pose, part_textures,
+                                   view_matrix, proj_matrix, gamma, lod,
+                                   visible=tuple(bool(v) for v in visible))
+            return
 
-        torso_fa, torso_fb, torso_frac = self._get_frame_a_b(self._torso_state)
+        lower_tex, upper_tex, head_tex = part_textures
 
-        renderer.render_model(self._upper, torso_fa, torso_fb, torso_frac,
-                              torso_transform, tex_cache, self._upper_skin,
-                              view_matrix, proj_matrix, gamma)
+        if visible[0]:
+            renderer.render_model(lower, pose.legsFrameA, pose.legsFrameB, pose.legsFraction,
+                                  pose.legsTransform, tex_cache, self._lower_skin,
+                                  view_matrix, proj_matrix, gamma, lower_tex)
 
-        # Head
-        head_tag = self._lerp_tag(self._upper, 'tag_head', torso_fa, torso_fb, torso_frac)
-        head_transform = self._position_child_on_tag(torso_transform, head_tag)
+        if visible[1]:
+            renderer.render_model(upper, pose.torsoFrameA, pose.torsoFrameB, pose.torsoFraction,
+                                  pose.torsoTransform, tex_cache, self._upper_skin,
+                                  view_matrix, proj_matrix, gamma, upper_tex)
 
-        renderer.render_model(self._head, 0, 0, 0.0,
-                              head_transform, tex_cache, self._head_skin,
-                              view_matrix, proj_matrix, gamma)
+        if visible[2]:
+            renderer.render_model(head, 0, 0, 0.0,
+                                  pose.headTransform, tex_cache, self._head_skin,
+                                  view_matrix, proj_matrix, gamma, head_tex)
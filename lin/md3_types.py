@@ -3,7 +3,7 @@
 import struct
 from dataclasses import dataclass, field
 from enum import IntEnum
-from typing import List
+from typing import Any, List
 
 # On-disk MD3 constants
 MD3_IDENT = (ord('3') << 24) + (ord('P') << 16) + (ord('D') << 8) + ord('I')
@@ -18,6 +18,7 @@ MD3_MAX_SURFACES = 32
 MD3_MAX_TRIANGLES = 8192
 MD3_MAX_VERTS = 4096
 MD3_MAX_SHADERS = 256
+MD3_MAX_LODS = 3
 
 # Struct format strings for on-disk types (little-endian)
 # MD3DiskHeader: ident, version, name[64], flags, numFrames, numTags, numSurfaces,
@@ -157,13 +158,25 @@ class TagTransform:
     ])
 
 
-# Runtime structures
 @dataclass
-class MD3Vertex:
-    position: List[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
-    normal: List[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
+class PlayerPose:
+    """Frame pairs, fractions and stitched part transforms for one instant.
+
+    Transforms are 4x4 float32 matrices in tag_chain's row-vector layout
+    (flat order is the column-major GL model matrix).
+    """
+    legsFrameA: int = 0
+    legsFrameB: int = 0
+    legsFraction: float = 0.0
+    torsoFrameA: int = 0
+    torsoFrameB: int = 0
+    torsoFraction: float = 0.0
+    legsTransform: Any = None
+    torsoTransform: Any = None
+    headTransform: Any = None
 
 
+# Runtime structures
 @dataclass
 class MD3Tag:
     name: str = ""
@@ -191,6 +204,7 @@ class MD3Surface:
     numTriangles: int = 0
     triangles: List[int] = field(default_factory=list)      # flat: numTriangles * 3
     texCoords: List[float] = field(default_factory=list)     # flat: numVerts * 2
-    vertices: List[MD3Vertex] = field(default_factory=list)  # numVerts * numFrames
+    positions: Any = None                                    # (numFrames, numVerts, 3) float32
+    xyzNormals: Any = None                                   # (numFrames, numVerts, 4) int16, as on disk
     shaderName: str = ""
     textureID: int = 0
@@ -0,0 +1,157 @@
+"""Vectorized AABB / bounding-sphere computation for stitched player models."""
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from tag_chain import lerp_tag_matrices
+
+
+@dataclass
+class Bounds:
+    mins: Any = None     # (3,) float32
+    maxs: Any = None     # (3,) float32
+    center: Any = None   # (3,) float32, AABB center
+    radius: float = 0.0  # bounding sphere around center
+
+
+def _box_corners(bounds):
+    """(n, 2, 3) min/max boxes -> (n, 8, 3) corner points."""
+    lo = bounds[:, 0]
+    hi = bounds[:, 1]
+    corners = np.empty((len(bounds), 8, 3), dtype=np.float32)
+    for i in range(8):
+        corners[:, i, 0] = hi[:, 0] if i & 1 else lo[:, 0]
+        corners[:, i, 1] = hi[:, 1] if i & 2 else lo[:, 1]
+        corners[:, i, 2] = hi[:, 2] if i & 4 else lo[:, 2]
+    return corners
+
+
+def _sphere_union(a, b):
+    """Sphere around a's center enclosing spheres a and b, both (..., 4)."""
+    reach = np.linalg.norm(b[..., :3] - a[..., :3], axis=-1) + b[..., 3]
+    out = a.copy()
+    out[..., 3] = np.maximum(a[..., 3], reach)
+    return out
+
+
+def _transform(points, matrices):
+    """Apply row-vector 4x4 matrices (..., 4, 4) to points (..., n, 3)."""
+    return points @ matrices[..., :3, :3] + matrices[..., None, 3, :3]
+
+
+class PlayerBounds:
+    """Per-frame and per-animation bounds for lower/upper/head.
+
+    Tight mode transforms every vertex; conservative mode transforms the
+    on-disk MD3Frame boxes and spheres instead, which is much cheaper.
+    """
+
+    def __init__(self, lower, upper, head, tag_chain):
+        self._lower = lower
+        self._upper = upper
+        self._head = head
+        self._tag_chain = tag_chain
+        self._frame_boxes = {}
+        self._frame_spheres = {}
+        for model in (lower, upper, head):
+            frames = model.frames
+            boxes = np.array([f.bounds for f in frames], dtype=np.float32).reshape(-1, 2, 3)
+            self._frame_boxes[id(model)] = boxes
+            spheres = np.zeros((len(frames), 4), dtype=np.float32)
+            for i, f in enumerate(frames):
+                spheres[i, :3] = f.localOrigin
+                spheres[i, 3] = f.radius
+            self._frame_spheres[id(model)] = spheres
+
+    def _part_points(self, model, frames, conservative):
+        """(len(frames), n, 3) points bounding the part at each frame."""
+        if model.num_frames == 0:
+            return np.zeros((len(frames), 0, 3), dtype=np.float32)
+        frames = np.asarray(frames) % model.num_frames
+        if conservative:
+            return _box_corners(self._frame_boxes[id(model)][frames])
+        arrays = [surf.positions[frames % surf.numFrames]
+                  for surf in model.surfaces if surf.numVerts > 0 and surf.numFrames > 0]
+        if not arrays:
+            return np.zeros((len(frames), 0, 3), dtype=np.float32)
+        return np.concatenate(arrays, axis=1)
+
+    def _part_spheres(self, model, frames):
+        if model.num_frames == 0:
+            return np.zeros(np.shape(frames) + (4,), dtype=np.float32)
+        return self._frame_spheres[id(model)][np.asarray(frames) % model.num_frames]
+
+    def part_spheres(self, legs_fa, legs_fb, torso_fa, torso_fb, part_matrices):
+        """World-space (..., 3, 4) culling spheres for legs/torso/head.
+
+        Uses the cached on-disk MD3Frame spheres of both blended frames,
+        moved by the (..., 3, 4, 4) part matrices from the tag chain.
+        Inputs may be scalars or arrays for many instances.
+        """
+        lower = _sphere_union(self._part_spheres(self._lower, legs_fa),
+                              self._part_spheres(self._lower, legs_fb))
+        upper = _sphere_union(self._part_spheres(self._upper, torso_fa),
+                              self._part_spheres(self._upper, torso_fb))
+        head = np.broadcast_to(self._part_spheres(self._head, 0), lower.shape)
+        spheres = np.stack([lower, upper, head], axis=-2)
+        centers = _transform(spheres[..., None, :3], part_matrices)[..., 0, :]
+        return np.concatenate([centers, spheres[..., 3:]], axis=-1)
+
+    def bounds(self, legs_frames, torso_frames, conservative=False):
+        """Bounds covering every combination of the given keyframes.
+
+        Pass single-element lists for one frame, or an animation's frames
+        for bounds that fit the whole animation.
+        """
+        legs_frames = np.unique(np.asarray(legs_frames, dtype=np.int64))
+        torso_frames = np.unique(np.asarray(torso_frames, dtype=np.int64))
+
+        torso_tags = lerp_tag_matrices(self._tag_chain.torso_tags, legs_frames, legs_frames, 0.0)
+        head_tags = lerp_tag_matrices(self._tag_chain.head_tags, torso_frames, torso_frames, 0.0)
+
+        # Lower part in model space, one set per legs frame
+        lower_pts = self._part_points(self._lower, legs_frames, conservative)
+
+        # Upper and head in torso space, one set per torso frame
+        upper_pts = self._part_points(self._upper, torso_frames, conservative)
+        head_pts = self._part_points(self._head, [0], conservative)
+        head_pts = _transform(np.broadcast_to(head_pts, (len(torso_frames),) + head_pts.shape[1:]),
+                              head_tags)
+        torso_space = np.concatenate([upper_pts, head_pts], axis=1)
+
+        # Every torso frame placed on every legs frame's tag_torso
+        world = _transform(torso_space[None], torso_tags[:, None])
+        points = np.concatenate([lower_pts.reshape(-1, 3), world.reshape(-1, 3)])
+        if len(points) == 0:
+            zero = np.zeros(3, dtype=np.float32)
+            return Bounds(mins=zero, maxs=zero, center=zero, radius=0.0)
+
+        mins = points.min(axis=0)
+        maxs = points.max(axis=0)
+        center = (mins + maxs) * 0.5
+
+        if conservative:
+            radius = self._conservative_radius(center, legs_frames, torso_frames,
+                                               torso_tags, head_tags)
+        else:
+            radius = float(np.sqrt(((points - center) ** 2).sum(axis=1).max()))
+        return Bounds(mins=mins, maxs=maxs, center=center, radius=radius)
+
+    def _conservative_radius(self, center, legs_frames, torso_frames, torso_tags, head_tags):
+        """Sphere around center enclosing every part's on-disk frame sphere."""
+        lower = self._part_spheres(self._lower, legs_frames)
+        upper = self._part_spheres(self._upper, torso_frames)
+        head = self._part_spheres(self._head, [0])
+
+        head_origin = _transform(np.broadcast_to(head[:, None, :3], (len(torso_frames), 1, 3)),
+                                 head_tags)
+        torso_space = np.concatenate([upper[:, None, :3], head_origin], axis=1)
+        torso_radius = np.stack([upper[:, 3], np.broadcast_to(head[:, 3], len(torso_frames))],
+                                axis=1)
+        world = _transform(torso_space[None], torso_tags[:, None])
+
+        reach = [np.linalg.norm(lower[:, :3] - center, axis=1) + lower[:, 3],
+                 (np.linalg.norm(world - center, axis=-1) + torso_radius[None]).reshape(-1)]
+        return float(max(r.max() for r in reach if r.size))
@@ -0,0 +1,73 @@
+"""Background loading of player models off the GTK main thread."""
+
+import sys
+import threading
+
+from gi.repository import GLib
+
+from md3_player_model import MD3PlayerModel
+
+
+class ModelLoadJob:
+    """Loads one player model in two stages.
+
+    The CPU stage (archive reads, md3/skin/cfg parsing, texture decode) runs
+    on a worker thread. When it finishes, on_done(model) is scheduled on the
+    main loop with GLib.idle_add so the caller can do the GL upload there.
+    progress(fraction, text) is likewise delivered on the main loop.
+    A cancelled job never calls back.
+    """
+
+    def __init__(self, archive, model_path, texture_cache, on_done, progress=None):
+        self.archive = archive
+        self.model_path = model_path
+        self.texture_cache = texture_cache
+        self._on_done = on_done
+        self._progress = progress
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _report(self, fraction, text):
+        if self._progress is not None and not self.cancelled:
+            GLib.idle_add(self._deliver_progress, fraction, text)
+
+    def _deliver_progress(self, fraction, text):
+        if not self.cancelled:
+            self._progress(fraction, text)
+        return False
+
+    def _deliver_done(self, model):
+        if not self.cancelled:
+            self._on_done(model)
+        return False
+
+    def _run(self):
+        self._report(0.0, 'Loading model...')
+        try:
+            model = MD3PlayerModel(self.archive, self.model_path)
+        except Exception as e:
+            print(f"Failed to load player model {self.model_path}: {e}", file=sys.stderr)
+            GLib.idle_add(self._deliver_done, None)
+            return
+        if self.cancelled:
+            return
+
+        # Model parsing is the first third; texture decode is the rest
+        def on_texture(done, total):
+            self._report(1 / 3 + 2 / 3 * done / total, f'Textures {done} / {total}')
+
+        if not self.texture_cache.decode_textures(model.skin_texture_paths(),
+                                                  cancelled=self._cancel.is_set,
+                                                  progress=on_texture):
+            return
+        GLib.idle_add(self._deliver_done, model)
@@ -0,0 +1,60 @@
+"""Session LRU of fully loaded player models and their textures."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CachedModel:
+    model: Any = None          # MD3PlayerModel
+    texture_cache: Any = None  # TextureCache owned by this model
+
+    def memory_bytes(self):
+        return self.model.memory_bytes() + self.texture_cache.memory_bytes()
+
+
+class ModelLRU:
+    """Keeps recently viewed models resident up to an estimated memory budget.
+
+    Sizes are re-measured on every trim because textures load lazily after a
+    model is first drawn. The most recently used entry is never evicted.
+    on_evict(entry) is called for each evicted entry and must free its GL
+    resources (the caller makes the GL context current first).
+    """
+
+    def __init__(self, budget_bytes, on_evict=None):
+        self.budget_bytes = budget_bytes
+        self._on_evict = on_evict
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self.trim()
+
+    def total_bytes(self):
+        return sum(entry.memory_bytes() for entry in self._entries.values())
+
+    def trim(self):
+        total = self.total_bytes()
+        while len(self._entries) > 1 and total > self.budget_bytes:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.memory_bytes()
+            if self._on_evict:
+                self._on_evict(entry)
+
+    def clear(self):
+        while self._entries:
+            _, entry = self._entries.popitem(last=False)
+            if self._on_evict:
+                self._on_evict(entry)
@@ -1,18 +1,66 @@
 """OpenGL 3.2 Core model renderer with GLSL 150 shaders."""
 
 import ctypes
+import sys
+
 import numpy as np
 
 from OpenGL.GL import *
 from OpenGL.GL import shaders
-
-from md3_types import TagTransform
+# Raw entry points for the fast path: no wrapper layers or argument conversion
+from OpenGL.raw.GL.VERSION.GL_1_1 import glBindTexture as glBindTextureRaw
+from OpenGL.raw.GL.VERSION.GL_1_1 import glDrawElements as glDrawElementsRaw
+from OpenGL.raw.GL.VERSION.GL_1_3 import glActiveTexture as glActiveTextureRaw
+from OpenGL.raw.GL.VERSION.GL_2_0 import glUniform1f as glUniform1fRaw
+from OpenGL.raw.GL.VERSION.GL_2_0 import glUniform1i as glUniform1iRaw
+from OpenGL.raw.GL.VERSION.GL_2_0 import glUniformMatrix3fv as glUniformMatrix3fvRaw
+from OpenGL.raw.GL.VERSION.GL_2_0 import glUniformMatrix4fv as glUniformMatrix4fvRaw
+from OpenGL.raw.GL.VERSION.GL_2_0 import glUseProgram as glUseProgramRaw
+from OpenGL.raw.GL.VERSION.GL_3_0 import glBindVertexArray as glBindVertexArrayRaw
+
+from frame_timer import FrameTimer
+from frustum import CullStats
+from md3_types import MD3_DISK_VERTEX_SIZE, MD3_XYZ_SCALE, TagTransform
+from skin_parser import surface_texture_path
+
+# Texture unit holding the frame texture buffer in texture-buffer mode
+FRAME_TEXTURE_UNIT = 2
+
+# Uniform block binding points for the single-pass player program
+CAMERA_BLOCK_BINDING = 0
+PLAYER_BLOCK_BINDING = 1
+
+# Texture unit and per-instance texel count of the crowd instance buffer
+INSTANCE_TEXTURE_UNIT = 3
+INSTANCE_TEXELS = 15
+
+# Texture group sets a player's buffers keep (skins x visibility combinations)
+MAX_TEXTURE_GROUP_SETS = 32
+
+# Fixed attribute locations shared by the player and crowd programs
+_PLAYER_ATTRIBUTES = ('texCoord', 'vertexPart')
+
+# Shared by both vertex shaders
+_VERTEX_DECODE_GLSL = """const float XYZ_SCALE = %r;
+const float NORMAL_SCALE = 2.0 * 3.14159265358979 / 255.0;
+vec3 decodeNormal(int encoded) {
+    float lat = float((encoded >> 8) & 255) * NORMAL_SCALE;
+    float lng = float(encoded & 255) * NORMAL_SCALE;
+    return vec3(cos(lat) * sin(lng), sin(lat) * sin(lng), cos(lng));
+}
+""" % MD3_XYZ_SCALE
 
 VERTEX_SHADER_SOURCE = """#version 150
-in vec3 posA;
-in vec3 normalA;
-in vec3 posB;
-in vec3 normalB;
+// Raw MD3 vertices: int16 xyz scaled by MD3_XYZ_SCALE, int16 lat/lng normal
+#ifdef FRAME_FETCH_TBO
+uniform isamplerBuffer frames;  // [frame][part vertex]
+uniform int frameA;
+uniform int frameB;
+uniform int numVerts;
+#else
+in ivec4 vertA;
+in ivec4 vertB;
+#endif
 in vec2 texCoord;
 uniform float lerp;
 uniform mat4 modelMatrix;
@@ -22,9 +70,14 @@ uniform mat3 normalMatrix;
 out vec2 vTexCoord;
 out vec3 vNormal;
 out vec3 vWorldPos;
+""" + _VERTEX_DECODE_GLSL + """
 void main() {
-    vec3 pos = mix(posA, posB, lerp);
-    vec3 norm = normalize(mix(normalA, normalB, lerp));
+#ifdef FRAME_FETCH_TBO
+    ivec4 vertA = texelFetch(frames, frameA * numVerts + gl_VertexID);
+    ivec4 vertB = texelFetch(frames, frameB * numVerts + gl_VertexID);
+#endif
+    vec3 pos = mix(vec3(vertA.xyz), vec3(vertB.xyz), lerp) * XYZ_SCALE;
+    vec3 norm = normalize(mix(decodeNormal(vertA.w), decodeNormal(vertB.w), lerp));
     vec4 worldPos = modelMatrix * vec4(pos, 1.0);
     vWorldPos = worldPos.xyz;
     vNormal = normalMatrix * norm;
@@ -33,11 +86,68 @@ void main() {
 }
 """
 
+# Whole-player program: lower, upper and head share one frame texture
+# buffer and index buffer; vertexPart picks the part's transform, frame
+# offsets and lerp from the Player block, or per instance from the crowd
+# instance buffer when INSTANCED is defined
+PLAYER_VERTEX_SHADER_SOURCE = """#version 150
+layout(std140) uniform Camera {
+    mat4 viewMatrix;
+    mat4 projMatrix;
+};
+#ifdef INSTANCED
+// Per instance: 3 part matrices as 12 column texels, then one
+// (frame A offset, frame B offset, fraction, 0) texel per part
+uniform samplerBuffer instances;
+uniform int instanceBase;
+#else
+layout(std140) uniform Player {
+    mat4 partMatrix[3];
+    ivec4 partFrames[3];  // x, y: texel offsets of frames A and B for gl_VertexID
+    vec4 partLerp[3];     // x: frame fraction
+};
+#endif
+uniform isamplerBuffer frames;
+in vec2 texCoord;
+in int vertexPart;
+out vec2 vTexCoord;
+out vec3 vNormal;
+out vec3 vWorldPos;
+""" + _VERTEX_DECODE_GLSL + """
+void main() {
+#ifdef INSTANCED
+    int base = (instanceBase + gl_InstanceID) * %d;
+    int column = base + vertexPart * 4;
+    mat4 modelMatrix = mat4(texelFetch(instances, column), texelFetch(instances, column + 1),
+                            texelFetch(instances, column + 2), texelFetch(instances, column + 3));
+    vec4 part = texelFetch(instances, base + 12 + vertexPart);
+    ivec2 offsets = ivec2(part.xy);
+    float lerp = part.z;
+#else
+    ivec2 offsets = partFrames[vertexPart].xy;
+    float lerp = partLerp[vertexPart].x;
+    mat4 modelMatrix = partMatrix[vertexPart];
+#endif
+    ivec4 vertA = texelFetch(frames, offsets.x + gl_VertexID);
+    ivec4 vertB = texelFetch(frames, offsets.y + gl_VertexID);
+    vec3 pos = mix(vec3(vertA.xyz), vec3(vertB.xyz), lerp) * XYZ_SCALE;
+    vec3 norm = normalize(mix(decodeNormal(vertA.w), decodeNormal(vertB.w), lerp));
+    vec4 worldPos = modelMatrix * vec4(pos, 1.0);
+    vWorldPos = worldPos.xyz;
+    vNormal = mat3(modelMatrix) * norm;
+    vTexCoord = texCoord;
+    gl_Position = projMatrix * viewMatrix * worldPos;
+}
+""" % INSTANCE_TEXELS
+
 FRAGMENT_SHADER_SOURCE = """#version 150
 in vec2 vTexCoord;
 in vec3 vNormal;
 in vec3 vWorldPos;
 uniform sampler2D tex;
+uniform sampler2DArray texArray;
+uniform bool useTexArray;
+uniform float texLayer;
 uniform float gamma;
 out vec4 fragColor;
 void main() {
@@ -45,7 +155,8 @@ void main() {
     vec3 lightDir = normalize(vec3(0.5, 0.3, 1.0));
     float ambient = 0.35;
     float diffuse = max(dot(norm, lightDir), 0.0) * 0.65;
-    vec4 texColor = texture(tex, vTexCoord);
+    vec4 texColor = useTexArray ? texture(texArray, vec3(vTexCoord, texLayer))
+                                : texture(tex, vTexCoord);
     if (texColor.a < 0.5) discard;
     vec3 color = texColor.rgb * (ambient + diffuse);
     fragColor = vec4(pow(color, vec3(1.0 / gamma)), texColor.a);
@@ -54,13 +165,41 @@ void main() {
 
 
 class ModelRenderer:
-    def __init__(self):
+    """Draws MD3 parts from GPU-resident buffers.
+
+    By default frames are selected by re-pointing vertex attributes per
+    surface. With use_texture_buffers, each part's frames live in one
+    texture buffer fetched by gl_VertexID, so frame changes are uniform
+    updates and surfaces sharing a texture are drawn in a single call.
+
+    With single_pass, render_player draws all three parts of a player with
+    one program: camera matrices sit in a uniform buffer uploaded once per
+    frame, part transforms in a per-player uniform buffer, and surfaces of
+    every part are grouped by texture and drawn with glMultiDrawElements.
+
+    render_crowd draws many players from the same buffers with instanced
+    draws, reading per-instance poses from an instance texture buffer.
+
+    An optional ProgramCache stores linked program binaries on disk so
+    later starts skip GLSL compilation.
+
+    With fast_gl, per-draw GL calls go through raw entry points and skip
+    redundant program, texture and uniform updates (see _CachedGLState).
+    Pair it with gl_calls.configure_pyopengl(True) to also drop PyOpenGL's
+    per-call error checks.
+    """
+
+    def __init__(self, use_texture_buffers=False, single_pass=False, program_cache=None,
+                 fast_gl=False):
+        self.use_texture_buffers = use_texture_buffers
+        self.single_pass = single_pass
+        self.program_cache = program_cache
+        self.fast_gl = fast_gl
+        self._gl = _CachedGLState() if fast_gl else _GLState()
+        self._max_texture_buffer_size = 0
         self._program = 0
-        self._vao = 0
-        self._loc_posA = -1
-        self._loc_normalA = -1
-        self._loc_posB = -1
-        self._loc_normalB = -1
+        self._loc_vertA = -1
+        self._loc_vertB = -1
         self._loc_texCoord = -1
         self._loc_lerp = -1
         self._loc_model_matrix = -1
@@ -68,21 +207,44 @@ class ModelRenderer:
         self._loc_proj_matrix = -1
         self._loc_normal_matrix = -1
         self._loc_tex = -1
+        self._loc_tex_array = -1
+        self._loc_use_tex_array = -1
+        self._loc_tex_layer = -1
         self._loc_gamma = -1
+        self._loc_frames = -1
+        self._loc_frame_a = -1
+        self._loc_frame_b = -1
+        self._loc_num_verts = -1
+        # Single-pass player and instanced crowd programs (_PlayerProgram)
+        self._player_program = None
+        self._crowd_program = None
+        self._camera_ubo = 0
+        self._player_ubo = 0
+        self._instance_tbo = 0
+        self._instance_tex = 0
+        self._camera = None  # last uploaded view + proj
+        # Player parts drawn / skipped by frustum culling since the last reset
+        self.cull_stats = CullStats()
+        # Per-stage CPU/GPU frame timing, off until enabled (see FrameTimer)
+        self.timer = FrameTimer()
+        # id(MD3Model) or (id(MD3PlayerModel), lod) -> (owner, buffers)
+        self._buffers = {}
 
     def setup_shaders(self):
+        vertex_source = VERTEX_SHADER_SOURCE
+        if self.use_texture_buffers:
+            vertex_source = vertex_source.replace('#version 150\n',
+                                                  '#version 150\n#define FRAME_FETCH_TBO\n', 1)
+            self._max_texture_buffer_size = glGetIntegerv(GL_MAX_TEXTURE_BUFFER_SIZE)
         try:
-            vs = shaders.compileShader(VERTEX_SHADER_SOURCE, GL_VERTEX_SHADER)
-            fs = shaders.compileShader(FRAGMENT_SHADER_SOURCE, GL_FRAGMENT_SHADER)
-            self._program = shaders.compileProgram(vs, fs)
+            self._program = _link_program(vertex_source, FRAGMENT_SHADER_SOURCE, (),
+                                          self.program_cache)
         except Exception as e:
             print(f"Shader compile error: {e}")
             return False
 
-        self._loc_posA = glGetAttribLocation(self._program, "posA")
-        self._loc_normalA = glGetAttribLocation(self._program, "normalA")
-        self._loc_posB = glGetAttribLocation(self._program, "posB")
-        self._loc_normalB = glGetAttribLocation(self._program, "normalB")
+        self._loc_vertA = glGetAttribLocation(self._program, "vertA")
+        self._loc_vertB = glGetAttribLocation(self._program, "vertB")
         self._loc_texCoord = glGetAttribLocation(self._program, "texCoord")
 
         self._loc_lerp = glGetUniformLocation(self._program, "lerp")
@@ -91,14 +253,176 @@ class ModelRenderer:
         self._loc_proj_matrix = glGetUniformLocation(self._program, "projMatrix")
         self._loc_normal_matrix = glGetUniformLocation(self._program, "normalMatrix")
         self._loc_tex = glGetUniformLocation(self._program, "tex")
+        self._loc_tex_array = glGetUniformLocation(self._program, "texArray")
+        self._loc_use_tex_array = glGetUniformLocation(self._program, "useTexArray")
+        self._loc_tex_layer = glGetUniformLocation(self._program, "texLayer")
         self._loc_gamma = glGetUniformLocation(self._program, "gamma")
+        self._loc_frames = glGetUniformLocation(self._program, "frames")
+        self._loc_frame_a = glGetUniformLocation(self._program, "frameA")
+        self._loc_frame_b = glGetUniformLocation(self._program, "frameB")
+        self._loc_num_verts = glGetUniformLocation(self._program, "numVerts")
 
-        self._vao = glGenVertexArrays(1)
+        if self.single_pass:
+            return self._setup_player_program()
+        return True
 
+    def _setup_player_program(self):
+        try:
+            self._player_program = _PlayerProgram(instanced=False, program_cache=self.program_cache)
+        except Exception as e:
+            print(f"Shader compile error: {e}")
+            return False
+        self._setup_uniform_buffers()
         return True
 
+    def _setup_uniform_buffers(self):
+        if self._camera_ubo:
+            return
+        self._camera_ubo, self._player_ubo = glGenBuffers(2)
+        glBindBuffer(GL_UNIFORM_BUFFER, self._camera_ubo)
+        glBufferData(GL_UNIFORM_BUFFER, _CAMERA_BLOCK_SIZE, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, self._player_ubo)
+        glBufferData(GL_UNIFORM_BUFFER, _PLAYER_BLOCK_SIZE, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, CAMERA_BLOCK_BINDING, self._camera_ubo)
+        glBindBufferBase(GL_UNIFORM_BUFFER, PLAYER_BLOCK_BINDING, self._player_ubo)
+        self._camera = None
+
+    def set_camera(self, view_matrix, proj_matrix):
+        """Upload camera matrices to the camera uniform buffer if they changed."""
+        camera = np.concatenate([np.asarray(view_matrix, dtype=np.float32).reshape(16),
+                                 np.asarray(proj_matrix, dtype=np.float32).reshape(16)])
+        if self._camera is not None and np.array_equal(camera, self._camera):
+            return
+        self._camera = camera
+        glBindBuffer(GL_UNIFORM_BUFFER, self._camera_ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, camera.nbytes, camera)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+    def render_player(self, player, parts, pose, part_textures, view_matrix, proj_matrix,
+                      gamma, lod=0, visible=(True, True, True)):
+        """Draw lower/upper/head in one pass (single_pass mode).
+
+        parts is the (lower, upper, head) MD3Model triple and part_textures
+        the matching per-surface texture entries; player and lod key the
+        cached buffers. Parts that are not visible are left out of the draws.
+        """
+        program = self._player_program
+        if program is None or any(part.num_frames == 0 for part in parts):
+            return
+
+        with self.timer.stage('upload'):
+            buffers = self.player_buffers(player, parts, lod)
+            self.set_camera(view_matrix, proj_matrix)
+            glBindBuffer(GL_UNIFORM_BUFFER, self._player_ubo)
+            block = buffers.player_block(pose)
+            glBufferSubData(GL_UNIFORM_BUFFER, 0, block.nbytes, block)
+            glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+        with self.timer.stage('draw'):
+            gl = self._gl
+            gl.invalidate()
+            program.use(gl, gamma, buffers)
+            bound_array = 0
+            for entry, counts, offsets in buffers.texture_groups(part_textures, visible):
+                bound_array = self._bind_texture(entry, bound_array, program.loc_use_tex_array,
+                                                 program.loc_tex_layer)
+                glMultiDrawElements(GL_TRIANGLES, counts, GL_UNSIGNED_INT, offsets, len(counts))
+            gl.finish()
+
+    def player_buffers(self, player, parts, lod=0):
+        """Single-pass buffers for a player's (lower, upper, head) at one LOD,
+        built on first use."""
+        cached = self._buffers.get((id(player), lod))
+        if cached is None:
+            if not self._max_texture_buffer_size:
+                self._max_texture_buffer_size = glGetIntegerv(GL_MAX_TEXTURE_BUFFER_SIZE)
+            cached = (player, _PlayerBuffers(parts, self))
+            self._buffers[(id(player), lod)] = cached
+        return cached[1]
+
+    def render_crowd(self, batches, instance_data, view_matrix, proj_matrix, gamma):
+        """Draw many players with instanced draws.
+
+        instance_data is (instances, INSTANCE_TEXELS, 4) float32 laid out as
+        the crowd instance buffer expects. batches lists
+        (player buffers, part textures, first instance, instance count);
+        each batch is drawn with one instanced draw per texture run.
+        """
+        if self._crowd_program is None:
+            try:
+                self._crowd_program = _PlayerProgram(instanced=True,
+                                                     program_cache=self.program_cache)
+            except Exception as e:
+                print(f"Shader compile error: {e}")
+                return
+            self._setup_uniform_buffers()
+            # The buffer must exist (be bound once) before it can back a texture
+            self._instance_tbo = glGenBuffers(1)
+            glBindBuffer(GL_TEXTURE_BUFFER, self._instance_tbo)
+            glBufferData(GL_TEXTURE_BUFFER, instance_data.nbytes, None, GL_STREAM_DRAW)
+            self._instance_tex = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_BUFFER, self._instance_tex)
+            glTexBuffer(GL_TEXTURE_BUFFER, GL_RGBA32F, self._instance_tbo)
+            glBindTexture(GL_TEXTURE_BUFFER, 0)
+            glBindBuffer(GL_TEXTURE_BUFFER, 0)
+        program = self._crowd_program
+
+        with self.timer.stage('upload'):
+            # Orphan and refill the whole instance buffer once per frame
+            glBindBuffer(GL_TEXTURE_BUFFER, self._instance_tbo)
+            glBufferData(GL_TEXTURE_BUFFER, instance_data.nbytes, instance_data, GL_STREAM_DRAW)
+            glBindBuffer(GL_TEXTURE_BUFFER, 0)
+            self.set_camera(view_matrix, proj_matrix)
+
+        with self.timer.stage('draw'):
+            gl = self._gl
+            gl.invalidate()
+            gl.bind_texture(GL_TEXTURE0 + INSTANCE_TEXTURE_UNIT, GL_TEXTURE_BUFFER,
+                            self._instance_tex)
+            gl.use_program(program.program)
+            gl.uniform1i(program.loc_instances, INSTANCE_TEXTURE_UNIT)
+
+            for buffers, part_textures, first, count in batches:
+                program.use(gl, gamma, buffers)
+                gl.uniform1i(program.loc_instance_base, first)
+                bound_array = 0
+                for entry, counts, offsets in buffers.texture_groups(part_textures):
+                    bound_array = self._bind_texture(entry, bound_array, program.loc_use_tex_array,
+                                                     program.loc_tex_layer)
+                    for index_count, offset in zip(counts, offsets):
+                        glDrawElementsInstanced(GL_TRIANGLES, int(index_count), GL_UNSIGNED_INT,
+                                                ctypes.c_void_p(offset), count)
+            gl.finish()
+
+    def _model_buffers(self, model):
+        """GPU-resident buffers for every surface of model, built on first use."""
+        cached = self._buffers.get(id(model))
+        if cached is None:
+            if self.use_texture_buffers:
+                buffers = _PartBuffers(model, self)
+            else:
+                buffers = [_SurfaceBuffers(surf, self) for surf in model.surfaces]
+            # Keep the model referenced so its id cannot be reused while cached
+            cached = (model, buffers)
+            self._buffers[id(model)] = cached
+        return cached[1]
+
+    def release_model(self, model):
+        """Delete the GPU buffers owned by model (an MD3Model or player).
+        Call with the GL context current."""
+        for key in [key for key, (owner, _) in self._buffers.items() if owner is model]:
+            _delete_buffers(self._buffers.pop(key)[1])
+
     def render_model(self, model, frame_a, frame_b, frac, transform,
-                     tex_cache, skin, view_matrix, proj_matrix, gamma):
+                     tex_cache, skin, view_matrix, proj_matrix, gamma,
+                     surface_textures=None):
+        """Draw one MD3 part.
+
+        surface_textures optionally holds one pre-resolved entry per surface:
+        a GL_TEXTURE_2D name or an (array texture, layer) pair. Without it,
+        textures are looked up from skin each call.
+        """
         if model is None or self._program == 0:
             return
 
@@ -108,90 +432,113 @@ class ModelRenderer:
         frame_a = frame_a % num_frames
         frame_b = frame_b % num_frames
 
-        glUseProgram(self._program)
-        glBindVertexArray(self._vao)
-
-        # Set view/proj uniforms
-        glUniformMatrix4fv(self._loc_view_matrix, 1, GL_FALSE, view_matrix)
-        glUniformMatrix4fv(self._loc_proj_matrix, 1, GL_FALSE, proj_matrix)
-
-        # Build model matrix from transform
-        model_mat = _build_model_matrix(transform)
-        glUniformMatrix4fv(self._loc_model_matrix, 1, GL_FALSE, model_mat)
-
-        normal_mat = _extract_normal_matrix(model_mat)
-        glUniformMatrix3fv(self._loc_normal_matrix, 1, GL_FALSE, normal_mat)
-
-        glUniform1f(self._loc_lerp, frac)
-        glUniform1f(self._loc_gamma, gamma)
-        glUniform1i(self._loc_tex, 0)
-
-        for surf in model.surfaces:
-            # Look up texture
-            tex_path = None
-            if skin:
-                tex_path = skin.get(surf.name)
-            if tex_path is None and surf.shaderName:
-                tex_path = surf.shaderName
-            tex_id = tex_cache.texture_for_path(tex_path) if tex_path else tex_cache.white_texture()
-
-            glActiveTexture(GL_TEXTURE0)
-            glBindTexture(GL_TEXTURE_2D, tex_id)
-
-            # Build frame A vertex data (positions + normals interleaved)
-            verts_a = _pack_vertices(surf, frame_a)
-            verts_b = _pack_vertices(surf, frame_b)
-            tex_data = np.array(surf.texCoords, dtype=np.float32)
-            idx_data = np.array(surf.triangles, dtype=np.int32)
-
-            vbo_a = glGenBuffers(1)
-            vbo_b = glGenBuffers(1)
-            vbo_tex = glGenBuffers(1)
-            ebo = glGenBuffers(1)
-
-            # Frame A positions + normals
-            glBindBuffer(GL_ARRAY_BUFFER, vbo_a)
-            glBufferData(GL_ARRAY_BUFFER, verts_a.nbytes, verts_a, GL_STREAM_DRAW)
-            glEnableVertexAttribArray(self._loc_posA)
-            glVertexAttribPointer(self._loc_posA, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-            glEnableVertexAttribArray(self._loc_normalA)
-            glVertexAttribPointer(self._loc_normalA, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
-
-            # Frame B positions + normals
-            glBindBuffer(GL_ARRAY_BUFFER, vbo_b)
-            glBufferData(GL_ARRAY_BUFFER, verts_b.nbytes, verts_b, GL_STREAM_DRAW)
-            glEnableVertexAttribArray(self._loc_posB)
-            glVertexAttribPointer(self._loc_posB, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-            glEnableVertexAttribArray(self._loc_normalB)
-            glVertexAttribPointer(self._loc_normalB, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
-
-            # Texture coordinates
-            glBindBuffer(GL_ARRAY_BUFFER, vbo_tex)
-            glBufferData(GL_ARRAY_BUFFER, tex_data.nbytes, tex_data, GL_STREAM_DRAW)
-            glEnableVertexAttribArray(self._loc_texCoord)
-            glVertexAttribPointer(self._loc_texCoord, 2, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
-
-            # Index buffer
-            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
-            glBufferData(GL_ELEMENT_ARRAY_BUFFER, idx_data.nbytes, idx_data, GL_STREAM_DRAW)
-
-            glDrawElements(GL_TRIANGLES, surf.numTriangles * 3, GL_UNSIGNED_INT, None)
-
-            glDeleteBuffers(1, [vbo_a])
-            glDeleteBuffers(1, [vbo_b])
-            glDeleteBuffers(1, [vbo_tex])
-            glDeleteBuffers(1, [ebo])
-
-        glBindVertexArray(0)
-        glUseProgram(0)
+        with self.timer.stage('upload'):
+            buffers = self._model_buffers(model)
+
+        # Look up textures
+        if surface_textures is None:
+            with self.timer.stage('textures'):
+                surface_textures = []
+                for surf in model.surfaces:
+                    tex_path = surface_texture_path(skin, surf)
+                    surface_textures.append(tex_cache.texture_for_path(tex_path) if tex_path
+                                            else tex_cache.white_texture())
+
+        with self.timer.stage('draw'):
+            gl = self._gl
+            gl.invalidate()
+            gl.use_program(self._program)
+
+            # Set view/proj uniforms
+            gl.uniform_matrix4(self._loc_view_matrix, view_matrix)
+            gl.uniform_matrix4(self._loc_proj_matrix, proj_matrix)
+
+            # Build model matrix from transform (TagTransform or baked 4x4 matrix)
+            if isinstance(transform, np.ndarray):
+                model_mat = transform.reshape(16)
+            else:
+                model_mat = _build_model_matrix(transform)
+            gl.uniform_matrix4(self._loc_model_matrix, model_mat)
+
+            normal_mat = _extract_normal_matrix(model_mat)
+            gl.uniform_matrix3(self._loc_normal_matrix, normal_mat)
+
+            gl.uniform1f(self._loc_lerp, frac)
+            gl.uniform1f(self._loc_gamma, gamma)
+            gl.uniform1i(self._loc_tex, 0)
+            gl.uniform1i(self._loc_tex_array, 1)
+
+            if self.use_texture_buffers:
+                self._draw_part(buffers, frame_a, frame_b, surface_textures)
+            else:
+                self._draw_surfaces(model, buffers, frame_a, frame_b, surface_textures)
+            gl.finish()
+
+    def _bind_texture(self, entry, bound_array, loc_use_tex_array=None, loc_tex_layer=None):
+        """Bind a surface texture entry; returns the bound array texture."""
+        if loc_use_tex_array is None:
+            loc_use_tex_array, loc_tex_layer = self._loc_use_tex_array, self._loc_tex_layer
+        gl = self._gl
+        if isinstance(entry, tuple):
+            array_tex, layer = entry
+            if array_tex != bound_array:
+                gl.bind_texture(GL_TEXTURE1, GL_TEXTURE_2D_ARRAY, array_tex)
+                bound_array = array_tex
+            gl.uniform1i(loc_use_tex_array, 1)
+            gl.uniform1f(loc_tex_layer, float(layer))
+        else:
+            gl.bind_texture(GL_TEXTURE0, GL_TEXTURE_2D, entry)
+            gl.uniform1i(loc_use_tex_array, 0)
+        return bound_array
+
+    def _draw_surfaces(self, model, surfaces, frame_a, frame_b, surface_textures):
+        """Attribute mode: one draw per surface with its VAO pointed at the frames."""
+        bound_array = 0
+        for i, surf in enumerate(model.surfaces):
+            buffers = surfaces[i]
+            if buffers.num_indices == 0 or surf.numFrames == 0:
+                continue
+            bound_array = self._bind_texture(surface_textures[i], bound_array)
+            self._gl.bind_vertex_array(buffers.vao)
+            buffers.select_frames(self, frame_a % surf.numFrames, frame_b % surf.numFrames)
+            self._gl.draw_elements(buffers.num_indices, 0)
+
+    def _draw_part(self, part, frame_a, frame_b, surface_textures):
+        """Texture-buffer mode: one draw per run of surfaces sharing a texture."""
+        gl = self._gl
+        gl.bind_texture(GL_TEXTURE0 + FRAME_TEXTURE_UNIT, GL_TEXTURE_BUFFER, part.frames_tex)
+        gl.uniform1i(self._loc_frames, FRAME_TEXTURE_UNIT)
+        gl.uniform1i(self._loc_frame_a, frame_a)
+        gl.uniform1i(self._loc_frame_b, frame_b)
+        gl.uniform1i(self._loc_num_verts, part.num_verts)
+        gl.bind_vertex_array(part.vao)
+
+        bound_array = 0
+        for first, count, surfaces in part.draw_runs(surface_textures):
+            bound_array = self._bind_texture(surface_textures[surfaces[0]], bound_array)
+            gl.draw_elements(count, first * 4)
 
     def cleanup(self):
+        self.timer.cleanup()
+        # Program names may be reused after this, so forget cached uniforms
+        self._gl = _CachedGLState() if self.fast_gl else _GLState()
+        for model, buffers in self._buffers.values():
+            _delete_buffers(buffers)
+        self._buffers.clear()
         if self._program:
             glDeleteProgram(self._program)
             self._program = 0
-        if self._vao:
-            glDeleteVertexArrays(1, [self._vao])
-            self._vao = 0
+        for program in (self._player_program, self._crowd_program):
+            if program is not None:
+                glDeleteProgram(program.program)
+        self._player_program = self._crowd_program = None
+        if self._camera_ubo:
+            glDeleteBuffers(2, [self._camera_ubo, self._player_ubo])
+            self._camera_ubo = self._player_ubo = 0
+        if self._instance_tbo:
+            glDeleteBuffers(1, [self._instance_tbo])
+            glDeleteTextures(1, [self._instance_tex])
+            self._instance_tbo = self._instance_tex = 0
 
 
 def _build_model_matrix(t):
@@ -214,20 +561,454 @@ def _extract_normal_matrix(m4):
     return m3
 
 
-def _pack_vertices(surf, frame):
-    """Pack vertex positions + normals for a single frame into a float32 array.
+class _SurfaceBuffers:
+    """Static GL buffers for one surface: every frame's raw MD3 vertices in a
+    single VBO, plus texcoords and indices. Frames are chosen per draw by
+    pointing the vertA/vertB attributes at a frame's offset in the VBO."""
+
+    def __init__(self, surf, renderer):
+        self.num_indices = surf.numTriangles * 3
+        self.frame_bytes = surf.numVerts * MD3_DISK_VERTEX_SIZE
+        self.vao = glGenVertexArrays(1)
+        self.vbo_frames, self.vbo_tex, self.ebo = glGenBuffers(3)
+
+        glBindVertexArray(self.vao)
+
+        # Uploaded exactly as stored in the file; the shader dequantizes
+        frames = surf.xyzNormals
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_frames)
+        glBufferData(GL_ARRAY_BUFFER, frames.nbytes, frames, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(renderer._loc_vertA)
+        glEnableVertexAttribArray(renderer._loc_vertB)
 
-    Layout: [px, py, pz, nx, ny, nz] per vertex (6 floats = 24 bytes stride).
+        tex_data = np.array(surf.texCoords, dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_tex)
+        glBufferData(GL_ARRAY_BUFFER, tex_data.nbytes, tex_data, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(renderer._loc_texCoord)
+        glVertexAttribPointer(renderer._loc_texCoord, 2, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+
+        idx_data = np.array(surf.triangles, dtype=np.uint32)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, idx_data.nbytes, idx_data, GL_STATIC_DRAW)
+
+        glBindVertexArray(0)
+        self._frames = None
+
+    def select_frames(self, renderer, frame_a, frame_b):
+        """Point the frame A/B attributes at their slices of the frame VBO.
+        Expects this surface's VAO to be bound."""
+        if self._frames == (frame_a, frame_b):
+            return
+        self._frames = (frame_a, frame_b)
+        off_a = frame_a * self.frame_bytes
+        off_b = frame_b * self.frame_bytes
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_frames)
+        glVertexAttribIPointer(renderer._loc_vertA, 4, GL_SHORT,
+                               MD3_DISK_VERTEX_SIZE, ctypes.c_void_p(off_a))
+        glVertexAttribIPointer(renderer._loc_vertB, 4, GL_SHORT,
+                               MD3_DISK_VERTEX_SIZE, ctypes.c_void_p(off_b))
+
+    def delete(self):
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteBuffers(3, [self.vbo_frames, self.vbo_tex, self.ebo])
+
+
+def _gather_part(model):
+    """Concatenate a part's surfaces for texture-buffer drawing.
+
+    Returns (frames, tex_coords, indices, ranges): frames is
+    (num_frames, part verts, 4) int16 raw MD3 vertices, indices are rebased
+    to part vertex numbers and ranges holds (first index, index count) per
+    surface, with count 0 for empty surfaces.
+    """
+    num_frames = model.num_frames
+    frames, tex_coords, indices, ranges = [], [], [], []
+    num_verts = 0
+    first = 0
+    for surf in model.surfaces:
+        if surf.numFrames > 0 and surf.numVerts > 0:
+            frames.append(surf.xyzNormals[np.arange(num_frames) % surf.numFrames])
+            tex_coords.append(np.array(surf.texCoords, dtype=np.float32))
+            indices.append(np.array(surf.triangles, dtype=np.uint32) + num_verts)
+            count = surf.numTriangles * 3
+            num_verts += surf.numVerts
+        else:
+            count = 0
+        ranges.append((first, count))
+        first += count
+
+    if not frames:
+        return (np.zeros((num_frames, 0, 4), dtype=np.int16), np.zeros(0, dtype=np.float32),
+                np.zeros(0, dtype=np.uint32), ranges)
+    return (np.concatenate(frames, axis=1), np.concatenate(tex_coords),
+            np.concatenate(indices), ranges)
+
+
+def _create_frame_texture(frame_data, renderer, name):
+    """Upload raw vertices into an RGBA16I texture buffer. Returns (buffer, texture)."""
+    frame_data = np.ascontiguousarray(frame_data, dtype=np.int16).reshape(-1, 4)
+    if len(frame_data) == 0:
+        frame_data = np.zeros((1, 4), dtype=np.int16)
+    if renderer._max_texture_buffer_size and len(frame_data) > renderer._max_texture_buffer_size:
+        print(f"ModelRenderer: {name} needs {len(frame_data)} frame texels, "
+              f"driver limit is {renderer._max_texture_buffer_size}", file=sys.stderr)
+
+    tbo = glGenBuffers(1)
+    frames_tex = glGenTextures(1)
+    glBindBuffer(GL_TEXTURE_BUFFER, tbo)
+    glBufferData(GL_TEXTURE_BUFFER, frame_data.nbytes, frame_data, GL_STATIC_DRAW)
+    glBindTexture(GL_TEXTURE_BUFFER, frames_tex)
+    glTexBuffer(GL_TEXTURE_BUFFER, GL_RGBA16I, tbo)
+    glBindTexture(GL_TEXTURE_BUFFER, 0)
+    glBindBuffer(GL_TEXTURE_BUFFER, 0)
+    return tbo, frames_tex
+
+
+def _create_index_buffers(vao, tex_data, idx_data, loc_tex_coord):
+    """Fill vao with a texcoord attribute and an element buffer. Returns (vbo, ebo)."""
+    vbo_tex, ebo = glGenBuffers(2)
+    glBindVertexArray(vao)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo_tex)
+    glBufferData(GL_ARRAY_BUFFER, tex_data.nbytes, tex_data, GL_STATIC_DRAW)
+    glEnableVertexAttribArray(loc_tex_coord)
+    glVertexAttribPointer(loc_tex_coord, 2, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+    glBufferData(GL_ELEMENT_ARRAY_BUFFER, idx_data.nbytes, idx_data, GL_STATIC_DRAW)
+    return vbo_tex, ebo
+
+
+class _PartBuffers:
+    """Static GL buffers for a whole part in texture-buffer mode.
+
+    All surfaces' vertices are concatenated per frame into one RGBA16I
+    texture buffer, with indices rebased to part vertex numbers so the
+    shader can fetch by gl_VertexID. Texcoords and indices are shared
+    buffers drawn in per-surface index ranges.
+    """
+
+    def __init__(self, model, renderer):
+        frames, tex_data, idx_data, self.ranges = _gather_part(model)
+        self.num_verts = frames.shape[1]
+        self.tbo, self.frames_tex = _create_frame_texture(frames, renderer, model.name)
+        self.vao = glGenVertexArrays(1)
+        self.vbo_tex, self.ebo = _create_index_buffers(self.vao, tex_data, idx_data,
+                                                       renderer._loc_texCoord)
+        glBindVertexArray(0)
+
+    def draw_runs(self, surface_textures):
+        """Yield (first index, count, surface indices) for consecutive
+        surfaces that share a texture entry."""
+        run = None
+        for i, (first, count) in enumerate(self.ranges):
+            if count == 0:
+                continue
+            if run is not None and surface_textures[i] == surface_textures[run[2][0]] \
+                    and run[0] + run[1] == first:
+                run = (run[0], run[1] + count, run[2] + [i])
+                continue
+            if run is not None:
+                yield run
+            run = (first, count, [i])
+        if run is not None:
+            yield run
+
+    def delete(self):
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteTextures(1, [self.frames_tex])
+        glDeleteBuffers(3, [self.tbo, self.vbo_tex, self.ebo])
+
+
+def _delete_buffers(buffers):
+    if isinstance(buffers, (_PartBuffers, _PlayerBuffers)):
+        buffers.delete()
+    else:
+        for surface in buffers:
+            surface.delete()
+
+
+class _PlayerProgram:
+    """Linked player or crowd program with its uniform locations."""
+
+    def __init__(self, instanced, program_cache=None):
+        source = PLAYER_VERTEX_SHADER_SOURCE
+        if instanced:
+            source = source.replace('#version 150\n', '#version 150\n#define INSTANCED\n', 1)
+        self.program = _link_program(source, FRAGMENT_SHADER_SOURCE, _PLAYER_ATTRIBUTES,
+                                     program_cache)
+        program = self.program
+        self.loc_frames = glGetUniformLocation(program, "frames")
+        self.loc_tex = glGetUniformLocation(program, "tex")
+        self.loc_tex_array = glGetUniformLocation(program, "texArray")
+        self.loc_use_tex_array = glGetUniformLocation(program, "useTexArray")
+        self.loc_tex_layer = glGetUniformLocation(program, "texLayer")
+        self.loc_gamma = glGetUniformLocation(program, "gamma")
+        self.loc_instances = glGetUniformLocation(program, "instances")
+        self.loc_instance_base = glGetUniformLocation(program, "instanceBase")
+        glUniformBlockBinding(program, glGetUniformBlockIndex(program, "Camera"),
+                              CAMERA_BLOCK_BINDING)
+        if not instanced:
+            glUniformBlockBinding(program, glGetUniformBlockIndex(program, "Player"),
+                                  PLAYER_BLOCK_BINDING)
+
+    def use(self, gl, gamma, buffers):
+        """Bind the program, its samplers and a player's buffers through gl
+        (the renderer's _GLState)."""
+        gl.use_program(self.program)
+        gl.uniform1f(self.loc_gamma, gamma)
+        gl.uniform1i(self.loc_tex, 0)
+        gl.uniform1i(self.loc_tex_array, 1)
+        gl.uniform1i(self.loc_frames, FRAME_TEXTURE_UNIT)
+        gl.bind_texture(GL_TEXTURE0 + FRAME_TEXTURE_UNIT, GL_TEXTURE_BUFFER, buffers.frames_tex)
+        gl.bind_vertex_array(buffers.vao)
+
+
+class _GLState:
+    """Per-draw GL calls, issued as is through PyOpenGL."""
+
+    def invalidate(self):
+        """Forget texture bindings made by code outside the renderer."""
+
+    def use_program(self, program):
+        glUseProgram(program)
+
+    def uniform1i(self, location, value):
+        glUniform1i(location, value)
+
+    def uniform1f(self, location, value):
+        glUniform1f(location, value)
+
+    def uniform_matrix3(self, location, matrix):
+        glUniformMatrix3fv(location, 1, GL_FALSE, matrix)
+
+    def uniform_matrix4(self, location, matrix):
+        glUniformMatrix4fv(location, 1, GL_FALSE, matrix)
+
+    def bind_texture(self, unit, target, texture):
+        glActiveTexture(unit)
+        glBindTexture(target, texture)
+
+    def bind_vertex_array(self, vao):
+        glBindVertexArray(vao)
+
+    def draw_elements(self, count, offset):
+        glDrawElements(GL_TRIANGLES, count, GL_UNSIGNED_INT, ctypes.c_void_p(offset))
+
+    def finish(self):
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+
+_FLOAT_P = ctypes.POINTER(GLfloat)
+
+
+class _CachedGLState(_GLState):
+    """Fast path: raw entry points with ctypes pointers, and calls that
+    would not change GL state skipped.
+
+    Uniform values are remembered per (program, location) for the life of
+    the programs. The bound program is tracked and left bound between
+    draws; only the renderer binds programs. Texture bindings are forgotten
+    on invalidate() since texture uploads bind textures too.
+    """
+
+    def __init__(self):
+        self._program = None
+        self._uniforms = {}  # (program, location) -> last value
+        self._unit = None
+        self._textures = {}  # (unit, target) -> texture
+
+    def invalidate(self):
+        self._unit = None
+        self._textures.clear()
+
+    def use_program(self, program):
+        if program != self._program:
+            glUseProgramRaw(program)
+            self._program = program
+
+    def _changed(self, location, value):
+        key = (self._program, location)
+        if self._uniforms.get(key) == value:
+            return False
+        self._uniforms[key] = value
+        return True
+
+    def uniform1i(self, location, value):
+        value = int(value)
+        if self._changed(location, ('i', value)):
+            glUniform1iRaw(location, value)
+
+    def uniform1f(self, location, value):
+        value = float(value)
+        if self._changed(location, ('f', value)):
+            glUniform1fRaw(location, value)
+
+    def uniform_matrix3(self, location, matrix):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self._changed(location, matrix.tobytes()):
+            glUniformMatrix3fvRaw(location, 1, GL_FALSE, matrix.ctypes.data_as(_FLOAT_P))
+
+    def uniform_matrix4(self, location, matrix):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self._changed(location, matrix.tobytes()):
+            glUniformMatrix4fvRaw(location, 1, GL_FALSE, matrix.ctypes.data_as(_FLOAT_P))
+
+    def bind_texture(self, unit, target, texture):
+        if self._textures.get((unit, target)) == texture:
+            return
+        if unit != self._unit:
+            glActiveTextureRaw(unit)
+            self._unit = unit
+        glBindTextureRaw(target, texture)
+        self._textures[(unit, target)] = texture
+
+    def bind_vertex_array(self, vao):
+        glBindVertexArrayRaw(vao)
+
+    def draw_elements(self, count, offset):
+        glDrawElementsRaw(GL_TRIANGLES, int(count), GL_UNSIGNED_INT, ctypes.c_void_p(offset))
+
+    def finish(self):
+        # Unbind the VAO so later buffer setup cannot modify it
+        glBindVertexArrayRaw(0)
+
+
+def _link_program(vertex_source, fragment_source, attributes, program_cache=None):
+    """Compile and link a program with attributes bound to locations 0, 1, ...
+
+    With a program_cache, a stored binary is tried first and a freshly
+    linked program is written back to it.
     """
-    base = frame * surf.numVerts
-    data = np.zeros(surf.numVerts * 6, dtype=np.float32)
-    for i in range(surf.numVerts):
-        v = surf.vertices[base + i]
-        off = i * 6
-        data[off]     = v.position[0]
-        data[off + 1] = v.position[1]
-        data[off + 2] = v.position[2]
-        data[off + 3] = v.normal[0]
-        data[off + 4] = v.normal[1]
-        data[off + 5] = v.normal[2]
-    return data
+    if program_cache is not None:
+        program = program_cache.load(vertex_source, fragment_source, attributes)
+        if program:
+            return program
+    vs = shaders.compileShader(vertex_source, GL_VERTEX_SHADER)
+    fs = shaders.compileShader(fragment_source, GL_FRAGMENT_SHADER)
+    program = glCreateProgram()
+    glAttachShader(program, vs)
+    glAttachShader(program, fs)
+    for location, name in enumerate(attributes):
+        glBindAttribLocation(program, location, name)
+    if program_cache is not None:
+        program_cache.prepare(program)
+    glLinkProgram(program)
+    glDeleteShader(vs)
+    glDeleteShader(fs)
+    if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError(f"Link failure: {log}")
+    if program_cache is not None:
+        program_cache.save(vertex_source, fragment_source, attributes, program)
+    return program
+
+
+# std140 sizes of the Camera and Player uniform blocks
+_CAMERA_BLOCK_SIZE = 2 * 64
+_PLAYER_BLOCK_SIZE = 3 * 64 + 3 * 16 + 3 * 16
+
+
+class _PlayerBuffers:
+    """Static GL buffers for a whole player in single-pass mode.
+
+    Lower, upper and head frames share one texture buffer and their
+    surfaces one index buffer. A per-vertex part number selects the part's
+    transform and frame offsets from the Player uniform block.
+    """
+
+    def __init__(self, parts, renderer):
+        frame_chunks, tex_chunks, idx_chunks, part_ids = [], [], [], []
+        self.part_ranges = []  # per part: (first index, count) per surface
+        self.part_layout = []  # per part: (texel base - first vertex, verts, frames)
+        vertex_start = texel_base = first = 0
+        for part, model in enumerate(parts):
+            frames, tex_data, idx_data, ranges = _gather_part(model)
+            num_verts = frames.shape[1]
+            frame_chunks.append(frames.reshape(-1, 4))
+            tex_chunks.append(tex_data)
+            idx_chunks.append(idx_data + np.uint32(vertex_start))
+            part_ids.append(np.full(num_verts, part, dtype=np.uint8))
+            self.part_ranges.append([(f + first, count) for f, count in ranges])
+            self.part_layout.append((texel_base - vertex_start, num_verts, model.num_frames))
+            first += len(idx_data)
+            vertex_start += num_verts
+            texel_base += len(frame_chunks[-1])
+
+        self.tbo, self.frames_tex = _create_frame_texture(np.concatenate(frame_chunks),
+                                                          renderer, parts[0].name)
+        self.vao = glGenVertexArrays(1)
+        loc_tex_coord, loc_vertex_part = range(len(_PLAYER_ATTRIBUTES))
+        self.vbo_tex, self.ebo = _create_index_buffers(self.vao, np.concatenate(tex_chunks),
+                                                       np.concatenate(idx_chunks), loc_tex_coord)
+        part_data = np.concatenate(part_ids)
+        self.vbo_part = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_part)
+        glBufferData(GL_ARRAY_BUFFER, part_data.nbytes, part_data, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(loc_vertex_part)
+        glVertexAttribIPointer(loc_vertex_part, 1, GL_UNSIGNED_BYTE, 0, ctypes.c_void_p(0))
+        glBindVertexArray(0)
+
+        self._block = np.zeros(_PLAYER_BLOCK_SIZE // 4, dtype=np.float32)
+        # (id(part_textures), visible) -> (part_textures, groups); the
+        # textures are kept so a recycled id can never match stale groups
+        self._groups = {}
+
+    def frame_offsets(self, part, frame_a, frame_b):
+        """Texel offsets of frames A and B for part (scalars or arrays)."""
+        base, num_verts, num_frames = self.part_layout[part]
+        return (base + (np.asarray(frame_a) % num_frames) * num_verts,
+                base + (np.asarray(frame_b) % num_frames) * num_verts)
+
+    def player_block(self, pose):
+        """Fill the std140 Player block for pose."""
+        block = self._block
+        block[0:16] = pose.legsTransform.reshape(16)
+        block[16:32] = pose.torsoTransform.reshape(16)
+        block[32:48] = pose.headTransform.reshape(16)
+        offsets = block[48:60].view(np.int32).reshape(3, 4)
+        frames = ((pose.legsFrameA, pose.legsFrameB), (pose.torsoFrameA, pose.torsoFrameB), (0, 0))
+        for part, (frame_a, frame_b) in enumerate(frames):
+            offsets[part, 0], offsets[part, 1] = self.frame_offsets(part, frame_a, frame_b)
+        block[60] = pose.legsFraction
+        block[64] = pose.torsoFraction
+        block[68] = 0.0
+        return block
+
+    def texture_groups(self, part_textures, visible=(True, True, True)):
+        """(texture entry, counts, offsets) multi-draw batches for the visible
+        parts, sorted by texture. Cached per resolved textures and visibility,
+        so crowd batches drawing one model with several skins share it."""
+        key = (id(part_textures), visible)
+        cached = self._groups.get(key)
+        if cached is not None and cached[0] is part_textures:
+            return cached[1]
+        if len(self._groups) >= MAX_TEXTURE_GROUP_SETS:
+            self._groups.clear()
+
+        ranges_by_texture = {}
+        for ranges, textures, shown in zip(self.part_ranges, part_textures, visible):
+            if not shown:
+                continue
+            for (first, count), entry in zip(ranges, textures):
+                if count == 0:
+                    continue
+                runs = ranges_by_texture.setdefault(entry, [])
+                if runs and runs[-1][0] + runs[-1][1] == first:
+                    runs[-1] = (runs[-1][0], runs[-1][1] + count)
+                else:
+                    runs.append((first, count))
+
+        groups = []
+        for entry in sorted(ranges_by_texture, key=lambda e: e if isinstance(e, tuple) else (e,)):
+            runs = ranges_by_texture[entry]
+            counts = np.array([count for _, count in runs], dtype=np.int32)
+            offsets = (ctypes.c_void_p * len(runs))(*[first * 4 for first, _ in runs])
+            groups.append((entry, counts, offsets))
+        self._groups[key] = (part_textures, groups)
+        return groups
+
+    def delete(self):
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteTextures(1, [self.frames_tex])
+        glDeleteBuffers(4, [self.tbo, self.vbo_tex, self.ebo, self.vbo_part])
@@ -2,17 +2,39 @@
 
 import math
 import sys
+import time
 
 import numpy as np
 
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, GLib
 
 from OpenGL.GL import *
 from PIL import Image
 
+import model_renderer
+import texture_cache
+from adaptive_resolution import GPUFrameClock, ResolutionScaler, ScaledFramebuffer
+from frame_timer import FrameTimer
+from gl_calls import GLCallStats, measure_wrapper_overhead
 from model_renderer import ModelRenderer
+from offscreen import (FBOPool, PNGStreamWriter, capture_tiles, max_render_size,
+                       tile_projection)
+from program_cache import ProgramCache
+from sequence_capture import FrameEncoder, PixelPackRing, flip_projection
+
+# Frame rate adaptive resolution aims for when max_fps is not set
+ADAPTIVE_TARGET_FPS = 30
+
+# Full resolution comes back after this long without a new frame
+IDLE_RESTORE_MS = 200
+
+# Largest capture_render_to_file output per side; bigger sizes are tiled
+MAX_CAPTURE_SIZE = 32768
+
+# Frame rate of capture_sequence output
+SEQUENCE_FPS = 30
 
 
 def _build_perspective(fov_y, aspect, near_z, far_z):
@@ -48,7 +70,7 @@ def _build_look_at(eye_x, eye_y, eye_z, cx, cy, cz, up_x, up_y, up_z):
 
 
 class ModelView(Gtk.GLArea):
-    def __init__(self):
+    def __init__(self, fast_gl=False):
         super().__init__()
         self.set_required_version(3, 2)
         self.set_has_depth_buffer(True)
@@ -57,9 +79,41 @@ class ModelView(Gtk.GLArea):
         self.set_vexpand(True)
 
         self.player_model = None
+        self.crowd = None  # Crowd drawn instead of player_model when set
         self.renderer = None
         self.texture_cache = None
         self.gamma = 1.0
+        # Frame fetch from texture buffers instead of per-frame attributes
+        self._use_texture_buffers = False
+        # Whole-player draws with camera/part UBOs and multi-draw
+        self._single_pass = False
+
+        # Frames-per-second readout, refreshed twice a second
+        self.fps = 0.0
+        self.on_fps = None  # callback(fps)
+        self._fps_frames = 0
+        self._fps_start = time.monotonic()
+
+        # Per-stage CPU/GPU frame timing (see frame_timings), off until enabled
+        self.frame_timer = FrameTimer()
+        # GL calls per entry point per frame (see set_gl_call_accounting)
+        self.gl_call_stats = GLCallStats()
+        self._fast_gl = fast_gl
+
+        # Frame-rate cap (0 = uncapped) and adaptive render resolution:
+        # when on, frames render offscreen at a scale that follows the
+        # measured frame cost and are upscaled onto the view
+        self.max_fps = 0
+        self.adaptive_resolution = False
+        self._scaler = ResolutionScaler()
+        self._scaled_fb = ScaledFramebuffer()
+        self._gpu_clock = GPUFrameClock()
+        self._last_frame_time = None
+        self._render_deferred = False
+        self._restore_source_id = None
+
+        # Offscreen targets reused across screenshot and render captures
+        self._fbo_pool = FBOPool()
 
         self._rotation_x = 0.0
         self._rotation_y = -90.0  # Start facing camera
@@ -101,41 +155,94 @@ class ModelView(Gtk.GLArea):
         glClearColor(0.2, 0.2, 0.25, 1.0)
 
         if self.renderer is None:
-            self.renderer = ModelRenderer()
+            self.renderer = ModelRenderer(use_texture_buffers=self._use_texture_buffers,
+                                          single_pass=self._single_pass,
+                                          program_cache=ProgramCache(), fast_gl=self._fast_gl)
+        self.renderer.timer = self.frame_timer
         self._shaders_ready = self.renderer.setup_shaders()
         if not self._shaders_ready:
             print("ModelView: shader setup failed", file=sys.stderr)
 
-        # Start tick callback for continuous rendering
-        self._tick_callback_id = self.add_tick_callback(self._tick)
-
     def _on_unrealize(self, widget):
         self.make_current()
         if self.renderer:
             self.renderer.cleanup()
+        self._scaled_fb.delete()
+        self._gpu_clock.delete()
+        self._fbo_pool.delete_all()
+        if self._restore_source_id is not None:
+            GLib.source_remove(self._restore_source_id)
+            self._restore_source_id = None
         if self._tick_callback_id is not None:
             self.remove_tick_callback(self._tick_callback_id)
             self._tick_callback_id = None
 
     def _tick(self, widget, frame_clock):
-        self.queue_render()
+        if self._render_due():
+            self._render_deferred = False
+            self.queue_render()
         return True  # keep ticking
 
+    def _render_due(self):
+        if not self.max_fps or self._last_frame_time is None:
+            return True
+        return time.monotonic() - self._last_frame_time >= 1.0 / self.max_fps
+
+    def request_render(self):
+        """queue_render, deferred to the frame-clock tick while a frame
+        now would exceed max_fps."""
+        if self._render_due():
+            self.queue_render()
+        else:
+            self._render_deferred = True
+            self._update_tick()
+
+    def _update_tick(self):
+        """Run the frame-clock tick only while something animates. Otherwise
+        the view stays idle until a change calls queue_render (camera moves
+        here, model and UI changes from the application)."""
+        animating = self._render_deferred or self.crowd is not None or (
+            self.player_model is not None and self.player_model.animating)
+        if animating and self._tick_callback_id is None:
+            self._tick_callback_id = self.add_tick_callback(self._tick)
+        elif not animating and self._tick_callback_id is not None:
+            self.remove_tick_callback(self._tick_callback_id)
+            self._tick_callback_id = None
+
     def _on_render(self, area, context):
         if not self._shaders_ready:
             return True
 
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self._last_frame_time = time.monotonic()
 
-        if self.player_model and self.texture_cache:
-            width = self.get_width()
-            height = self.get_height()
-            if height == 0:
-                height = 1
-            # Account for scale factor
-            scale = self.get_scale_factor()
-            gl_w = width * scale
-            gl_h = height * scale
+        # Account for scale factor
+        scale = self.get_scale_factor()
+        gl_w = self.get_width() * scale
+        gl_h = max(self.get_height(), 1) * scale
+
+        # Draw into the offscreen target at a reduced size while scaled
+        target_fbo = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        scaled = False
+        if self.adaptive_resolution and self._scaler.scale < 1.0:
+            scaled = self._scaled_fb.bind(max(int(gl_w * self._scaler.scale), 1),
+                                          max(int(gl_h * self._scaler.scale), 1))
+            if not scaled:
+                glBindFramebuffer(GL_FRAMEBUFFER, target_fbo)
+
+        timer = self.frame_timer
+        timer.begin_frame()
+        if self.adaptive_resolution:
+            self._gpu_clock.begin()
+        with timer.stage('draw'):
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self.renderer.cull_stats.reset()
+
+        if self.crowd is not None:
+            self._render_crowd()
+            # The crowd redraws every frame, so streaming just continues
+            with timer.stage('upload'):
+                self.crowd.stream_textures()
+        elif self.player_model and self.texture_cache:
             aspect = gl_w / gl_h
 
             proj_matrix = _build_perspective(45.0, aspect, 1.0, 2000.0)
@@ -152,8 +259,104 @@ class ModelView(Gtk.GLArea):
             self.player_model.render(self.renderer, self.texture_cache,
                                      view_matrix, proj_matrix, self.gamma)
 
+            # Upgrade progressively streamed textures a few at a time
+            with timer.stage('upload'):
+                streaming = self.texture_cache.stream_pending()
+            if streaming:
+                self.request_render()
+
+        if scaled:
+            with timer.stage('draw'):
+                self._scaled_fb.present(target_fbo, gl_w, gl_h)
+            if self._restore_source_id is None:
+                self._restore_source_id = GLib.timeout_add(IDLE_RESTORE_MS,
+                                                           self._restore_full_resolution)
+
+        timer.end_frame()
+        self.gl_call_stats.end_frame()
+        if self.adaptive_resolution:
+            self._gpu_clock.end()
+            self._update_render_scale()
+        self._count_frame()
+        self._update_tick()
         return True
 
+    def _render_crowd(self):
+        scale = self.get_scale_factor()
+        aspect = (self.get_width() * scale) / max(self.get_height() * scale, 1)
+        radius = self.crowd.radius
+        proj_matrix = _build_perspective(45.0, aspect, 1.0, max(2000.0, radius * 8.0))
+
+        # Zoom is relative to the crowd size so the whole grid fits at 100
+        zoom = self._zoom / 100.0 * radius * 2.5
+        cx, cy, cz = (float(c) for c in self.crowd.center)
+        rad_x = self._rotation_x * math.pi / 180.0
+        rad_y = self._rotation_y * math.pi / 180.0
+        view_matrix = _build_look_at(cx + zoom * math.cos(rad_x) * math.cos(rad_y),
+                                     cy + zoom * math.cos(rad_x) * math.sin(rad_y),
+                                     cz + zoom * math.sin(rad_x),
+                                     cx, cy, cz, 0, 0, 1)
+        self.crowd.render(self.renderer, view_matrix, proj_matrix, self.gamma)
+
+    def _update_render_scale(self):
+        """Feed the scaler the GPU time of the newest frame whose timer
+        queries have finished; fill cost shows there, not in Python."""
+        gpu_ms = self._gpu_clock.poll()
+        if gpu_ms is None:
+            return
+        self._scaler.target_fps = self.max_fps or ADAPTIVE_TARGET_FPS
+        self._scaler.update(gpu_ms)
+
+    def _restore_full_resolution(self):
+        """Re-render at full resolution once frames stop coming."""
+        if time.monotonic() - self._last_frame_time < IDLE_RESTORE_MS / 1000.0:
+            return True  # still drawing; check again later
+        self._restore_source_id = None
+        self._scaler.reset()
+        self.queue_render()
+        return False
+
+    def set_frame_timing(self, enabled):
+        """Turn per-stage frame timing on or off; turning it on starts a
+        fresh history."""
+        if enabled and not self.frame_timer.enabled:
+            self.frame_timer.reset()
+        self.frame_timer.enabled = enabled
+
+    def frame_timings(self, percentiles=(50, 95, 99)):
+        """Rolling per-stage timings in ms over recent frames.
+
+        Returns {'cpu': {stage: values}, 'gpu': {stage: values}} with one
+        value per requested percentile, or None for stages that did not
+        run. GPU values lag a few frames behind and are empty without
+        timer query support.
+        """
+        return {'cpu': self.frame_timer.percentiles(percentiles),
+                'gpu': self.frame_timer.percentiles(percentiles, gpu=True)}
+
+    def set_gl_call_accounting(self, enabled):
+        """Count GL calls made by the renderer, texture cache and this view."""
+        if enabled:
+            self.gl_call_stats.install([model_renderer, texture_cache, sys.modules[__name__]])
+        else:
+            self.gl_call_stats.uninstall()
+
+    def measure_gl_overhead(self):
+        """PyOpenGL wrapper vs raw call cost (see measure_wrapper_overhead)."""
+        self.make_current()
+        return measure_wrapper_overhead()
+
+    def _count_frame(self):
+        self._fps_frames += 1
+        now = time.monotonic()
+        elapsed = now - self._fps_start
+        if elapsed >= 0.5:
+            self.fps = self._fps_frames / elapsed
+            self._fps_frames = 0
+            self._fps_start = now
+            if self.on_fps is not None:
+                self.on_fps(self.fps)
+
     def _on_drag_begin(self, gesture, start_x, start_y):
         self._drag_start_x = start_x
         self._drag_start_y = start_y
@@ -173,7 +376,7 @@ class ModelView(Gtk.GLArea):
             self._rotation_x = -89
         self._drag_last_x = cur_x
         self._drag_last_y = cur_y
-        self.queue_render()
+        self.request_render()
 
     def _on_scroll(self, controller, dx, dy):
         self._zoom += dy * 5.0
@@ -181,9 +384,34 @@ class ModelView(Gtk.GLArea):
             self._zoom = 10
         if self._zoom > 500:
             self._zoom = 500
-        self.queue_render()
+        self.request_render()
         return True
 
+    def set_texture_buffer_frames(self, enabled):
+        """Fetch vertex frames from texture buffers by gl_VertexID instead of
+        re-pointing attributes per frame (see ModelRenderer)."""
+        self._use_texture_buffers = enabled
+        self._rebuild_renderer()
+
+    def set_single_pass(self, enabled):
+        """Draw all three parts of a player in one pass (see ModelRenderer)."""
+        self._single_pass = enabled
+        self._rebuild_renderer()
+
+    def _rebuild_renderer(self):
+        """Apply changed renderer modes: programs and GPU buffers differ per
+        mode, so both are freed and rebuilt on next use."""
+        if self.renderer is None:
+            return  # picked up on realize
+        self.make_current()
+        self.renderer.cleanup()
+        self.renderer.use_texture_buffers = self._use_texture_buffers
+        self.renderer.single_pass = self._single_pass
+        self._shaders_ready = self.renderer.setup_shaders()
+        if not self._shaders_ready:
+            print("ModelView: shader setup failed", file=sys.stderr)
+        self.request_render()
+
     def capture_screenshot(self, scale=2):
         """Capture a screenshot at given scale factor. Returns PIL Image or None."""
         self.make_current()
@@ -199,79 +427,182 @@ class ModelView(Gtk.GLArea):
         self.make_current()
         return self._render_to_image(width, height, use_smart_framing=True)
 
-    def _render_to_image(self, w, h, use_smart_framing=False):
-        """Internal: render to FBO and return PIL Image."""
-        # Create FBO
-        fbo = glGenFramebuffers(1)
-        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
-
-        color_tex = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, color_tex)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, color_tex, 0)
-
-        depth_rb = glGenRenderbuffers(1)
-        glBindRenderbuffer(GL_RENDERBUFFER, depth_rb)
-        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, w, h)
-        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth_rb)
-
-        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
-            print("FBO not complete", file=sys.stderr)
-            glBindFramebuffer(GL_FRAMEBUFFER, 0)
-            glDeleteFramebuffers(1, [fbo])
-            glDeleteTextures(1, [color_tex])
-            glDeleteRenderbuffers(1, [depth_rb])
-            return None
-
-        glViewport(0, 0, w, h)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-        if self.player_model and self.texture_cache:
-            aspect = w / h
-            fov_y = 45.0
-            proj_matrix = _build_perspective(fov_y, aspect, 1.0, 2000.0)
-
-            center_z = self.player_model.center_height
-
-            if use_smart_framing:
-                # Smart framing: compute zoom distance to fit bounding sphere
-                radius = self.player_model.bounding_radius
-                padding = 1.4
-                half_fov_rad = fov_y * 0.5 * math.pi / 180.0
-                dist_v = (radius * padding) / math.sin(half_fov_rad)
-                half_h_fov = math.atan(math.tan(half_fov_rad) * aspect)
-                dist_h = (radius * padding) / math.sin(half_h_fov)
-                zoom = max(dist_v, dist_h)
-            else:
-                zoom = self._zoom
+    def capture_render_to_file(self, width, height, path):
+        """Render at width x height with smart framing straight into a PNG
+        at path. Sizes beyond the GL limits are rendered in tiles, and rows
+        are written as each band is read back. Returns True on success."""
+        self.make_current()
+        writer = None
+        try:
+            writer = PNGStreamWriter(path, width, height)
+            if not self._render_tiled(width, height, True, writer.write_rows):
+                writer.abort()
+                return False
+            writer.close()
+        except (OSError, ValueError) as e:
+            print(f"ModelView: could not write render to {path}: {e}", file=sys.stderr)
+            if writer is not None:
+                writer.abort()
+            return False
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        return True
 
-            rad_x = self._rotation_x * math.pi / 180.0
-            rad_y = self._rotation_y * math.pi / 180.0
-            cam_x = zoom * math.cos(rad_x) * math.cos(rad_y)
-            cam_y = zoom * math.cos(rad_x) * math.sin(rad_y)
-            cam_z = center_z + zoom * math.sin(rad_x)
+    def capture_sequence(self, width, height, directory, fps=SEQUENCE_FPS):
+        """Render one cycle of the current torso and legs animations at fps
+        with smart framing, writing frame_NNNN.png files into directory.
 
-            view_matrix = _build_look_at(cam_x, cam_y, cam_z, 0, 0, center_z, 0, 0, 1)
+        Frames are read back through a ring of pixel-pack buffers so each
+        readback overlaps the next frames' rendering, and PNG encoding runs
+        on a worker thread. Returns the number of frames written, or None
+        if the capture could not start.
+        """
+        self.make_current()
+        model = self.player_model
+        if not (model and self.texture_cache):
+            return None
+        width, height = min(width, max_render_size()), min(height, max_render_size())
+        target = self._fbo_pool.acquire(width, height)
+        if target is None:
+            return None
 
-            self.player_model.render(self.renderer, self.texture_cache,
-                                     view_matrix, proj_matrix, self.gamma)
+        torso_anim, legs_anim = model.torso_anim, model.legs_anim
+        duration_ms = 0.0
+        if model.anim_config is not None:
+            for anim in (torso_anim, legs_anim):
+                timeline = model.anim_config.timelines[anim]
+                if timeline.animated:
+                    duration_ms = max(duration_ms, timeline.num_frames * timeline.frame_lerp)
+        count = max(1, math.ceil(duration_ms * fps / 1000.0))
+
+        view_matrix, proj_matrix = self._capture_camera(width, height, True)
+        lod = model.select_lod(view_matrix, proj_matrix)
+        # Rows come back top first with y flipped in the projection; the
+        # flip mirrors winding, so front faces turn counter-clockwise
+        proj_matrix = flip_projection(proj_matrix)
+        glFrontFace(GL_CCW)
+
+        ring = PixelPackRing(width, height)
+        encoder = FrameEncoder(directory)
+        try:
+            for index in range(count):
+                pose = model.pose_at(torso_anim, legs_anim, index * 1000.0 / fps)
+                self.frame_timer.begin_frame()
+                with self.frame_timer.stage('draw'):
+                    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                model.render_pose(pose, self.renderer, self.texture_cache,
+                                  view_matrix, proj_matrix, self.gamma, lod=lod)
+                with self.frame_timer.stage('readback'):
+                    finished = ring.read(index)
+                self.frame_timer.end_frame()
+                for frame in finished:
+                    encoder.submit(*frame)
+            for frame in ring.finished(wait=True):
+                encoder.submit(*frame)
+        finally:
+            ring.delete()
+            encoder.finish()
+            glFrontFace(GL_CW)  # Q3 winding order
+            self._fbo_pool.release(target)
+            glBindFramebuffer(GL_FRAMEBUFFER, 0)
+            scale = self.get_scale_factor()
+            glViewport(0, 0, self.get_width() * scale, self.get_height() * scale)
+        return encoder.written
 
-        # Read pixels
-        pixels = glReadPixels(0, 0, w, h, GL_RGBA, GL_UNSIGNED_BYTE)
+    def _render_to_image(self, w, h, use_smart_framing=False):
+        """Internal: render offscreen and return PIL Image."""
+        bands = []
+        if not self._render_tiled(w, h, use_smart_framing, bands.append):
+            return None
+        return Image.fromarray(np.concatenate(bands), 'RGB')
+
+    def _capture_camera(self, w, h, use_smart_framing):
+        """(view, projection) matrices for a w x h capture of player_model."""
+        aspect = w / h
+        fov_y = 45.0
+        proj_matrix = _build_perspective(fov_y, aspect, 1.0, 2000.0)
+
+        target_x, target_y = 0.0, 0.0
+        target_z = self.player_model.center_height
+
+        if use_smart_framing:
+            # Smart framing: fit the bounding sphere of the whole chosen
+            # animation, not just the idle pose
+            bounds = self.player_model.animation_bounds(self.player_model.torso_anim,
+                                                        self.player_model.legs_anim)
+            target_x, target_y, target_z = (float(c) for c in bounds.center)
+            radius = bounds.radius
+            padding = 1.4
+            half_fov_rad = fov_y * 0.5 * math.pi / 180.0
+            dist_v = (radius * padding) / math.sin(half_fov_rad)
+            half_h_fov = math.atan(math.tan(half_fov_rad) * aspect)
+            dist_h = (radius * padding) / math.sin(half_h_fov)
+            zoom = max(dist_v, dist_h)
+        else:
+            zoom = self._zoom
+
+        rad_x = self._rotation_x * math.pi / 180.0
+        rad_y = self._rotation_y * math.pi / 180.0
+        cam_x = target_x + zoom * math.cos(rad_x) * math.cos(rad_y)
+        cam_y = target_y + zoom * math.cos(rad_x) * math.sin(rad_y)
+        cam_z = target_z + zoom * math.sin(rad_x)
+
+        view_matrix = _build_look_at(cam_x, cam_y, cam_z,
+                                     target_x, target_y, target_z, 0, 0, 1)
+        return view_matrix, proj_matrix
+
+    def _render_tiled(self, w, h, use_smart_framing, write_rows):
+        """Render a w x h capture in tiles from the FBO pool and pass it to
+        write_rows as (rows, w, 3) uint8 bands, top band first.
+
+        Each tile draws the same pose through a sub-frustum of the full
+        projection, so tiles may be as large as GL allows and the output
+        larger. Returns False if a tile framebuffer cannot be made.
+        """
+        pose = None
+        if self.player_model and self.texture_cache:
+            view_matrix, proj_matrix = self._capture_camera(w, h, use_smart_framing)
+            # One pose and LOD for every tile so the seams match
+            pose = self.player_model.current_pose()
+            lod = self.player_model.select_lod(view_matrix, proj_matrix)
+
+        # y is flipped in the projection so tiles read back top row first
+        glFrontFace(GL_CCW)
+        done = True
+        for y, rows, columns in capture_tiles(w, h, max_render_size()):
+            band = np.empty((rows, w, 3), dtype=np.uint8)
+            for x, cols in columns:
+                target = self._fbo_pool.acquire(cols, rows)
+                if target is None:
+                    done = False
+                    break
+                # Captures are timed as frames of their own, one per tile
+                self.frame_timer.begin_frame()
+                with self.frame_timer.stage('draw'):
+                    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                if pose is not None:
+                    self.player_model.render_pose(
+                        pose, self.renderer, self.texture_cache, view_matrix,
+                        flip_projection(tile_projection(proj_matrix, x, y, cols, rows, w, h)),
+                        self.gamma, lod=lod)
+                with self.frame_timer.stage('readback'):
+                    pixels = glReadPixels(0, 0, cols, rows, GL_RGBA, GL_UNSIGNED_BYTE)
+                self.frame_timer.end_frame()
+                self._fbo_pool.release(target)
+
+                # Strip alpha into the band
+                tile = np.frombuffer(pixels, dtype=np.uint8).reshape(rows, cols, 4)
+                band[:, x:x + cols] = tile[:, :, :3]
+            if not done:
+                break
+            write_rows(band)
 
-        # Cleanup FBO
+        glFrontFace(GL_CW)  # Q3 winding order
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
-        glDeleteFramebuffers(1, [fbo])
-        glDeleteTextures(1, [color_tex])
-        glDeleteRenderbuffers(1, [depth_rb])
 
         # Restore viewport
         scale = self.get_scale_factor()
         glViewport(0, 0, self.get_width() * scale, self.get_height() * scale)
-
-        # Convert to PIL Image (flip vertically, strip alpha)
-        img = Image.frombytes('RGBA', (w, h), pixels)
-        img = img.transpose(Image.FLIP_TOP_BOTTOM)
-        img = img.convert('RGB')
-        return img
+        return done
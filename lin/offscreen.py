@@ -0,0 +1,220 @@
+"""Pooled offscreen framebuffers, tiled capture and a streaming PNG writer."""
+
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+from OpenGL.GL import *
+
+# Idle framebuffers kept for reuse; the least recently released go first
+MAX_IDLE_FRAMEBUFFERS = 4
+
+# Tallest tile a capture renders; bounds the readback held per row band
+CAPTURE_BAND_ROWS = 512
+
+# Compressed bytes gathered before an IDAT chunk is written
+PNG_CHUNK_BYTES = 1 << 20
+
+
+def max_render_size():
+    """Largest square render target the current context supports."""
+    viewport = glGetIntegerv(GL_MAX_VIEWPORT_DIMS)
+    return int(min(glGetIntegerv(GL_MAX_RENDERBUFFER_SIZE),
+                   glGetIntegerv(GL_MAX_TEXTURE_SIZE), *viewport))
+
+
+class PooledFramebuffer:
+    """Color texture + depth renderbuffer FBO handed out by FBOPool."""
+
+    def __init__(self, key):
+        self.key = key
+        self.width, self.height, self.color_format, self.depth_format = key
+        self.fbo = 0
+        self.color_tex = 0
+        self.depth_rb = 0
+
+    def _allocate(self):
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+        self.color_tex = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.color_tex)
+        glTexImage2D(GL_TEXTURE_2D, 0, self.color_format, self.width, self.height, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D,
+                               self.color_tex, 0)
+
+        self.depth_rb = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, self.depth_format, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER,
+                                  self.depth_rb)
+        return glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+
+    def bind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+    def delete(self):
+        if self.fbo:
+            glDeleteFramebuffers(1, [self.fbo])
+            glDeleteTextures(1, [self.color_tex])
+            glDeleteRenderbuffers(1, [self.depth_rb])
+        self.fbo = self.color_tex = self.depth_rb = 0
+
+
+class FBOPool:
+    """Offscreen framebuffers keyed by (width, height, color, depth format).
+
+    acquire() reuses an idle framebuffer of the same key or allocates one;
+    release() returns it to the pool. Captures of the same size then cost
+    no allocations after the first. Needs the GL context current.
+    """
+
+    def __init__(self, max_idle=MAX_IDLE_FRAMEBUFFERS):
+        self.max_idle = max_idle
+        self._idle = []  # released framebuffers, oldest first
+
+    def acquire(self, width, height, color_format=GL_RGBA8,
+                depth_format=GL_DEPTH_COMPONENT24):
+        """Bind and return a framebuffer of the given size and formats, or
+        None if one cannot be completed."""
+        key = (int(width), int(height), color_format, depth_format)
+        for i, target in enumerate(self._idle):
+            if target.key == key:
+                del self._idle[i]
+                target.bind()
+                return target
+
+        target = PooledFramebuffer(key)
+        if not target._allocate():
+            print(f"FBOPool: {width}x{height} FBO not complete", file=sys.stderr)
+            glBindFramebuffer(GL_FRAMEBUFFER, 0)
+            target.delete()
+            return None
+        target.bind()
+        return target
+
+    def release(self, target):
+        self._idle.append(target)
+        while len(self._idle) > self.max_idle:
+            self._idle.pop(0).delete()
+
+    def delete_all(self):
+        for target in self._idle:
+            target.delete()
+        self._idle = []
+
+
+def tile_projection(proj_matrix, x, y, tile_width, tile_height, width, height):
+    """Sub-frustum of a column-major projection covering the pixel rectangle
+    (x, y, tile_width, tile_height) of a width x height image, y up.
+
+    The tile's NDC range is scaled and shifted to fill [-1, 1], so tiles
+    rendered with it line up exactly with the full-size image.
+    """
+    sx = width / tile_width
+    sy = height / tile_height
+    tx = (width - 2.0 * x - tile_width) / tile_width
+    ty = (height - 2.0 * y - tile_height) / tile_height
+    crop = np.array([[sx, 0, 0, tx],
+                     [0, sy, 0, ty],
+                     [0, 0, 1, 0],
+                     [0, 0, 0, 1]], dtype=np.float64)
+    proj = np.asarray(proj_matrix, dtype=np.float64).reshape(4, 4).T
+    return (crop @ proj).T.reshape(16).astype(np.float32)
+
+
+def capture_tiles(width, height, max_size):
+    """Split a width x height capture into tiles no larger than max_size
+    wide and CAPTURE_BAND_ROWS tall.
+
+    Returns [(y, band_height, [(x, tile_width), ...])] with bands ordered
+    top to bottom and y measured from the bottom, as GL does.
+    """
+    tile_w = min(width, max_size)
+    band_h = min(height, max_size, CAPTURE_BAND_ROWS)
+    columns = [(x, min(tile_w, width - x)) for x in range(0, width, tile_w)]
+    bands = []
+    for top in range(0, height, band_h):
+        rows = min(band_h, height - top)
+        bands.append((height - top - rows, rows, columns))
+    return bands
+
+
+def _png_chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data +
+            struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+class PNGStreamWriter:
+    """Writes an 8-bit RGB PNG row band by row band.
+
+    Rows go through one zlib stream and out in IDAT chunks as they fill,
+    so only the band being written is ever held in memory.
+    """
+
+    def __init__(self, path, width, height, level=6):
+        self.width = width
+        self.height = height
+        self._rows_written = 0
+        self._compressor = zlib.compressobj(level)
+        self._pending = []
+        self._pending_size = 0
+        self._path = path
+        self._file = open(path, 'wb')
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        # IHDR: width, height, bit depth 8, color type 2 (RGB), deflate,
+        # adaptive filtering, no interlace
+        self._file.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height,
+                                                         8, 2, 0, 0, 0)))
+
+    def write_rows(self, rows):
+        """Append an (n, width, 3) uint8 array of rows, top row first."""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"PNGStreamWriter: expected rows of {self.width}x3, "
+                             f"got {rows.shape[1:]}")
+        if self._rows_written + len(rows) > self.height:
+            raise ValueError("PNGStreamWriter: more rows than the image height")
+        # Every scanline is prefixed with filter type 0 (none)
+        filtered = np.zeros((len(rows), self.width * 3 + 1), dtype=np.uint8)
+        filtered[:, 1:] = rows.reshape(len(rows), -1)
+        self._add(self._compressor.compress(filtered.tobytes()))
+        self._rows_written += len(rows)
+
+    def _add(self, data, flush=False):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size and (flush or self._pending_size >= PNG_CHUNK_BYTES):
+            self._file.write(_png_chunk(b'IDAT', b''.join(self._pending)))
+            self._pending = []
+            self._pending_size = 0
+
+    def close(self):
+        """Finish the image; raises ValueError if rows are missing."""
+        if self._file is None:
+            return
+        try:
+            if self._rows_written != self.height:
+                raise ValueError(f"PNGStreamWriter: {self._rows_written} of "
+                                 f"{self.height} rows written")
+            self._add(self._compressor.flush(), flush=True)
+            self._file.write(_png_chunk(b'IEND', b''))
+        finally:
+            self._file.close()
+            self._file = None
+
+    def abort(self):
+        """Stop writing and remove the file, also after a close() that raised."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self._path)
+        except OSError:
+            pass
@@ -3,6 +3,10 @@
 import os
 import zipfile
 
+from md3_types import MD3_MAX_LODS
+
+PLAYER_PARTS = ('lower', 'upper', 'head')
+
 
 class PK3Archive:
     def __init__(self, path):
@@ -46,6 +50,19 @@ class PK3Archive:
         valid.sort()
         return valid
 
+    def player_model_lod_count(self, model_path):
+        """Number of LOD levels for a player: lower_1.md3, upper_2.md3, ...
+
+        Like the engine, a level counts if any part has a mesh for it;
+        missing parts reuse the next finer level.
+        """
+        count = 1
+        for lod in range(1, MD3_MAX_LODS):
+            names = (f'{model_path}/{part}_{lod}.md3'.lower() for part in PLAYER_PARTS)
+            if any(name in self._lower_map for name in names):
+                count = lod + 1
+        return count
+
     def read_file(self, path):
         """Read a file from the archive with case-insensitive lookup."""
         # Try exact match first
@@ -0,0 +1,133 @@
+"""Persistent on-disk cache of linked GL program binaries."""
+
+import hashlib
+import os
+import struct
+import sys
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.error import GLError
+
+# ProgramHeader: magic[4], version, binaryFormat, dataSize
+PROGRAM_HEADER_FMT = '<4sIII'
+PROGRAM_HEADER_SIZE = struct.calcsize(PROGRAM_HEADER_FMT)
+PROGRAM_MAGIC = b'MD3P'
+PROGRAM_VERSION = 1
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'md3view', 'programs')
+
+
+def _program_binary_supported():
+    """Check the current context for GL 4.1 or GL_ARB_get_program_binary,
+    with at least one binary format."""
+    try:
+        version = (glGetIntegerv(GL_MAJOR_VERSION), glGetIntegerv(GL_MINOR_VERSION))
+        found = tuple(int(v) for v in version) >= (4, 1)
+        if not found:
+            count = glGetIntegerv(GL_NUM_EXTENSIONS)
+            for i in range(int(count)):
+                name = glGetStringi(GL_EXTENSIONS, i)
+                if name in (b'GL_ARB_get_program_binary', 'GL_ARB_get_program_binary'):
+                    found = True
+                    break
+        return found and int(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS)) > 0
+    except Exception:
+        return False
+
+
+class ProgramCache:
+    """Linked programs keyed by driver (vendor, renderer, version) and a
+    hash of the shader sources and attribute bindings.
+
+    Support is checked lazily once a GL context is current; without it
+    load() always misses and callers compile from source as usual.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self._supported = None
+        self._driver = b''
+
+    def supported(self):
+        if self._supported is None:
+            self._supported = _program_binary_supported()
+            if self._supported:
+                self._driver = b'\0'.join(glGetString(name) or b''
+                                          for name in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+        return self._supported
+
+    def _path(self, vertex_source, fragment_source, attributes):
+        digest = hashlib.sha1(self._driver)
+        for text in (vertex_source, fragment_source, ','.join(attributes)):
+            digest.update(b'\0' + text.encode())
+        return os.path.join(self.cache_dir, digest.hexdigest() + '.bin')
+
+    def prepare(self, program):
+        """Ask the driver to keep program's binary retrievable; call before linking."""
+        if self.supported():
+            glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+
+    def load(self, vertex_source, fragment_source, attributes=()):
+        """Return a linked program from the cache, or 0 on a miss or a binary
+        the driver rejects (e.g. after a driver update)."""
+        if not self.supported():
+            return 0
+        path = self._path(vertex_source, fragment_source, attributes)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return 0
+
+        if len(data) < PROGRAM_HEADER_SIZE:
+            return 0
+        magic, version, binary_format, size = struct.unpack_from(PROGRAM_HEADER_FMT, data, 0)
+        if magic != PROGRAM_MAGIC or version != PROGRAM_VERSION or \
+                PROGRAM_HEADER_SIZE + size != len(data):
+            return 0
+
+        program = glCreateProgram()
+        binary = np.frombuffer(data, dtype=np.uint8, offset=PROGRAM_HEADER_SIZE)
+        try:
+            glProgramBinary(program, binary_format, binary, size)
+            linked = glGetProgramiv(program, GL_LINK_STATUS) == GL_TRUE
+        except GLError:
+            # A binary format this driver does not accept
+            linked = False
+        if not linked:
+            glDeleteProgram(program)
+            # Stale entry; the caller compiles from source and saves afresh
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return 0
+        return program
+
+    def save(self, vertex_source, fragment_source, attributes, program):
+        """Store a linked program's binary for the next start."""
+        if not self.supported():
+            return
+        size = int(glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH))
+        if size <= 0:
+            return
+        binary = np.empty(size, dtype=np.uint8)
+        length = np.zeros(1, dtype=np.int32)
+        binary_format = np.zeros(1, dtype=np.uint32)
+        glGetProgramBinary(program, size, length, binary_format, binary)
+
+        path = self._path(vertex_source, fragment_source, attributes)
+        tmp_path = path + '.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(struct.pack(PROGRAM_HEADER_FMT, PROGRAM_MAGIC, PROGRAM_VERSION,
+                                    int(binary_format[0]), int(length[0])))
+                f.write(binary[:int(length[0])].tobytes())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"ProgramCache: failed to write {path}: {e}", file=sys.stderr)
@@ -0,0 +1,115 @@
+"""CPU BC1/BC3 (S3TC/DXT) block compression with NumPy."""
+
+import numpy as np
+
+BC1_BLOCK_SIZE = 8
+BC3_BLOCK_SIZE = 16
+
+
+def has_alpha(rgba):
+    """True if any pixel is not fully opaque (alpha-tested skins need BC3)."""
+    return bool((rgba[..., 3] != 255).any())
+
+
+def encode_bc1(rgba):
+    """Compress an (h, w, 4) uint8 RGBA image to BC1 blocks (alpha ignored)."""
+    blocks = _to_blocks(rgba)
+    return _encode_color_blocks(blocks[..., :3]).tobytes()
+
+
+def encode_bc3(rgba):
+    """Compress an (h, w, 4) uint8 RGBA image to BC3 blocks (alpha + color)."""
+    blocks = _to_blocks(rgba)
+    alpha = _encode_alpha_blocks(blocks[..., 3])
+    color = _encode_color_blocks(blocks[..., :3])
+    return np.concatenate([alpha, color], axis=1).tobytes()
+
+
+def _to_blocks(rgba):
+    """Pad to a multiple of 4 by edge replication and split into (n, 16, 4) blocks."""
+    h, w = rgba.shape[:2]
+    pad_h = (-h) % 4
+    pad_w = (-w) % 4
+    if pad_h or pad_w:
+        rgba = np.pad(rgba, ((0, pad_h), (0, pad_w), (0, 0)), mode='edge')
+    bh = rgba.shape[0] // 4
+    bw = rgba.shape[1] // 4
+    blocks = rgba.reshape(bh, 4, bw, 4, 4).transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(bh * bw, 16, 4)
+
+
+def _pack_565(rgb):
+    rgb = rgb.astype(np.uint16)
+    return ((rgb[..., 0] >> 3) << 11) | ((rgb[..., 1] >> 2) << 5) | (rgb[..., 2] >> 3)
+
+
+def _unpack_565(c):
+    r = (c >> 11) & 0x1F
+    g = (c >> 5) & 0x3F
+    b = c & 0x1F
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)],
+                    axis=-1).astype(np.int32)
+
+
+def _encode_color_blocks(rgb):
+    """Range-fit each block's RGB bounding box to two 565 endpoints.
+
+    The endpoints span the box diagonal that follows the block's colors:
+    channels that fall as the widest-range channel rises have their min and
+    max swapped, so e.g. a red/green block keeps red and green endpoints
+    instead of collapsing to their mix. Endpoints are ordered c0 > c1 so
+    decoders use four-color mode, which is what BC3 always assumes and what
+    opaque BC1 needs.
+    """
+    hi = rgb.max(axis=1).astype(np.int32)
+    lo = rgb.min(axis=1).astype(np.int32)
+    centered = rgb.astype(np.int32) - rgb.mean(axis=1, keepdims=True).astype(np.int32)
+    n = np.arange(len(rgb))
+    major = (hi - lo).argmax(axis=1)
+    covariance = (centered * centered[n, :, major][:, :, None]).sum(axis=1)
+    swap = covariance < 0
+    hi, lo = np.where(swap, lo, hi), np.where(swap, hi, lo)
+    c_max = _pack_565(hi)
+    c_min = _pack_565(lo)
+    c0 = np.maximum(c_max, c_min)
+    c1 = np.minimum(c_max, c_min)
+
+    e0 = _unpack_565(c0)
+    e1 = _unpack_565(c1)
+    palette = np.stack([e0, e1, (2 * e0 + e1) // 3, (e0 + 2 * e1) // 3], axis=1)
+
+    diff = rgb[:, :, None, :].astype(np.int32) - palette[:, None, :, :]
+    indices = (diff * diff).sum(axis=-1).argmin(axis=-1).astype(np.uint32)
+    indices[c0 == c1] = 0
+
+    shifts = np.arange(16, dtype=np.uint32) * 2
+    packed = (indices << shifts).sum(axis=1, dtype=np.uint32)
+
+    out = np.empty((rgb.shape[0], BC1_BLOCK_SIZE), dtype=np.uint8)
+    out[:, 0:2] = c0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = packed.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _encode_alpha_blocks(alpha):
+    """Encode BC3 alpha with a0 = max, a1 = min (eight-value interpolation)."""
+    a0 = alpha.max(axis=1).astype(np.int32)
+    a1 = alpha.min(axis=1).astype(np.int32)
+
+    weights = np.arange(1, 7, dtype=np.int32)
+    interp = ((7 - weights)[None, :] * a0[:, None] + weights[None, :] * a1[:, None]) // 7
+    palette = np.concatenate([a0[:, None], a1[:, None], interp], axis=1)
+
+    diff = alpha[:, :, None].astype(np.int32) - palette[:, None, :]
+    indices = np.abs(diff).argmin(axis=-1).astype(np.uint64)
+    indices[a0 == a1] = 0
+
+    shifts = np.arange(16, dtype=np.uint64) * 3
+    packed = (indices << shifts).sum(axis=1, dtype=np.uint64)
+
+    out = np.empty((alpha.shape[0], BC3_BLOCK_SIZE - BC1_BLOCK_SIZE), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    out[:, 2:8] = packed.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
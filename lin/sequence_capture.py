@@ -0,0 +1,166 @@
+"""Asynchronous readback and background encoding for frame-sequence capture."""
+
+import ctypes
+import os
+import queue
+import sys
+import threading
+from collections import deque
+
+import numpy as np
+from OpenGL.GL import *
+# Raw entry point so a PBO offset can be passed where PyOpenGL expects an array
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as glReadPixelsRaw
+
+from offscreen import PNGStreamWriter
+
+# Pixel-pack buffers in flight; frame N is read back while N+1.. render
+PBO_RING_SIZE = 3
+
+# Finished frames allowed to wait for the encoder before capture blocks
+MAX_QUEUED_FRAMES = 8
+
+# Wait for a fence in steps of this many nanoseconds
+_FENCE_WAIT_NS = 100_000_000
+
+
+def flip_projection(proj_matrix):
+    """Column-major projection with clip-space y negated, so glReadPixels
+    returns rows top first. Flipping y mirrors triangle winding, so draw
+    with the opposite glFrontFace while it is in use."""
+    flipped = np.array(proj_matrix, dtype=np.float32)
+    flipped[1::4] *= -1.0
+    return flipped
+
+
+class PixelPackRing:
+    """Ring of pixel-pack buffers for glReadPixels without a pipeline stall.
+
+    read() starts copying the bound framebuffer into the next buffer and
+    fences it; finished() maps the buffers whose fence has signalled.
+    Only when every buffer is still in flight does read() wait, on the
+    oldest. Needs the GL context current.
+    """
+
+    def __init__(self, width, height, size=PBO_RING_SIZE):
+        self.width = width
+        self.height = height
+        self._bytes = width * height * 4
+        self._buffers = [int(b) for b in np.atleast_1d(glGenBuffers(size))]
+        for buffer in self._buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self._bytes, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._next = 0
+        self._pending = deque()  # (tag, buffer, fence), oldest first
+
+    def read(self, tag):
+        """Queue a readback of the bound framebuffer labelled tag. Returns
+        frames that finished meanwhile, as finished() does."""
+        done = []
+        if len(self._pending) == len(self._buffers):
+            done.append(self._retire(wait=True))
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        glReadPixelsRaw(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE,
+                        ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._pending.append((tag, buffer, glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)))
+        done.extend(self.finished())
+        return done
+
+    def finished(self, wait=False):
+        """[(tag, (height, width, 4) uint8 array)] for the readbacks that
+        have completed, oldest first; with wait, for all of them."""
+        done = []
+        while self._pending:
+            frame = self._retire(wait)
+            if frame is None:
+                break
+            done.append(frame)
+        return done
+
+    def _retire(self, wait):
+        tag, buffer, fence = self._pending[0]
+        timeout = _FENCE_WAIT_NS if wait else 0
+        while True:
+            status = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, timeout)
+            if status != GL_TIMEOUT_EXPIRED:
+                break
+            if not wait:
+                return None
+        # On GL_WAIT_FAILED mapping below still synchronizes, just slower
+        self._pending.popleft()
+        glDeleteSync(fence)
+
+        pixels = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        pointer = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self._bytes, GL_MAP_READ_BIT)
+        if pointer:
+            ctypes.memmove(pixels.ctypes.data, pointer, self._bytes)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        else:
+            print(f"PixelPackRing: could not map buffer for frame {tag}", file=sys.stderr)
+            pixels[:] = 0
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        return tag, pixels
+
+    def delete(self):
+        for _, _, fence in self._pending:
+            glDeleteSync(fence)
+        self._pending.clear()
+        if self._buffers:
+            glDeleteBuffers(len(self._buffers), self._buffers)
+        self._buffers = []
+
+
+class FrameEncoder:
+    """Writes captured frames to PNG files on a worker thread.
+
+    submit() hands over a top-row-first RGBA frame and returns at once
+    unless MAX_QUEUED_FRAMES are already waiting, which bounds memory
+    when encoding is slower than rendering. finish() waits for the rest.
+    """
+
+    def __init__(self, directory, name_format='frame_{:04d}.png',
+                 max_queued=MAX_QUEUED_FRAMES):
+        self.directory = directory
+        self.name_format = name_format
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, index, pixels):
+        self._queue.put((index, pixels))
+
+    def finish(self):
+        """Wait for queued frames; returns True if all were written."""
+        self._queue.put(None)
+        self._thread.join()
+        return self.failed == 0
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, pixels = item
+            path = os.path.join(self.directory, self.name_format.format(index))
+            height, width = pixels.shape[:2]
+            writer = None
+            try:
+                writer = PNGStreamWriter(path, width, height)
+                writer.write_rows(pixels[:, :, :3])
+                writer.close()
+                self.written += 1
+            except Exception as e:
+                # Anything escaping would end the thread and leave submit()
+                # blocked on a full queue
+                print(f"FrameEncoder: failed to write {path}: {e}", file=sys.stderr)
+                if writer is not None:
+                    writer.abort()
+                self.failed += 1
@@ -34,3 +34,13 @@ def parse_skin_data(data):
         result[surf_name.lower()] = tex_path
 
     return result
+
+
+def surface_texture_path(skin, surf):
+    """Resolve a surface's texture path from the skin, falling back to its shader name."""
+    tex_path = None
+    if skin:
+        tex_path = skin.get(surf.name)
+    if tex_path is None and surf.shaderName:
+        tex_path = surf.shaderName
+    return tex_path
@@ -0,0 +1,90 @@
+"""Baked per-frame tag matrices and vectorized tag-chain evaluation.
+
+Tags are stored as 4x4 float32 matrices in row-vector layout: rows 0-2 are
+the tag axis and row 3 is the origin, so child = tag @ parent matches the
+Q3 stitching rules and the flat memory order is the column-major GL model
+matrix the renderer uploads.
+"""
+
+import numpy as np
+
+_IDENTITY = np.eye(4, dtype=np.float32)
+
+
+def bake_tag_matrices(model, tag_name):
+    """Return (num_frames + 1, 4, 4) tag matrices for tag_name.
+
+    The extra trailing entry is identity and stands in for missing tags and
+    out-of-range frames, matching MD3PlayerModel's identity fallback.
+    """
+    table = np.tile(_IDENTITY, (model.num_frames + 1, 1, 1))
+    for frame in range(model.num_frames):
+        tag = model.tag_for_name(tag_name, frame)
+        if tag is None:
+            continue
+        table[frame, :3, :3] = tag.axis
+        table[frame, 3, :3] = tag.origin
+    return table
+
+
+def _frame_index(table, frame):
+    frame = np.asarray(frame)
+    last = len(table) - 1
+    return np.where((frame >= 0) & (frame < last), frame, last)
+
+
+def lerp_tag_matrices(table, frame_a, frame_b, frac, out=None):
+    """Interpolate baked tags between frame_a and frame_b (scalars or arrays).
+
+    Axis rows are renormalized like the engine's lerp-tag; near-zero rows
+    are left as-is. If either frame is out of range the result is identity,
+    as in MD3PlayerModel's fallback, rather than a blend towards identity.
+    """
+    index_a = _frame_index(table, frame_a)
+    index_b = _frame_index(table, frame_b)
+    a = table[index_a]
+    b = table[index_b]
+    if out is None:
+        out = np.empty(a.shape, dtype=np.float32)
+    np.subtract(b, a, out=out)
+    out *= np.asarray(frac, dtype=np.float32)[..., None, None]
+    out += a
+
+    axes = out[..., :3, :3]
+    length = np.sqrt((axes * axes).sum(axis=-1, keepdims=True))
+    length[length <= 0.0001] = 1.0
+    axes /= length
+
+    last = len(table) - 1
+    missing = (index_a == last) | (index_b == last)
+    if missing.any():
+        out[np.broadcast_to(missing, out.shape[:-2])] = _IDENTITY
+    return out
+
+
+class TagChain:
+    """lower -> tag_torso -> upper -> tag_head -> head, baked at load time."""
+
+    def __init__(self, lower, upper):
+        self.torso_tags = bake_tag_matrices(lower, 'tag_torso')
+        self.head_tags = bake_tag_matrices(upper, 'tag_head')
+
+    def evaluate(self, legs_fa, legs_fb, legs_frac, torso_fa, torso_fb, torso_frac,
+                 out=None):
+        """Return (..., 3, 4, 4) legs/torso/head part matrices.
+
+        Inputs may be scalars or equally shaped arrays for many instances or
+        timesteps at once; pass out to reuse a buffer across calls.
+        """
+        shape = np.broadcast(np.asarray(legs_fa), np.asarray(torso_fa)).shape
+        if out is None:
+            out = np.empty(shape + (3, 4, 4), dtype=np.float32)
+
+        out[..., 0, :, :] = _IDENTITY
+        lerp_tag_matrices(self.torso_tags, legs_fa, legs_fb, legs_frac,
+                          out=out[..., 1, :, :])
+        # Legs sit at the origin, so the torso transform is tag_torso itself
+        head_tag = lerp_tag_matrices(self.head_tags, torso_fa, torso_fb, torso_frac,
+                                     out=out[..., 2, :, :])
+        np.matmul(head_tag, out[..., 1, :, :], out=out[..., 2, :, :])
+        return out
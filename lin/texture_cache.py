@@ -1,17 +1,102 @@
 """GL texture loading and caching with Pillow."""
 
 import io
+import itertools
 import sys
+import time
+from collections import deque
 
+import numpy as np
 from OpenGL.GL import *
+from OpenGL.GL.EXT.texture_compression_s3tc import (
+    GL_COMPRESSED_RGB_S3TC_DXT1_EXT, GL_COMPRESSED_RGBA_S3TC_DXT5_EXT,
+)
 from PIL import Image
 
+from image_utils import build_mip_chain, shrink_to_fit
+from s3tc_encoder import encode_bc1, encode_bc3, has_alpha
+from tga_decoder import decode_tga
+from texture_store import TextureStore, content_key, FORMAT_BC1, FORMAT_BC3
+
+# Unique token per cache state; bumped on flush so holders of texture names
+# (e.g. MD3PlayerModel's resolved skin tables) know when to re-resolve.
+_generations = itertools.count(1)
+
+_S3TC_GL_FORMATS = {
+    FORMAT_BC1: GL_COMPRESSED_RGB_S3TC_DXT1_EXT,
+    FORMAT_BC3: GL_COMPRESSED_RGBA_S3TC_DXT5_EXT,
+}
+
+
+def _s3tc_supported():
+    """Check the current context for GL_EXT_texture_compression_s3tc."""
+    try:
+        count = glGetIntegerv(GL_NUM_EXTENSIONS)
+        for i in range(int(count)):
+            name = glGetStringi(GL_EXTENSIONS, i)
+            if name in (b'GL_EXT_texture_compression_s3tc', 'GL_EXT_texture_compression_s3tc'):
+                return True
+    except Exception:
+        pass
+    return False
+
+
+def _to_rgba_array(width, height, gl_format, pixels):
+    """Convert a decoded image to an (h, w, 4) RGBA uint8 array for the encoder."""
+    if gl_format == GL_RGBA:
+        return pixels
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[..., 0] = pixels[..., 2]
+    rgba[..., 1] = pixels[..., 1]
+    rgba[..., 2] = pixels[..., 0]
+    rgba[..., 3] = pixels[..., 3] if gl_format == GL_BGRA else 255
+    return rgba
+
+
+def _fit_image(image, max_size):
+    """Downscale a (width, height, gl_format, pixels) image to max_size."""
+    width, height, gl_format, pixels = image
+    if max(width, height) <= max_size:
+        return image
+    pixels = shrink_to_fit(pixels, max_size)
+    return pixels.shape[1], pixels.shape[0], gl_format, np.ascontiguousarray(pixels)
+
+
+def _fit_levels(levels, max_size):
+    """Drop leading mip levels larger than max_size (keeps at least one)."""
+    start = 0
+    while start < len(levels) - 1 and max(levels[start][0], levels[start][1]) > max_size:
+        start += 1
+    return levels[start:]
+
 
 class TextureCache:
-    def __init__(self, archive):
+    def __init__(self, archive, use_texture_arrays=False, compress_textures=False,
+                 store=None, progressive=False, preview_size=64, max_texture_size=0):
         self._archive = archive
         self._cache = {}
         self._white_texture = 0
+        self.generation = next(_generations)
+        # Largest texture this view will ever upload (0 = unlimited), so
+        # small views never pay for full-resolution skins.
+        self.max_texture_size = max_texture_size
+        # Progressive streaming: upload a preview_size mip first and queue the
+        # full chain for stream_pending() to upgrade in place on a time budget.
+        self.progressive = progressive
+        self.preview_size = preview_size
+        self._pending = deque()  # (tex, kind, payload) awaiting full upload
+        # CPU-decoded textures waiting for their GL upload (see decode_textures)
+        self._decoded = {}
+        # Optional BC1/BC3 compression, persisted in a TextureStore on disk.
+        # Driver support is checked lazily once a GL context is current.
+        self.compress_textures = compress_textures
+        self._store = store
+        self._s3tc_available = None
+        # Optional packing of a whole skin into GL_TEXTURE_2D_ARRAYs
+        self.use_texture_arrays = use_texture_arrays
+        self._packed = {}        # tuple of path keys -> {path key: (array tex, layer)}
+        self._array_textures = []
+        self._texture_bytes = {}  # texture name -> estimated GPU bytes
 
     def white_texture(self):
         if self._white_texture == 0:
@@ -33,50 +118,288 @@ class TextureCache:
         if cached is not None:
             return cached
 
+        if key in self._decoded:
+            decoded = self._decoded.pop(key)
+        else:
+            decoded = self._decode_texture(path)
+        tex = self._upload_texture(*decoded) if decoded is not None else None
+        if tex is None:
+            self._cache[key] = self.white_texture()
+            return self.white_texture()
+
+        self._cache[key] = tex
+        return tex
+
+    def detect_capabilities(self):
+        """Query optional GL features. Call with the context current before
+        decode_textures() runs off the main thread."""
+        self._use_compression()
+
+    def decode_textures(self, paths, cancelled=None, progress=None):
+        """CPU-only half of loading (file reads, decode, S3TC encode); safe to
+        run on a worker thread. Results are uploaded by upload_decoded() or
+        on first use. progress(done, total) is called after each texture."""
+        keys = [p for p in dict.fromkeys(p.lower() for p in paths if p)]
+        for i, key in enumerate(keys):
+            if cancelled is not None and cancelled():
+                return False
+            if key not in self._cache and key not in self._decoded:
+                self._decoded[key] = self._decode_texture(key)
+            if progress is not None:
+                progress(i + 1, len(keys))
+        return True
+
+    def upload_decoded(self):
+        """GL half for decode_textures(): upload everything decoded so far."""
+        for key in list(self._decoded):
+            self.texture_for_path(key)
+
+    def _decode_texture(self, path):
+        """Read and decode one texture without touching GL. Returns (kind, payload) or None."""
+        if self._use_compression():
+            entry = self._load_compressed_entry(path)
+            if entry is None:
+                return None
+            fmt, _, _, levels = entry
+            if self.max_texture_size:
+                levels = _fit_levels(levels, self.max_texture_size)
+            return 'compressed', (fmt, levels)
+
+        image = self._load_image(path)
+        if image is None:
+            return None
+        if self.max_texture_size:
+            image = _fit_image(image, self.max_texture_size)
+        return 'image', image
+
+    def _upload_texture(self, kind, payload):
+        """Upload a decoded texture, as a preview mip first when streaming."""
+        if kind == 'image':
+            width, height = payload[0], payload[1]
+            preview = lambda: self._upload(*_fit_image(payload, self.preview_size))
+            upload = lambda: self._upload(*payload)
+        else:
+            fmt, levels = payload
+            width, height = levels[0][0], levels[0][1]
+            preview = lambda: self._upload_compressed(fmt, _fit_levels(levels, self.preview_size))
+            upload = lambda: self._upload_compressed(fmt, levels)
+
+        if self.progressive and max(width, height) > self.preview_size:
+            tex = preview()
+            self._pending.append((tex, kind, payload))
+            return tex
+        return upload()
+
+    def stream_pending(self, budget_ms=4.0):
+        """Upgrade preview textures to full resolution until budget_ms is spent.
+
+        Texture names stay the same, so anything already holding them picks
+        up the upgrade. At least one texture is processed per call. Returns
+        the number of textures still waiting.
+        """
+        deadline = time.monotonic() + budget_ms / 1000.0
+        while self._pending:
+            tex, kind, payload = self._pending.popleft()
+            if kind == 'image':
+                self._upload(*payload, tex=tex)
+            else:
+                self._upload_compressed(*payload, tex=tex)
+            if time.monotonic() >= deadline:
+                break
+        return len(self._pending)
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def _use_compression(self):
+        if not self.compress_textures:
+            return False
+        if self._s3tc_available is None:
+            self._s3tc_available = _s3tc_supported()
+            if not self._s3tc_available:
+                print("TextureCache: S3TC not supported, using uncompressed textures",
+                      file=sys.stderr)
+            elif self._store is None:
+                self._store = TextureStore()
+        return self._s3tc_available
+
+    def _read_image_file(self, path):
+        """Read texture bytes, trying alternate extensions. Returns (data, actual_path)."""
         # Try loading the file directly
         data = self._archive.read_file(path)
+        if data is not None:
+            return data, path
 
         # Try alternate extensions if not found
-        if data is None:
-            base = path.rsplit('.', 1)[0] if '.' in path else path
-            for ext in ('tga', 'jpg', 'jpeg', 'png', 'TGA', 'JPG', 'PNG'):
-                data = self._archive.read_file(base + '.' + ext)
-                if data is not None:
-                    break
+        base = path.rsplit('.', 1)[0] if '.' in path else path
+        for ext in ('tga', 'jpg', 'jpeg', 'png', 'TGA', 'JPG', 'PNG'):
+            data = self._archive.read_file(base + '.' + ext)
+            if data is not None:
+                return data, base + '.' + ext
+        return None, path
 
+    def _load_image(self, path):
+        """Read and decode a texture. Returns (width, height, gl_format, pixels) or None."""
+        data, actual_path = self._read_image_file(path)
         if data is None:
-            self._cache[key] = self.white_texture()
-            return self.white_texture()
+            return None
+        return self._decode_image(path, data, actual_path)
+
+    def _decode_image(self, path, data, actual_path):
+        # Fast path: most Q3 skins are TGA, which decode straight to BGR(A)
+        if actual_path.lower().endswith('.tga'):
+            try:
+                tga = decode_tga(data)
+            except Exception as e:
+                print(f"TextureCache: TGA decode failed for {path}: {e}", file=sys.stderr)
+                tga = None
+            if tga is not None:
+                width, height, channels, pixels = tga
+                return width, height, GL_BGRA if channels == 4 else GL_BGR, pixels
 
         try:
             img = Image.open(io.BytesIO(data))
             img = img.convert('RGBA')
             # Do NOT flip — Pillow loads top-to-bottom, matching Q3 UV convention
             width, height = img.size
-            pixels = img.tobytes()
+            pixels = np.asarray(img)
         except Exception as e:
             print(f"TextureCache: failed to decode {path}: {e}", file=sys.stderr)
-            self._cache[key] = self.white_texture()
-            return self.white_texture()
+            return None
+        return width, height, GL_RGBA, pixels
 
-        tex = glGenTextures(1)
+    def _upload(self, width, height, gl_format, pixels, tex=0):
+        if not tex:
+            tex = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, tex)
+        # BGR rows are not 4-byte aligned for odd widths
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
         glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0,
-                     GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+                     gl_format, GL_UNSIGNED_BYTE, pixels)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
         glGenerateMipmap(GL_TEXTURE_2D)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        # RGBA8 plus a full mip chain is ~4/3 of the base level
+        self._texture_bytes[tex] = width * height * 4 * 4 // 3
+        return tex
 
-        self._cache[key] = tex
+    def _load_compressed_entry(self, path):
+        """Load a texture as BC1/BC3, encoding and persisting it on a store miss.
+
+        Returns (format, width, height, levels) or None.
+        """
+        data, actual_path = self._read_image_file(path)
+        if data is None:
+            return None
+
+        key = content_key(data)
+        entry = self._store.load(key)
+        if entry is None:
+            image = self._decode_image(path, data, actual_path)
+            if image is None:
+                return None
+            rgba = _to_rgba_array(*image)
+            fmt = FORMAT_BC3 if has_alpha(rgba) else FORMAT_BC1
+            encode = encode_bc3 if fmt == FORMAT_BC3 else encode_bc1
+            levels = [(lvl.shape[1], lvl.shape[0], encode(lvl)) for lvl in build_mip_chain(rgba)]
+            entry = (fmt, image[0], image[1], levels)
+            self._store.save(key, *entry)
+        return entry
+
+    def _upload_compressed(self, fmt, levels, tex=0):
+        internal_format = _S3TC_GL_FORMATS[fmt]
+        if not tex:
+            tex = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, tex)
+        for level, (lw, lh, blob) in enumerate(levels):
+            glCompressedTexImage2D(GL_TEXTURE_2D, level, internal_format,
+                                   lw, lh, 0, len(blob), blob)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        self._texture_bytes[tex] = sum(len(blob) for _, _, blob in levels)
+        return tex
+
+    def texture_arrays_for_paths(self, paths):
+        """Pack every texture in paths into GL_TEXTURE_2D_ARRAYs grouped by size.
+
+        Returns a dict of lowercase path -> (array texture, layer). Textures
+        that fail to load become white layers in the largest group so a
+        skin whose images share one size is drawn with a single binding.
+        """
+        keys = tuple(sorted({p.lower() for p in paths if p}))
+        packed = self._packed.get(keys)
+        if packed is not None:
+            return packed
+
+        groups = {}   # (width, height) -> list of (key, width, height, gl_format, pixels)
+        missing = []
+        for key in keys:
+            image = self._load_image(key)
+            if image is None:
+                missing.append(key)
+                continue
+            if self.max_texture_size:
+                image = _fit_image(image, self.max_texture_size)
+            groups.setdefault((image[0], image[1]), []).append((key,) + image)
+
+        packed = {}
+        if groups:
+            largest = max(groups, key=lambda size: len(groups[size]))
+            width, height = largest
+            white = np.full((height, width, 4), 255, dtype=np.uint8)
+            for key in missing:
+                groups[largest].append((key, width, height, GL_RGBA, white))
+
+            for (width, height), layers in groups.items():
+                array_tex = self._upload_array(width, height, layers)
+                self._array_textures.append(array_tex)
+                for layer, entry in enumerate(layers):
+                    packed[entry[0]] = (array_tex, layer)
+
+        self._packed[keys] = packed
+        return packed
+
+    def _upload_array(self, width, height, layers):
+        tex = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, tex)
+        glTexImage3D(GL_TEXTURE_2D_ARRAY, 0, GL_RGBA8, width, height, len(layers), 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for layer, (_, _, _, gl_format, pixels) in enumerate(layers):
+            glTexSubImage3D(GL_TEXTURE_2D_ARRAY, 0, 0, 0, layer, width, height, 1,
+                            gl_format, GL_UNSIGNED_BYTE, pixels)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+        glGenerateMipmap(GL_TEXTURE_2D_ARRAY)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        self._texture_bytes[tex] = width * height * len(layers) * 4 * 4 // 3
         return tex
 
+    def memory_bytes(self):
+        """Estimated GPU memory held by this cache's textures."""
+        return sum(self._texture_bytes.values())
+
     def flush(self):
         for tex in self._cache.values():
             if tex != self._white_texture:
                 glDeleteTextures(1, [tex])
         self._cache.clear()
+        self._texture_bytes.clear()
+        self.generation = next(_generations)
+        self._pending.clear()
+        self._decoded.clear()
+        for tex in self._array_textures:
+            glDeleteTextures(1, [tex])
+        self._array_textures = []
+        self._packed.clear()
         if self._white_texture:
             glDeleteTextures(1, [self._white_texture])
             self._white_texture = 0
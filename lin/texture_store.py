@@ -0,0 +1,83 @@
+"""Persistent on-disk cache of block-compressed texture mip chains."""
+
+import hashlib
+import os
+import struct
+import sys
+
+# StoreHeader: magic[4], version, format, width, height, numLevels
+STORE_HEADER_FMT = '<4sIIIII'
+STORE_HEADER_SIZE = struct.calcsize(STORE_HEADER_FMT)
+STORE_MAGIC = b'MD3T'
+# Bumped when the encoder's output changes, so older blobs are re-encoded
+STORE_VERSION = 2
+
+# StoreLevel: width, height, dataSize
+STORE_LEVEL_FMT = '<III'
+STORE_LEVEL_SIZE = struct.calcsize(STORE_LEVEL_FMT)
+
+FORMAT_BC1 = 1
+FORMAT_BC3 = 3
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'md3view', 'textures')
+
+
+def content_key(data):
+    """Cache key for a source image: hash of its file bytes."""
+    return hashlib.sha1(data).hexdigest()
+
+
+class TextureStore:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.bcn')
+
+    def load(self, key):
+        """Return (format, width, height, levels) or None. levels: [(w, h, bytes), ...]."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < STORE_HEADER_SIZE:
+            return None
+        magic, version, fmt, width, height, num_levels = \
+            struct.unpack_from(STORE_HEADER_FMT, data, 0)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            return None
+
+        levels = []
+        off = STORE_HEADER_SIZE
+        for _ in range(num_levels):
+            if off + STORE_LEVEL_SIZE > len(data):
+                return None
+            lw, lh, size = struct.unpack_from(STORE_LEVEL_FMT, data, off)
+            off += STORE_LEVEL_SIZE
+            if off + size > len(data):
+                return None
+            levels.append((lw, lh, data[off:off + size]))
+            off += size
+        return fmt, width, height, levels
+
+    def save(self, key, fmt, width, height, levels):
+        parts = [struct.pack(STORE_HEADER_FMT, STORE_MAGIC, STORE_VERSION,
+                             fmt, width, height, len(levels))]
+        for lw, lh, blob in levels:
+            parts.append(struct.pack(STORE_LEVEL_FMT, lw, lh, len(blob)))
+            parts.append(blob)
+
+        path = self._path(key)
+        tmp_path = path + '.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(parts))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"TextureStore: failed to write {path}: {e}", file=sys.stderr)
@@ -0,0 +1,106 @@
+"""NumPy TGA decoder producing BGR/BGRA buffers ready for GL upload."""
+
+import struct
+
+import numpy as np
+
+# TGAHeader: idLength, colorMapType, imageType, colorMapFirst, colorMapLength,
+#            colorMapDepth, xOrigin, yOrigin, width, height, pixelDepth, descriptor
+TGA_HEADER_FMT = '<BBBHHBHHHHBB'
+TGA_HEADER_SIZE = struct.calcsize(TGA_HEADER_FMT)
+
+TGA_TYPE_TRUECOLOR = 2
+TGA_TYPE_TRUECOLOR_RLE = 10
+
+TGA_DESC_RIGHT_TO_LEFT = 0x10
+TGA_DESC_TOP_TO_BOTTOM = 0x20
+
+
+def decode_tga(data):
+    """Decode 24/32-bit truecolor TGA bytes (raw or RLE).
+
+    Returns (width, height, channels, pixels) where pixels is a contiguous
+    uint8 array of shape (height, width, channels) in BGR/BGRA order with
+    row 0 at the top of the image, or None if the file uses a layout this
+    decoder does not handle (colormapped, grayscale, 16-bit, truncated).
+    """
+    if data is None or len(data) < TGA_HEADER_SIZE:
+        return None
+
+    (id_length, cmap_type, image_type, _cmap_first, cmap_length, cmap_depth,
+     _x_origin, _y_origin, width, height, depth, descriptor) = \
+        struct.unpack_from(TGA_HEADER_FMT, data, 0)
+
+    if image_type not in (TGA_TYPE_TRUECOLOR, TGA_TYPE_TRUECOLOR_RLE):
+        return None
+    if depth not in (24, 32) or width == 0 or height == 0:
+        return None
+
+    channels = depth // 8
+    offset = TGA_HEADER_SIZE + id_length
+    if cmap_type == 1:
+        offset += cmap_length * ((cmap_depth + 7) // 8)
+
+    num_pixels = width * height
+    raw = np.frombuffer(data, dtype=np.uint8)
+
+    if image_type == TGA_TYPE_TRUECOLOR:
+        end = offset + num_pixels * channels
+        if end > len(raw):
+            return None
+        pixels = raw[offset:end].reshape(height, width, channels)
+    else:
+        pixels = _decode_rle(data, raw, offset, num_pixels, channels)
+        if pixels is None:
+            return None
+        pixels = pixels.reshape(height, width, channels)
+
+    # TGA defaults to bottom-left origin; GL expects row 0 at the top here
+    # (Q3 UVs treat t=0 as the top of the image).
+    if not descriptor & TGA_DESC_TOP_TO_BOTTOM:
+        pixels = pixels[::-1]
+    if descriptor & TGA_DESC_RIGHT_TO_LEFT:
+        pixels = pixels[:, ::-1]
+
+    return width, height, channels, np.ascontiguousarray(pixels)
+
+
+def _decode_rle(data, raw, offset, num_pixels, channels):
+    """Expand RLE packets into a flat uint8 array of num_pixels * channels.
+
+    Only the packet headers are walked in Python; pixel expansion is a single
+    vectorized gather from the source bytes.
+    """
+    src_starts = []   # byte offset of each packet's first source pixel
+    counts = []       # pixels produced by each packet
+    is_raw = []       # raw packets advance through source, RLE packets repeat
+    size = len(data)
+    produced = 0
+
+    while produced < num_pixels:
+        if offset >= size:
+            return None
+        header = data[offset]
+        offset += 1
+        count = (header & 0x7F) + 1
+        src_starts.append(offset)
+        counts.append(count)
+        if header & 0x80:
+            is_raw.append(0)
+            offset += channels
+        else:
+            is_raw.append(1)
+            offset += count * channels
+        produced += count
+
+    if offset > size:
+        return None
+
+    counts = np.asarray(counts, dtype=np.int64)
+    out_starts = np.cumsum(counts) - counts
+    within = np.arange(produced, dtype=np.int64) - np.repeat(out_starts, counts)
+    pixel_src = np.repeat(np.asarray(src_starts, dtype=np.int64), counts) + \
+        within * np.repeat(np.asarray(is_raw, dtype=np.int64) * channels, counts)
+
+    byte_src = pixel_src[:num_pixels, None] + np.arange(channels, dtype=np.int64)
+    return raw[byte_src].reshape(-1)